@@ -0,0 +1,400 @@
+"""
+오프라인 일괄 분석 CLI
+디렉토리(또는 매니페스트)의 이미지를 프로세스 풀에서 분석하여 JSONL / Parquet으로 저장합니다.
+카탈로그 / 고객 사진 야간 백필처럼 HTTP 서버를 거치지 않고 대량으로 분석할 때 사용합니다.
+
+    cd backend
+    python -m app.bulk_analyze photos/ -o results.jsonl
+    python -m app.bulk_analyze manifest.txt -o results.parquet --analyses face_shape --workers 8
+
+- 워커는 시작 시 필요한 모델만 한 번 로드하고, 경로 묶음(--batch-size)을 받아 디코딩과 분석을 모두 수행
+- 퍼스널 컬러는 묶음의 특징 벡터를 predict_proba 한 번으로, 얼굴형은 얼굴 크롭을 한 번의 배치 추론으로 분류
+- 결과는 처리되는 대로 기록하며, 같은 출력으로 다시 실행하면 이미 기록된 경로는 건너뜀 (체크포인트 재개)
+  - JSONL: 한 줄에 이미지 하나, 이어서 추가
+  - Parquet: 출력 디렉토리에 part-NNNNN.parquet 파일을 --flush-every 개마다 추가 (pyarrow 필요)
+- 주기적으로 처리량(images/s)과 남은 시간을 로그로 보고
+"""
+
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from multiprocessing import get_context
+from pathlib import Path
+from typing import Iterator, Optional
+
+from .services.imaging import decode_bgr
+from .services.model_registry import ModelUnavailableError, model_registry
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+ANALYSES = ("personal_color", "face_shape")
+# 분석별로 필요한 모델 (model_registry 이름)
+REQUIRED_MODELS = {
+    "personal_color": ("face_landmarks", "personal_color"),
+    "face_shape": ("face_landmarks", "face_shape"),
+}
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+# 출력 레코드 필드 (선택하지 않은 분석의 필드는 None)
+RECORD_FIELDS = (
+    "path", "ok", "error", "width", "height",
+    "season", "season_confidence", "undertone", "ita", "color_error",
+    "face_shape", "face_shape_confidence", "face_shape_probabilities", "face_shape_error",
+    "face_box",
+)
+
+
+# ======================
+#      입력 목록
+# ======================
+
+def iter_sources(source: Path, recursive: bool = True) -> Iterator[str]:
+    """
+    분석할 이미지 경로 (정렬된 순서)
+    - 디렉토리: 이미지 확장자 파일
+    - .csv 매니페스트: path 열 / 그 밖의 파일: 한 줄에 경로 하나
+    매니페스트의 상대 경로는 매니페스트 위치 기준입니다.
+    """
+    if source.is_dir():
+        pattern = "**/*" if recursive else "*"
+        for path in sorted(source.glob(pattern)):
+            if path.is_file() and path.suffix.lower() in IMAGE_SUFFIXES:
+                yield str(path)
+        return
+
+    with open(source, newline="", encoding="utf-8") as f:
+        if source.suffix.lower() == ".csv":
+            entries = (row["path"] for row in csv.DictReader(f))
+        else:
+            entries = (line.strip() for line in f)
+        for entry in entries:
+            if entry and not entry.startswith("#"):
+                path = Path(entry)
+                yield str(path if path.is_absolute() else source.parent / path)
+
+
+# ======================
+#     워커 프로세스
+# ======================
+
+def _init_worker(analyses: tuple[str, ...], verbose: bool):
+    """워커 초기화 - 선택한 분석에 필요한 모델만 로드"""
+    if not verbose:
+        # 이미지마다 남는 분석 로그 생략
+        logging.getLogger("app.services").setLevel(logging.WARNING)
+
+    from .services import face_shape_service, personal_color_service  # noqa: F401 (모델 등록)
+
+    for name in {model for analysis in analyses for model in REQUIRED_MODELS[analysis]}:
+        model_registry.load(name)
+
+
+def _empty_record(path: str) -> dict:
+    return {field: None for field in RECORD_FIELDS} | {"path": path, "ok": False}
+
+
+def _analyze_chunk(paths: list[str], analyses: tuple[str, ...]) -> list[dict]:
+    """경로 묶음을 디코딩하고 분석하여 레코드 리스트 반환 (입력 순서)"""
+    from .services.face_shape_service import classify_face_crops, locate_face_crop
+    from .services.personal_color_service import classify_color_features, extract_color_features
+
+    # 모델이 없으면 이미지마다 실패로 기록하지 않고 실행 전체를 중단
+    for analysis in analyses:
+        for name in REQUIRED_MODELS[analysis]:
+            model_registry.get(name)
+
+    records = [_empty_record(path) for path in paths]
+    images = {}
+    for i, path in enumerate(paths):
+        try:
+            bgr = decode_bgr(Path(path).read_bytes())
+            images[i] = bgr
+            records[i]["height"], records[i]["width"] = bgr.shape[:2]
+        except Exception as e:
+            records[i]["error"] = f"decode failed: {e}"
+
+    if "personal_color" in analyses:
+        features = {}
+        for i, bgr in images.items():
+            try:
+                features[i] = extract_color_features(bgr)
+            except Exception as e:
+                records[i]["color_error"] = str(e)
+        predictions = classify_color_features([f.vector for f in features.values()])
+        for (i, f), (season, confidence) in zip(features.items(), predictions):
+            records[i].update(
+                season=season,
+                season_confidence=round(confidence, 2),
+                ita=round(float(f.ita), 2),
+                undertone="웜톤" if season in ("spring", "fall") else "쿨톤",
+                face_box=f.face_box,
+            )
+
+    if "face_shape" in analyses:
+        crops = {}
+        for i, bgr in images.items():
+            try:
+                crops[i] = locate_face_crop(bgr)
+            except Exception as e:
+                records[i]["face_shape_error"] = str(e)
+        predictions = classify_face_crops([crop.rgb for crop in crops.values()])
+        for (i, crop), prediction in zip(crops.items(), predictions):
+            records[i].update(
+                face_shape=prediction[0]["label"],
+                face_shape_confidence=round(prediction[0]["score"] * 100, 2),
+                face_shape_probabilities={p["label"]: round(p["score"] * 100, 2) for p in prediction},
+            )
+            if records[i]["face_box"] is None:
+                records[i]["face_box"] = crop.face_box
+
+    for i in images:
+        errors = [records[i][key] for key in ("color_error", "face_shape_error") if records[i][key]]
+        records[i]["ok"] = not errors
+        records[i]["error"] = "; ".join(errors) or None
+    return records
+
+
+# ======================
+#       출력 기록
+# ======================
+
+class JsonlWriter:
+    """JSONL 출력 (한 줄에 레코드 하나, 이어서 추가)"""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._repair()
+        self._file = open(self.path, "a", encoding="utf-8")
+
+    def _repair(self):
+        """중단되어 마지막 줄이 잘린 경우 마지막 줄바꿈 뒤를 잘라냄"""
+        if not self.path.exists():
+            return
+        data = self.path.read_bytes()
+        if data and not data.endswith(b"\n"):
+            with open(self.path, "r+b") as f:
+                f.truncate(data.rfind(b"\n") + 1)
+
+    def done_paths(self) -> set[str]:
+        done = set()
+        with open(self.path, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    done.add(json.loads(line)["path"])
+                except (ValueError, KeyError):
+                    continue
+        return done
+
+    def write(self, records: list[dict]):
+        for record in records:
+            self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+class ParquetWriter:
+    """Parquet 출력 (디렉토리에 part 파일을 추가, 각 파일은 임시 파일로 쓴 뒤 이름 변경)"""
+
+    def __init__(self, path: Path, flush_every: int):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Parquet 출력에는 pyarrow 패키지가 필요합니다 (pip install pyarrow).") from e
+
+        self.pa, self.pq = pa, pq
+        self.path = path
+        self.path.mkdir(parents=True, exist_ok=True)
+        self.flush_every = max(1, flush_every)
+        self._buffer: list[dict] = []
+        self._next_part = len(self._parts())
+        self.schema = pa.schema([
+            ("path", pa.string()),
+            ("ok", pa.bool_()),
+            ("error", pa.string()),
+            ("width", pa.int32()),
+            ("height", pa.int32()),
+            ("season", pa.string()),
+            ("season_confidence", pa.float64()),
+            ("undertone", pa.string()),
+            ("ita", pa.float64()),
+            ("color_error", pa.string()),
+            ("face_shape", pa.string()),
+            ("face_shape_confidence", pa.float64()),
+            ("face_shape_probabilities", pa.map_(pa.string(), pa.float64())),
+            ("face_shape_error", pa.string()),
+            ("face_box", pa.list_(pa.int32())),
+        ])
+
+    def _parts(self) -> list[Path]:
+        return sorted(self.path.glob("part-*.parquet"))
+
+    def done_paths(self) -> set[str]:
+        done = set()
+        for part in self._parts():
+            done.update(self.pq.read_table(part, columns=["path"]).column("path").to_pylist())
+        return done
+
+    def write(self, records: list[dict]):
+        self._buffer.extend(records)
+        if len(self._buffer) >= self.flush_every:
+            self.flush()
+
+    def flush(self):
+        if not self._buffer:
+            return
+        rows = [
+            record | {
+                "face_shape_probabilities": (
+                    list(record["face_shape_probabilities"].items())
+                    if record["face_shape_probabilities"] else None
+                ),
+            }
+            for record in self._buffer
+        ]
+        table = self.pa.Table.from_pylist(rows, schema=self.schema)
+        part = self.path / f"part-{self._next_part:05d}.parquet"
+        tmp = part.with_suffix(".tmp")
+        self.pq.write_table(table, tmp)
+        os.replace(tmp, part)
+        self._next_part += 1
+        self._buffer = []
+
+    def close(self):
+        self.flush()
+
+
+# ======================
+#        실행
+# ======================
+
+def run(
+    source: Path,
+    output: Path,
+    output_format: str,
+    analyses: tuple[str, ...],
+    workers: int,
+    batch_size: int,
+    flush_every: int,
+    report_interval: float,
+    recursive: bool = True,
+    verbose: bool = False,
+) -> dict:
+    """일괄 분석 실행, 처리 요약 반환"""
+    writer = ParquetWriter(output, flush_every) if output_format == "parquet" else JsonlWriter(output)
+    done = writer.done_paths()
+    pending = [path for path in iter_sources(source, recursive) if path not in done]
+    logger.info(
+        f"Bulk analysis: {len(pending)} images to process ({len(done)} already done), "
+        f"analyses={','.join(analyses)}, workers={workers}, output={output} ({output_format})"
+    )
+
+    chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+    processed = failed = 0
+    started = last_report = time.perf_counter()
+
+    executor = ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(analyses, verbose),
+    )
+    try:
+        in_flight = set()
+        next_chunk = 0
+        while next_chunk < len(chunks) or in_flight:
+            # 메모리 사용을 제한하기 위해 워커당 최대 2묶음만 제출
+            while next_chunk < len(chunks) and len(in_flight) < workers * 2:
+                in_flight.add(executor.submit(_analyze_chunk, chunks[next_chunk], analyses))
+                next_chunk += 1
+
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                records = future.result()
+                writer.write(records)
+                processed += len(records)
+                failed += sum(1 for record in records if not record["ok"])
+
+            now = time.perf_counter()
+            if now - last_report >= report_interval:
+                last_report = now
+                rate = processed / (now - started)
+                eta = (len(pending) - processed) / rate if rate > 0 else 0
+                logger.info(
+                    f"{processed}/{len(pending)} images, {rate:.1f} images/s, "
+                    f"{failed} failed, ETA {eta:.0f}s"
+                )
+    finally:
+        executor.shutdown(wait=True, cancel_futures=True)
+        writer.close()
+
+    elapsed = time.perf_counter() - started
+    summary = {
+        "processed": processed,
+        "failed": failed,
+        "skipped": len(done),
+        "elapsed_seconds": round(elapsed, 1),
+        "images_per_second": round(processed / elapsed, 2) if elapsed > 0 else None,
+    }
+    logger.info(f"Bulk analysis finished: {summary}")
+    return summary
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m app.bulk_analyze",
+        description="이미지 디렉토리 / 매니페스트를 일괄 분석하여 JSONL 또는 Parquet으로 저장합니다.",
+    )
+    parser.add_argument("source", type=Path, help="이미지 디렉토리 또는 매니페스트 (.txt: 줄마다 경로, .csv: path 열)")
+    parser.add_argument("-o", "--output", type=Path, required=True, help="출력 파일(.jsonl) 또는 디렉토리(.parquet)")
+    parser.add_argument("--format", choices=("jsonl", "parquet"), help="출력 형식 (기본: 출력 경로 확장자로 결정)")
+    parser.add_argument(
+        "--analyses", default=",".join(ANALYSES),
+        help=f"실행할 분석 (쉼표로 구분, 기본 {','.join(ANALYSES)})",
+    )
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="워커 프로세스 수")
+    parser.add_argument("--batch-size", type=int, default=8, help="워커에 한 번에 보내는 이미지 수")
+    parser.add_argument("--flush-every", type=int, default=1000, help="Parquet part 파일당 레코드 수")
+    parser.add_argument("--report-interval", type=float, default=10.0, help="처리량 보고 주기 (초)")
+    parser.add_argument("--no-recursive", action="store_true", help="디렉토리의 하위 폴더는 제외")
+    parser.add_argument("-v", "--verbose", action="store_true", help="이미지별 분석 로그 출력")
+    args = parser.parse_args(argv)
+
+    analyses = tuple(name.strip() for name in args.analyses.split(",") if name.strip())
+    unknown = set(analyses) - set(ANALYSES)
+    if not analyses or unknown:
+        parser.error(f"--analyses는 {', '.join(ANALYSES)} 중에서 선택하세요.")
+    if not args.source.exists():
+        parser.error(f"입력을 찾을 수 없습니다: {args.source}")
+    output_format = args.format or ("parquet" if args.output.suffix.lower() == ".parquet" else "jsonl")
+
+    try:
+        run(
+            source=args.source,
+            output=args.output,
+            output_format=output_format,
+            analyses=analyses,
+            workers=max(1, args.workers),
+            batch_size=max(1, args.batch_size),
+            flush_every=args.flush_every,
+            report_interval=args.report_interval,
+            recursive=not args.no_recursive,
+            verbose=args.verbose,
+        )
+    except (ModelUnavailableError, RuntimeError) as e:
+        logger.error(str(e))
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
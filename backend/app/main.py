@@ -1,28 +1,121 @@
 """
 Closet AI Backend - Unified API Server
 Virtual Try-On + Personal Color Analysis + Face Shape Classification
+
+SERVICE_ROLE로 이 프로세스가 제공할 서비스를 고릅니다 (all, tryon, analysis).
+각 서비스의 무거운 라이브러리는 해당 서비스가 처음 사용할 때 import되므로,
+Try-On 전용 게이트웨이는 torch / transformers / dlib / scikit-learn을 불러오지 않습니다.
 """
 
+import time
+
+# 앱 import 시간 측정 시작 (/api/admin/startup)
+_IMPORT_STARTED = time.perf_counter()
+
 from dotenv import load_dotenv
 load_dotenv()
 
-from fastapi import FastAPI, UploadFile, File, Form, HTTPException
+from fastapi import APIRouter, FastAPI, UploadFile, File, Form, Header, HTTPException, Request
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse, StreamingResponse
-from PIL import Image
+from fastapi.responses import FileResponse, JSONResponse, Response, StreamingResponse
 from pathlib import Path
 import io
+import os
+import zipfile
+import logging
 import json
+import base64
+import secrets
 import asyncio
 import uuid
+from contextlib import asynccontextmanager
 from typing import Optional
 
-from .schemas import AnalysisResponse, FaceShapeResponse, VTONResponse, ProgressInfo
-from .services import analyze_image, pil_to_cv2, analyze_face_shape, VTONService
-
-
-app = FastAPI(title="Closet AI API", description="Virtual Try-On, Personal Color & Face Shape Analysis")
+from .schemas import (
+    AnalysisResponse,
+    AnalysisBatchItem,
+    AnalysisBatchResponse,
+    FaceShapeResponse,
+    VTONResponse,
+    VTONBatchItem,
+    VTONBatchResponse,
+    TryOnJobResponse,
+    ProgressInfo,
+)
+from .services import (
+    VTONService,
+    VTONGarment,
+    AnalysisEngine,
+    EngineSaturatedError,
+    ResultStore,
+    ProgressBroker,
+    TryOnJobManager,
+    TryOnJobInput,
+    JobQueueFullError,
+)
+from .services.result_store import parse_range
+from .services.job_store import JobStore, TRYON_JOB_DB
+from .services.progress_bus import create_progress_bus
+from .services.imaging import INGEST_MAX_MB, ImageRejectedError, ImageTooLargeError, decode_bgr
+from .services.import_report import import_report
+from .services.metrics import metrics_registry
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 이 프로세스가 제공할 서비스 (all 또는 tryon, analysis를 쉼표로 구분)
+SERVICE_ROLE = os.environ.get("SERVICE_ROLE", "all")
+SERVICE_ROLES = ("tryon", "analysis")
+
+
+def parse_service_role(value: str) -> set[str]:
+    """"all" / "tryon" / "analysis" / "tryon,analysis" -> 역할 집합"""
+    roles = {role.strip().lower() for role in value.split(",") if role.strip()}
+    if not roles or "all" in roles:
+        return set(SERVICE_ROLES)
+    unknown = roles - set(SERVICE_ROLES)
+    if unknown:
+        raise ValueError(f"지원하지 않는 SERVICE_ROLE입니다: {', '.join(sorted(unknown))}")
+    return roles
+
+
+ENABLED_ROLES = parse_service_role(SERVICE_ROLE)
+TRYON_ENABLED = "tryon" in ENABLED_ROLES
+ANALYSIS_ENABLED = "analysis" in ENABLED_ROLES
+
+
+# 분석 실행 엔진 (워커 프로세스 풀, analysis 역할에서만)
+analysis_engine = AnalysisEngine() if ANALYSIS_ENABLED else None
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    logger.info(f"Startup report: {import_report(IMPORT_SECONDS, ENABLED_ROLES)}")
+    if analysis_engine is not None:
+        analysis_engine.start()
+    if TRYON_ENABLED:
+        await progress_broker.start()
+        tryon_jobs.start()
+    try:
+        yield
+    finally:
+        if TRYON_ENABLED:
+            await tryon_jobs.stop()
+            await progress_broker.stop()
+            await vton_service.aclose()
+            if job_store is not None:
+                job_store.close()
+        if analysis_engine is not None:
+            analysis_engine.shutdown()
+
+
+app = FastAPI(
+    title="Closet AI API",
+    description="Virtual Try-On, Personal Color & Face Shape Analysis",
+    lifespan=lifespan,
+)
 
 # 정적 파일 경로 설정 (프로젝트 루트의 public 폴더)
 STATIC_DIR = Path(__file__).parent.parent.parent / "public"
@@ -43,11 +136,201 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# 역할별 API (설정된 역할의 라우터만 등록)
+tryon_router = APIRouter()
+analysis_router = APIRouter()
+
+# Try-On 작업 / 예측 기록 저장소 (TRYON_JOB_DB가 비어 있으면 메모리에만 보관)
+job_store = JobStore(TRYON_JOB_DB) if TRYON_ENABLED and TRYON_JOB_DB else None
+
 # VTON 서비스 인스턴스
-vton_service = VTONService()
+vton_service = VTONService(prediction_store=job_store) if TRYON_ENABLED else None
+
+# 결과 이미지 저장소 (/api/results/{id})
+result_store = ResultStore()
+
+# SSE 진행 상황 브로커 (PROGRESS_BUS로 워커 프로세스 간 공유)
+progress_broker = ProgressBroker(bus=create_progress_bus()) if TRYON_ENABLED else None
+
+
+def to_data_uri(image: Optional[bytes], media_type: str = "image/png") -> Optional[str]:
+    """응답 직전에 이미지 바이트를 data URI로 변환"""
+    if image is None:
+        return None
+    return f"data:{media_type};base64,{base64.b64encode(image).decode('utf-8')}"
+
+
+async def publish_image(
+    request: Request,
+    image: Optional[bytes],
+    media_type: str = "image/png",
+    inline: bool = False,
+) -> Optional[str]:
+    """
+    결과 이미지를 응답용 문자열로 변환
+    - 기본: 결과 저장소에 저장 후 /api/results/{id} URL
+    - inline=True (또는 저장소 비활성화): 기존 base64 data URI
+    """
+    if image is None:
+        return None
+    if inline or not result_store.enabled:
+        return to_data_uri(image, media_type)
+
+    result_id = await asyncio.to_thread(result_store.put, image, media_type)
+    return str(request.url_for("get_result", result_id=result_id))
+
+
+def publish_progress(session_id: Optional[str], info):
+    """서비스 진행 상태(ProgressInfo)를 SSE 이벤트로 발행"""
+    progress_broker.publish(session_id, {
+        "status": info.status,
+        "progress": info.progress,
+        "message": info.message,
+        "eta": info.eta,
+        "queuePosition": info.queue_position,
+        "queueSize": info.queue_size,
+        "stepProgress": info.step_progress,
+    })
+
+
+def finish_progress(session_id: Optional[str], success: bool, error: Optional[str]):
+    """
+    서비스가 종료 이벤트를 보내지 않은 경우(2단계 적용, 예외 등) 종료 이벤트 발행
+    - 구독자가 스트림을 닫고 세션이 TTL 후 정리되도록 보장
+    """
+    if not session_id or progress_broker.is_closed(session_id):
+        return
+    if success:
+        progress_broker.publish(session_id, {"status": "complete", "progress": 100, "message": "완료!"})
+    else:
+        progress_broker.publish(session_id, {"status": "error", "progress": 0, "message": error or "Try-On에 실패했습니다."})
 
-# SSE 세션 저장소
-sse_sessions: dict[str, asyncio.Queue] = {}
+
+# 비동기 Try-On 작업 (/api/tryon/jobs)
+tryon_jobs = TryOnJobManager(
+    vton_service,
+    result_store,
+    on_progress=publish_progress,
+    on_finish=finish_progress,
+    store=job_store,
+) if TRYON_ENABLED else None
+
+
+# ======================
+#       Metrics
+# ======================
+
+HTTP_REQUESTS = metrics_registry.counter(
+    "closet_http_requests_total", "HTTP requests by route template and status", ("method", "route", "status")
+)
+HTTP_IN_FLIGHT = metrics_registry.gauge(
+    "closet_http_requests_in_flight", "HTTP requests currently being handled"
+)
+HTTP_DURATION = metrics_registry.histogram(
+    "closet_http_request_duration_seconds", "HTTP request latency", ("method", "route")
+)
+
+
+class HTTPMetricsMiddleware:
+    """
+    요청 수 / 처리 중 요청 / 지연 시간 기록 (ASGI 미들웨어)
+    - 요청 경로 대신 라우터가 매칭한 scope["route"]의 템플릿(/api/results/{result_id})으로 라벨링
+    - 응답 본문 전송이 끝날 때까지 측정 (SSE 등 스트리밍 응답도 헤더가 아니라 스트림 종료 시점까지)
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] == "/metrics":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        HTTP_IN_FLIGHT.inc()
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_IN_FLIGHT.dec()
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=status)
+            HTTP_DURATION.observe(time.perf_counter() - started, method=scope["method"], route=route)
+
+
+app.add_middleware(HTTPMetricsMiddleware)
+
+
+def collect_service_metrics() -> list:
+    """큐 길이, SSE 세션, 캐시 hit ratio 등 각 서비스가 가진 값을 수집 시점에 읽음"""
+    metrics = []
+
+    def gauge(name: str, documentation: str, samples: list):
+        metrics.append((name, "gauge", documentation, samples))
+
+    def counter(name: str, documentation: str, samples: list):
+        metrics.append((name, "counter", documentation, samples))
+
+    def cache_metrics(caches: dict):
+        gauge("closet_cache_hit_ratio", "Cache hit ratio since process start",
+              [({"cache": name}, s["hit_ratio"]) for name, s in caches.items()])
+        counter("closet_cache_hits_total", "Cache hits",
+                [({"cache": name}, s["hits"]) for name, s in caches.items()])
+        counter("closet_cache_misses_total", "Cache misses",
+                [({"cache": name}, s["misses"]) for name, s in caches.items()])
+        gauge("closet_cache_bytes", "Cache size on disk",
+              [({"cache": name}, s["bytes"]) for name, s in caches.items()])
+
+    caches = {}
+    if result_store.enabled:
+        caches["results"] = result_store.stats()
+
+    if analysis_engine is not None:
+        gauge("closet_analysis_pending", "Analysis requests queued or running", [({}, analysis_engine.pending)])
+        gauge("closet_analysis_ready", "1 when analysis models are loaded and warmed up",
+              [({}, int(analysis_engine.ready))])
+
+    if TRYON_ENABLED:
+        jobs = tryon_jobs.stats(include_store=False)
+        gauge("closet_tryon_jobs", "Try-on jobs by state",
+              [({"state": "queued"}, jobs["queued"]), ({"state": "running"}, jobs["running"])])
+        counter("closet_tryon_jobs_finished_total", "Finished try-on jobs",
+                [({"status": "succeeded"}, jobs["succeeded"]), ({"status": "failed"}, jobs["failed"])])
+
+        progress = progress_broker.stats()
+        gauge("closet_sse_sessions", "Active progress sessions", [({}, progress["active_sessions"])])
+        gauge("closet_sse_subscribers", "Connected SSE subscribers", [({}, progress["subscribers"])])
+        counter("closet_sse_events_total", "Progress events by outcome", [
+            ({"outcome": "published"}, progress["published"]),
+            ({"outcome": "coalesced"}, progress["coalesced"]),
+            ({"outcome": "dropped"}, progress["dropped"]),
+        ])
+
+        caches["tryon_results"] = vton_service.result_cache.stats()
+        caches["tryon_intermediates"] = vton_service.intermediate_cache.stats()
+
+    if caches:
+        cache_metrics(caches)
+    return metrics
+
+
+metrics_registry.add_collector(collect_service_metrics)
+
+
+# 배치 Try-On 설정
+TRYON_BATCH_MAX_ITEMS = int(os.environ.get("TRYON_BATCH_MAX_ITEMS", "20"))
+TRYON_CATEGORIES = {
+    "upper_body": "A stylish top",
+    "lower_body": "Stylish pants",
+    "dresses": "A stylish dress",
+}
 
 
 # ======================
@@ -59,7 +342,10 @@ async def api_health():
     return {
         "message": "Closet AI API",
         "status": "running",
-        "services": ["virtual-tryon", "personal-color", "face-shape"]
+        "services": (
+            (["virtual-tryon"] if TRYON_ENABLED else [])
+            + (["personal-color", "face-shape"] if ANALYSIS_ENABLED else [])
+        ),
     }
 
 
@@ -68,37 +354,46 @@ async def health_check():
     return {"status": "healthy"}
 
 
+@app.get("/metrics")
+async def metrics():
+    """Prometheus 텍스트 형식 메트릭 (프로세스별 값)"""
+    return Response(metrics_registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/ready")
+async def readiness_check():
+    """분석 모델 준비 여부 (eager 모델이 모든 워커에서 로드/워밍업되면 200, 아니면 503)"""
+    if analysis_engine is None:
+        # 분석 역할이 없으면 로드할 모델 없음
+        return {"ready": True, "roles": sorted(ENABLED_ROLES)}
+    report = analysis_engine.model_report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+
 # ======================
 #    Virtual Try-On
 # ======================
 
-@app.get("/api/progress/{session_id}")
-async def progress_stream(session_id: str):
-    """SSE 엔드포인트 - 진행 상황 스트리밍"""
-
-    if session_id not in sse_sessions:
-        sse_sessions[session_id] = asyncio.Queue()
-
-    queue = sse_sessions[session_id]
+@tryon_router.get("/api/progress/{session_id}")
+async def progress_stream(session_id: str, last_event_id: Optional[str] = Header(None)):
+    """
+    SSE 엔드포인트 - 진행 상황 스트리밍
+    - 재연결 시 Last-Event-ID 이후의 버퍼된 이벤트부터 다시 전송
+    - complete 또는 error 이벤트를 보내면 종료
+    """
+    try:
+        cursor = int(last_event_id) if last_event_id else None
+    except ValueError:
+        cursor = None
 
     async def event_generator():
-        try:
-            while True:
-                try:
-                    # 30초 타임아웃으로 대기
-                    data = await asyncio.wait_for(queue.get(), timeout=30.0)
-                    yield f"data: {json.dumps(data)}\n\n"
-
-                    # complete 또는 error 상태면 종료
-                    if data.get("status") in ["complete", "error"]:
-                        break
-                except asyncio.TimeoutError:
-                    # Keep-alive
-                    yield f": keepalive\n\n"
-        finally:
-            # 세션 정리
-            if session_id in sse_sessions:
-                del sse_sessions[session_id]
+        async for event in progress_broker.subscribe(session_id, cursor):
+            if event is None:
+                # Keep-alive
+                yield ": keepalive\n\n"
+                continue
+            event_id, data = event
+            yield f"id: {event_id}\ndata: {json.dumps(data)}\n\n"
 
     return StreamingResponse(
         event_generator(),
@@ -111,8 +406,9 @@ async def progress_stream(session_id: str):
     )
 
 
-@app.post("/api/tryon", response_model=VTONResponse)
+@tryon_router.post("/api/tryon", response_model=VTONResponse)
 async def virtual_tryon(
+    request: Request,
     humanImage: UploadFile = File(...),
     topImage: Optional[UploadFile] = File(None),
     bottomImage: Optional[UploadFile] = File(None),
@@ -121,6 +417,7 @@ async def virtual_tryon(
     bottomDescription: str = Form("Stylish pants"),
     dressDescription: str = Form("A stylish dress"),
     sessionId: Optional[str] = Form(None),
+    inline: bool = False,
 ):
     """
     Virtual Try-On API (Replicate IDM-VTON)
@@ -128,6 +425,7 @@ async def virtual_tryon(
     - 원피스 지원 (dresses 카테고리)
     - 둘 다 업로드 시: 하의 먼저 적용 -> 상의 적용
     - SSE를 통한 실시간 진행 상황 업데이트 지원
+    - 결과 이미지는 /api/results/{id} URL (?inline=true 이면 data URI)
     """
     try:
         # 이미지 읽기
@@ -143,19 +441,9 @@ async def virtual_tryon(
                 error="상의, 하의 또는 원피스 이미지를 최소 하나 업로드해주세요."
             )
 
-        # 진행 상황 콜백 설정
+        # 진행 상황 콜백 설정 (세션이 없으면 진행률 계산 자체를 생략)
         def on_progress(info):
-            if sessionId and sessionId in sse_sessions:
-                asyncio.create_task(
-                    sse_sessions[sessionId].put({
-                        "status": info.status,
-                        "progress": info.progress,
-                        "message": info.message,
-                        "eta": info.eta,
-                        "queuePosition": info.queue_position,
-                        "queueSize": info.queue_size,
-                    })
-                )
+            publish_progress(sessionId, info)
 
         # VTON 서비스 호출
         result = await vton_service.process_tryon_with_both(
@@ -166,56 +454,394 @@ async def virtual_tryon(
             top_description=topDescription,
             bottom_description=bottomDescription,
             dress_description=dressDescription,
-            on_progress=on_progress
+            on_progress=on_progress if sessionId else None
         )
+        finish_progress(sessionId, result.success, result.error)
 
         return VTONResponse(
             success=result.success,
-            outputImage=result.output_image,
-            maskedImage=result.masked_image,
+            outputImage=await publish_image(request, result.output_image, inline=inline),
+            maskedImage=await publish_image(request, result.masked_image, inline=inline),
             error=result.error,
         )
 
     except Exception as e:
+        finish_progress(sessionId, False, str(e))
         return VTONResponse(
             success=False,
             error=str(e)
         )
 
 
+@tryon_router.post("/api/tryon/jobs", response_model=TryOnJobResponse, status_code=202)
+async def submit_tryon_job(
+    request: Request,
+    humanImage: UploadFile = File(...),
+    topImage: Optional[UploadFile] = File(None),
+    bottomImage: Optional[UploadFile] = File(None),
+    dressImage: Optional[UploadFile] = File(None),
+    topDescription: str = Form("A stylish top"),
+    bottomDescription: str = Form("Stylish pants"),
+    dressDescription: str = Form("A stylish dress"),
+    sessionId: Optional[str] = Form(None),
+):
+    """
+    비동기 Virtual Try-On 작업 제출
+    - /api/tryon과 같은 입력, 처리를 기다리지 않고 작업 ID를 즉시 반환 (202)
+    - 상태/결과: GET /api/tryon/jobs/{job_id}
+    - 진행 상황: GET /api/progress/{sessionId} (sessionId 생략 시 작업 ID)
+    """
+    human_bytes = await humanImage.read()
+    top_bytes = await topImage.read() if topImage else None
+    bottom_bytes = await bottomImage.read() if bottomImage else None
+    dress_bytes = await dressImage.read() if dressImage else None
+
+    if not top_bytes and not bottom_bytes and not dress_bytes:
+        raise HTTPException(status_code=400, detail="상의, 하의 또는 원피스 이미지를 최소 하나 업로드해주세요.")
+
+    try:
+        job = await tryon_jobs.submit(
+            TryOnJobInput(
+                human_image=human_bytes,
+                top_image=top_bytes,
+                bottom_image=bottom_bytes,
+                dress_image=dress_bytes,
+                top_description=topDescription,
+                bottom_description=bottomDescription,
+                dress_description=dressDescription,
+            ),
+            session_id=sessionId,
+        )
+    except JobQueueFullError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "30"})
+
+    return await job_response(request, job)
+
+
+@tryon_router.get("/api/tryon/jobs/{job_id}", response_model=TryOnJobResponse)
+async def get_tryon_job(request: Request, job_id: str, inline: bool = False):
+    """비동기 Try-On 작업 상태 / 결과 조회"""
+    job = await tryon_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="작업을 찾을 수 없습니다.")
+    return await job_response(request, job, inline=inline)
+
+
+async def job_response(request: Request, job, inline: bool = False) -> TryOnJobResponse:
+    """작업 상태를 응답 모델로 변환 (결과는 /api/results/{id} URL, inline이면 data URI)"""
+    output_image = None
+    if job.result_id:
+        if inline:
+            stored = await asyncio.to_thread(result_store.get, job.result_id)
+            output_image = to_data_uri(stored[0]) if stored else None
+        else:
+            output_image = str(request.url_for("get_result", result_id=job.result_id))
+    elif job.output_image is not None:
+        output_image = to_data_uri(job.output_image)
+
+    queue_position, queue_size = tryon_jobs.queue_position(job.id)
+    return TryOnJobResponse(
+        jobId=job.id,
+        sessionId=job.session_id,
+        status=job.status,
+        createdAt=job.created_at,
+        startedAt=job.started_at,
+        finishedAt=job.finished_at,
+        queuePosition=queue_position,
+        queueSize=queue_size if queue_position is not None else None,
+        outputImage=output_image,
+        error=job.error,
+    )
+
+
+@tryon_router.post("/api/tryon/batch", response_model=VTONBatchResponse)
+async def virtual_tryon_batch(
+    request: Request,
+    humanImage: UploadFile = File(...),
+    garmentImages: list[UploadFile] = File(...),
+    categories: list[str] = Form(...),
+    descriptions: Optional[list[str]] = Form(None),
+    sessionId: Optional[str] = Form(None),
+    inline: bool = False,
+):
+    """
+    배치 Virtual Try-On API
+    - 한 사람 이미지 + 여러 의류 (garmentImages[i]의 카테고리는 categories[i])
+    - 사람 이미지는 한 번만 업로드, 예측은 동시에 제출 (TRYON_BATCH_CONCURRENCY)
+    - 항목이 끝날 때마다 SSE로 {"status": "item", "index": i, ...} 이벤트 전송
+    """
+    if len(garmentImages) > TRYON_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"의류는 최대 {TRYON_BATCH_MAX_ITEMS}개까지 업로드할 수 있습니다.")
+    if len(categories) != len(garmentImages):
+        raise HTTPException(status_code=400, detail="categories 개수가 의류 이미지 개수와 같아야 합니다.")
+    if descriptions and len(descriptions) != len(garmentImages):
+        raise HTTPException(status_code=400, detail="descriptions 개수가 의류 이미지 개수와 같아야 합니다.")
+    for category in categories:
+        if category not in TRYON_CATEGORIES:
+            raise HTTPException(status_code=400, detail=f"지원하지 않는 카테고리입니다: {category}")
+
+    try:
+        human_bytes = await humanImage.read()
+        garments = [
+            VTONGarment(
+                image=await garment.read(),
+                category=category,
+                description=descriptions[i] if descriptions else TRYON_CATEGORIES[category],
+            )
+            for i, (garment, category) in enumerate(zip(garmentImages, categories))
+        ]
+
+        def send_event(data: dict):
+            progress_broker.publish(sessionId, data)
+
+        def on_progress(info):
+            send_event({
+                "status": info.status,
+                "progress": info.progress,
+                "message": info.message,
+                "eta": info.eta,
+            })
+
+        # 항목별 결과 URL (응답과 SSE 이벤트에서 공유)
+        output_urls: dict[int, Optional[str]] = {}
+
+        async def on_item(index, result):
+            output_urls[index] = await publish_image(request, result.output_image, inline=inline)
+            send_event({
+                "status": "item",
+                "index": index,
+                "category": categories[index],
+                "success": result.success,
+                "outputImage": output_urls[index],
+                "error": result.error,
+            })
+
+        results = await vton_service.process_tryon_batch(
+            human_image=human_bytes,
+            garments=garments,
+            on_progress=on_progress if sessionId else None,
+            on_item=on_item,
+        )
+        finish_progress(sessionId, any(result.success for result in results), None)
+
+        return VTONBatchResponse(
+            success=any(result.success for result in results),
+            results=[
+                VTONBatchItem(
+                    index=i,
+                    category=categories[i],
+                    success=result.success,
+                    outputImage=output_urls.get(i),
+                    error=result.error,
+                )
+                for i, result in enumerate(results)
+            ],
+        )
+
+    except Exception as e:
+        finish_progress(sessionId, False, str(e))
+        return VTONBatchResponse(
+            success=False,
+            error=str(e)
+        )
+
+
+# ======================
+#     Result Images
+# ======================
+
+@app.get("/api/results/{result_id}", name="get_result")
+async def get_result(
+    result_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    if_none_match: Optional[str] = Header(None),
+):
+    """
+    결과 이미지 제공 (내용 해시 ID)
+    - ETag / If-None-Match (304)
+    - Range 요청 (206)
+    """
+    etag = f'"{result_id.split(".")[0]}"'
+    headers = {
+        "ETag": etag,
+        # 내용 기반 ID이므로 저장소 TTL 동안은 변하지 않음
+        "Cache-Control": f"public, max-age={int(result_store.ttl)}, immutable",
+        "Accept-Ranges": "bytes",
+    }
+
+    not_found = HTTPException(status_code=404, detail="결과를 찾을 수 없거나 만료되었습니다.")
+
+    # 없거나 만료된 ID는 If-None-Match와 관계없이 404 (존재 확인 후 ETag 비교)
+    if if_none_match and (if_none_match.strip() == "*" or etag in if_none_match):
+        if not await asyncio.to_thread(result_store.contains, result_id):
+            raise not_found
+        return Response(status_code=304, headers=headers)
+
+    stored = await asyncio.to_thread(result_store.get, result_id)
+    if stored is None:
+        raise not_found
+    data, media_type = stored
+
+    if range_header:
+        byte_range = parse_range(range_header, len(data))
+        if byte_range is None:
+            return Response(
+                status_code=416,
+                headers={**headers, "Content-Range": f"bytes */{len(data)}"},
+            )
+        start, end = byte_range
+        return Response(
+            content=data[start:end + 1],
+            status_code=206,
+            media_type=media_type,
+            headers={**headers, "Content-Range": f"bytes {start}-{end}/{len(data)}"},
+        )
+
+    return Response(content=data, media_type=media_type, headers=headers)
+
+
+# ======================
+#        Admin
+# ======================
+
+def require_admin(token: Optional[str]):
+    """ADMIN_TOKEN 환경 변수와 X-Admin-Token 헤더 비교"""
+    admin_token = os.environ.get("ADMIN_TOKEN")
+    if not admin_token:
+        raise HTTPException(status_code=403, detail="ADMIN_TOKEN이 설정되지 않아 관리자 API가 비활성화되어 있습니다.")
+    if not token or not secrets.compare_digest(token, admin_token):
+        raise HTTPException(status_code=401, detail="관리자 토큰이 올바르지 않습니다.")
+
+
+@app.get("/api/admin/startup")
+async def startup_report(x_admin_token: Optional[str] = Header(None)):
+    """역할, 앱 import 시간, 최대 RSS, 불러온 무거운 라이브러리"""
+    require_admin(x_admin_token)
+    return import_report(IMPORT_SECONDS, ENABLED_ROLES)
+
+
+@tryon_router.get("/api/admin/tryon-cache")
+async def tryon_cache_stats(x_admin_token: Optional[str] = Header(None)):
+    """Try-On 결과 캐시 통계"""
+    require_admin(x_admin_token)
+    return {
+        "results": vton_service.result_cache.stats(),
+        "intermediates": vton_service.intermediate_cache.stats(),
+    }
+
+
+@tryon_router.get("/api/admin/tryon-latency")
+async def tryon_latency_stats(x_admin_token: Optional[str] = Header(None)):
+    """카테고리별 Replicate 대기/생성 소요 시간 (EWMA, 백분위수)"""
+    require_admin(x_admin_token)
+    return vton_service.latency.stats()
+
+
+@tryon_router.get("/api/admin/progress")
+async def progress_broker_stats(x_admin_token: Optional[str] = Header(None)):
+    """SSE 진행 상황 브로커 카운터 (활성 세션, 버려진 이벤트 등)"""
+    require_admin(x_admin_token)
+    return progress_broker.stats()
+
+
+@tryon_router.get("/api/admin/tryon-jobs")
+async def tryon_job_stats(x_admin_token: Optional[str] = Header(None)):
+    """비동기 Try-On 작업 큐 / 워커 통계"""
+    require_admin(x_admin_token)
+    return tryon_jobs.stats()
+
+
+@tryon_router.delete("/api/admin/tryon-cache")
+async def purge_tryon_cache(x_admin_token: Optional[str] = Header(None)):
+    """Try-On 결과 캐시 전체 삭제"""
+    require_admin(x_admin_token)
+    removed = vton_service.result_cache.purge() + vton_service.intermediate_cache.purge()
+    return {"removed": removed}
+
+
 # ======================
 #    Personal Color
 # ======================
 
-@app.post("/api/analyze", response_model=AnalysisResponse)
+# 배치 퍼스널 컬러 분석 설정
+ANALYZE_BATCH_MAX_ITEMS = int(os.environ.get("ANALYZE_BATCH_MAX_ITEMS", "50"))
+ANALYZE_BATCH_MAX_MB = float(os.environ.get("ANALYZE_BATCH_MAX_MB", "200"))  # zip 압축 해제 후 전체 크기
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp", ".bmp"}
+
+
+def analysis_error_message(error: Exception) -> str:
+    if "얼굴을 찾을 수 없습니다" in str(error):
+        return "분석 실패: 이미지에서 얼굴을 찾을 수 없습니다. 더 선명하거나 정면을 바라보는 사진을 사용해 보세요."
+    return f"분석 실패: {str(error)}"
+
+
+async def read_upload_bgr(upload: UploadFile):
+    """업로드를 분석용 BGR 이미지로 디코딩 (이벤트 루프 밖에서, 크기 제한 초과 시 413)"""
+    if upload.size is not None and upload.size > INGEST_MAX_MB * 1024 * 1024:
+        raise HTTPException(status_code=413, detail=f"이미지 파일은 최대 {INGEST_MAX_MB:g}MB까지 업로드할 수 있습니다.")
+    try:
+        return await asyncio.to_thread(decode_bgr, await upload.read())
+    except ImageTooLargeError as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except ImageRejectedError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def read_image_archive(contents: bytes) -> list[tuple[str, bytes]]:
+    """zip 안의 이미지 파일을 이름순으로 [(파일명, 바이트), ...] 반환"""
+    try:
+        archive = zipfile.ZipFile(io.BytesIO(contents))
+    except zipfile.BadZipFile:
+        raise HTTPException(status_code=400, detail="유효한 zip 파일이 아닙니다.")
+
+    with archive:
+        entries = sorted(
+            (
+                info for info in archive.infolist()
+                if not info.is_dir()
+                and Path(info.filename).suffix.lower() in IMAGE_SUFFIXES
+                and not info.filename.startswith("__MACOSX/")
+                and not Path(info.filename).name.startswith(".")
+            ),
+            key=lambda info: info.filename,
+        )
+        if len(entries) > ANALYZE_BATCH_MAX_ITEMS:
+            raise HTTPException(status_code=400, detail=f"이미지는 최대 {ANALYZE_BATCH_MAX_ITEMS}개까지 분석할 수 있습니다.")
+        # 압축 해제 전에 전체 크기 확인 (zip bomb 방지)
+        if sum(info.file_size for info in entries) > ANALYZE_BATCH_MAX_MB * 1024 * 1024:
+            raise HTTPException(status_code=400, detail=f"압축 해제 후 크기가 {ANALYZE_BATCH_MAX_MB:g}MB를 넘습니다.")
+        return [(info.filename, archive.read(info)) for info in entries]
+
+
+@analysis_router.post("/api/analyze", response_model=AnalysisResponse)
 async def analyze_personal_color(
+    request: Request,
     image: UploadFile = File(...),
+    inline: bool = False,
+    render: bool = False,
 ):
     """
     이미지를 분석하여 퍼스널 컬러를 진단합니다.
+    - 분석 영역은 overlay 좌표로 반환 (?render=true 이면 labeled_image도 생성)
     - Dlib 68 랜드마크 기반 얼굴/눈 검출
     - 피부/머리/눈 색상 특징 추출 (Lab, HSV)
     - RandomForest 머신러닝 모델 기반 4계절 분류 (봄/여름/가을/겨울)
     """
-    try:
-        contents = await image.read()
-        pil_img = Image.open(io.BytesIO(contents)).convert("RGB")
-    except Exception:
-        raise HTTPException(status_code=400, detail="유효한 이미지 파일이 아닙니다.")
+    cv_img = await read_upload_bgr(image)
 
     try:
-        cv_img = pil_to_cv2(pil_img)
-        result_dict = analyze_image(cv_img)
+        result_dict = await analysis_engine.analyze_personal_color(cv_img, render=render)
+        result_dict["labeled_image"] = await publish_image(
+            request, result_dict.get("labeled_image"), "image/jpeg", inline
+        )
         return AnalysisResponse(**result_dict)
+    except EngineSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
-        error_message = f"분석 실패: {str(e)}"
-        if "얼굴을 찾을 수 없습니다" in str(e):
-            error_message = "분석 실패: 이미지에서 얼굴을 찾을 수 없습니다. 더 선명하거나 정면을 바라보는 사진을 사용해 보세요."
-
         return AnalysisResponse(
             season="Unknown",
             confidence=0,
-            description=error_message,
+            description=analysis_error_message(e),
             recommended_colors=["#FFFFFF"],
             avoid_colors=["#000000"],
             skin_tone="unknown",
@@ -223,30 +849,93 @@ async def analyze_personal_color(
         )
 
 
+@analysis_router.post("/api/analyze/batch", response_model=AnalysisBatchResponse)
+async def analyze_personal_color_batch(
+    request: Request,
+    images: Optional[list[UploadFile]] = File(None),
+    archive: Optional[UploadFile] = File(None),
+    inline: bool = False,
+    render: bool = False,
+):
+    """
+    여러 이미지의 퍼스널 컬러를 한 번에 분석합니다 (입력 순서 유지)
+    - images: 이미지 파일 여러 개 (multipart) 또는 archive: 이미지가 든 zip (파일명 순)
+    - 특징 추출은 분석 워커에서 병렬로, RandomForest 분류는 predict_proba 한 번으로 실행
+    - 이미지별 실패(얼굴 미검출 등)는 해당 항목의 error로 반환
+    """
+    files: list[tuple[Optional[str], bytes]] = []
+    for upload in images or []:
+        files.append((upload.filename, await upload.read()))
+    if archive is not None:
+        files.extend(read_image_archive(await archive.read()))
+
+    if not files:
+        raise HTTPException(status_code=400, detail="images 또는 archive로 이미지를 업로드해주세요.")
+    if len(files) > ANALYZE_BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=400, detail=f"이미지는 최대 {ANALYZE_BATCH_MAX_ITEMS}개까지 분석할 수 있습니다.")
+
+    decoded = await asyncio.gather(
+        *(asyncio.to_thread(decode_bgr, contents) for _, contents in files),
+        return_exceptions=True,
+    )
+    valid = [i for i, image in enumerate(decoded) if not isinstance(image, BaseException)]
+
+    try:
+        analyzed = await analysis_engine.analyze_personal_color_batch(
+            [decoded[i] for i in valid], render=render
+        )
+    except EngineSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
+    except Exception as e:
+        return AnalysisBatchResponse(success=False, error=analysis_error_message(e))
+
+    outcomes: dict[int, object] = dict(zip(valid, analyzed))
+    results = []
+    for i, (filename, _) in enumerate(files):
+        outcome = outcomes.get(i)
+        if i not in outcomes:
+            error = str(decoded[i]) if isinstance(decoded[i], ImageRejectedError) else "유효한 이미지 파일이 아닙니다."
+            item = AnalysisBatchItem(index=i, filename=filename, success=False, error=error)
+        elif isinstance(outcome, BaseException):
+            item = AnalysisBatchItem(index=i, filename=filename, success=False, error=analysis_error_message(outcome))
+        else:
+            outcome["labeled_image"] = await publish_image(
+                request, outcome.get("labeled_image"), "image/jpeg", inline
+            )
+            item = AnalysisBatchItem(index=i, filename=filename, success=True, result=AnalysisResponse(**outcome))
+        results.append(item)
+
+    return AnalysisBatchResponse(success=any(item.success for item in results), results=results)
+
+
 # ======================
 #    Face Shape
 # ======================
 
-@app.post("/api/analyze/face-shape", response_model=FaceShapeResponse)
+@analysis_router.post("/api/analyze/face-shape", response_model=FaceShapeResponse)
 async def analyze_face_shape_endpoint(
+    request: Request,
     image: UploadFile = File(...),
+    inline: bool = False,
+    render: bool = False,
 ):
     """
     이미지를 분석하여 얼굴형을 진단합니다.
+    - 분석 영역은 overlay 좌표로 반환 (?render=true 이면 labeled_image도 생성)
     - Hugging Face Vision Transformer 모델 (metadome/face_shape_classification)
     - 5가지 얼굴형 분류: Heart(하트형), Oblong(긴형), Oval(계란형), Round(둥근형), Square(사각형)
     - 정확도: 85.3%
     """
-    try:
-        contents = await image.read()
-        pil_img = Image.open(io.BytesIO(contents)).convert("RGB")
-    except Exception:
-        raise HTTPException(status_code=400, detail="유효한 이미지 파일이 아닙니다.")
+    cv_img = await read_upload_bgr(image)
 
     try:
-        cv_img = pil_to_cv2(pil_img)
-        result_dict = analyze_face_shape(cv_img)
+        result_dict = await analysis_engine.analyze_face_shape(cv_img, render=render)
+        result_dict["labeled_image"] = await publish_image(
+            request, result_dict.get("labeled_image"), "image/jpeg", inline
+        )
         return FaceShapeResponse(**result_dict)
+    except EngineSaturatedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "1"})
     except Exception as e:
         error_message = f"분석 실패: {str(e)}"
         if "얼굴을 감지할 수 없습니다" in str(e):
@@ -268,6 +957,12 @@ async def analyze_face_shape_endpoint(
         )
 
 
+if TRYON_ENABLED:
+    app.include_router(tryon_router)
+if ANALYSIS_ENABLED:
+    app.include_router(analysis_router)
+
+
 # ======================
 #   Static File Serving
 # ======================
@@ -303,14 +998,21 @@ else:
             "status": "running",
             "endpoints": {
                 "virtual_tryon": "POST /api/tryon",
+                "virtual_tryon_batch": "POST /api/tryon/batch",
+                "virtual_tryon_jobs": "POST /api/tryon/jobs, GET /api/tryon/jobs/{job_id}",
                 "personal_color": "POST /api/analyze",
                 "face_shape": "POST /api/analyze/face-shape",
                 "progress": "GET /api/progress/{session_id}",
+                "results": "GET /api/results/{result_id}",
             },
             "note": "Frontend not built. Run 'npm run build' in the interactive-closet directory.",
         }
 
 
+# 앱 import 시간 (정적 파일 / 라우터 등록까지)
+IMPORT_SECONDS = time.perf_counter() - _IMPORT_STARTED
+
+
 if __name__ == "__main__":
     import uvicorn
 
@@ -5,6 +5,17 @@ API Request/Response Schemas (Pydantic Models)
 from pydantic import BaseModel, ConfigDict
 
 
+class OverlayGeometry(BaseModel):
+    """분석 영역 오버레이 좌표 (원본 이미지 픽셀 기준)"""
+
+    image_size: list[int]  # [width, height]
+    face_box: list[int] | None = None  # [x1, y1, x2, y2]
+    crop_box: list[int] | None = None
+    hair_box: list[int] | None = None
+    skin_polygons: list[list[list[int]]] = []  # 다각형별 [[x, y], ...]
+    eye_polygons: list[list[list[int]]] = []
+
+
 class AnalysisResponse(BaseModel):
     """퍼스널 컬러 분석 결과"""
 
@@ -16,7 +27,26 @@ class AnalysisResponse(BaseModel):
     skin_tone: str
     undertone: str
     face_box: list[int] | None = None
-    labeled_image: str | None = None
+    overlay: OverlayGeometry | None = None
+    labeled_image: str | None = None  # render=true인 경우만. /api/results/{id} URL (inline 모드: data URI)
+
+
+class AnalysisBatchItem(BaseModel):
+    """배치 퍼스널 컬러 분석 항목별 결과"""
+
+    index: int
+    filename: str | None = None
+    success: bool
+    result: AnalysisResponse | None = None
+    error: str | None = None
+
+
+class AnalysisBatchResponse(BaseModel):
+    """배치 퍼스널 컬러 분석 응답 (입력 순서 유지)"""
+
+    success: bool
+    results: list[AnalysisBatchItem] = []
+    error: str | None = None
 
 
 class FaceShapeResponse(BaseModel):
@@ -29,7 +59,8 @@ class FaceShapeResponse(BaseModel):
     recommended_glasses: list[str]
     probabilities: dict[str, float]
     face_box: list[int] | None = None
-    labeled_image: str | None = None
+    overlay: OverlayGeometry | None = None
+    labeled_image: str | None = None  # render=true인 경우만. /api/results/{id} URL (inline 모드: data URI)
 
 
 class VTONRequest(BaseModel):
@@ -47,11 +78,45 @@ class VTONResponse(BaseModel):
     model_config = ConfigDict(populate_by_name=True)
 
     success: bool
-    outputImage: str | None = None
+    outputImage: str | None = None  # /api/results/{id} URL (inline 모드: data URI)
     maskedImage: str | None = None
     error: str | None = None
 
 
+class VTONBatchItem(BaseModel):
+    """배치 Virtual Try-On 항목별 결과"""
+    model_config = ConfigDict(populate_by_name=True)
+
+    index: int
+    category: str
+    success: bool
+    outputImage: str | None = None
+    error: str | None = None
+
+
+class VTONBatchResponse(BaseModel):
+    """배치 Virtual Try-On 응답 (입력 순서 유지)"""
+
+    success: bool
+    results: list[VTONBatchItem] = []
+    error: str | None = None
+
+
+class TryOnJobResponse(BaseModel):
+    """비동기 Try-On 작업 상태"""
+
+    jobId: str
+    sessionId: str  # /api/progress/{sessionId} SSE 세션
+    status: str  # queued, running, succeeded, failed
+    createdAt: float
+    startedAt: float | None = None
+    finishedAt: float | None = None
+    queuePosition: int | None = None
+    queueSize: int | None = None
+    outputImage: str | None = None  # /api/results/{id} URL (?inline=true 이면 data URI)
+    error: str | None = None
+
+
 class ProgressInfo(BaseModel):
     """진행 상태 정보"""
     model_config = ConfigDict(populate_by_name=True)
@@ -62,3 +127,4 @@ class ProgressInfo(BaseModel):
     eta: float | None = None
     queuePosition: int | None = None
     queueSize: int | None = None
+    stepProgress: dict | None = None  # {"current": n, "total": m}
@@ -1,9 +1,35 @@
 """
 Analysis Services
+
+무거운 라이브러리(torch / transformers / dlib / scikit-learn / replicate)를 쓰는 서비스가 많으므로
+패키지 import 시점에는 아무것도 불러오지 않고, 이름에 처음 접근할 때 해당 모듈만 import합니다.
 """
 
-from .personal_color_service import analyze_image, pil_to_cv2
-from .face_shape_service import analyze_face_shape
-from .vton_service import VTONService
+import importlib
+
+# 공개 이름 -> 정의된 모듈
+_EXPORTS = {
+    "analyze_image": ".personal_color_service",
+    "pil_to_cv2": ".imaging",
+    "analyze_face_shape": ".face_shape_service",
+    "VTONService": ".vton_service",
+    "VTONGarment": ".vton_service",
+    "AnalysisEngine": ".analysis_engine",
+    "EngineSaturatedError": ".analysis_engine",
+    "ResultStore": ".result_store",
+    "ProgressBroker": ".progress_broker",
+    "TryOnJobManager": ".tryon_jobs",
+    "TryOnJobInput": ".tryon_jobs",
+    "JobQueueFullError": ".tryon_jobs",
+}
+
+__all__ = list(_EXPORTS)
+
 
-__all__ = ["analyze_image", "pil_to_cv2", "analyze_face_shape", "VTONService"]
+def __getattr__(name: str):
+    module = _EXPORTS.get(name)
+    if module is None:
+        raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+    value = getattr(importlib.import_module(module, __name__), name)
+    globals()[name] = value
+    return value
@@ -0,0 +1,382 @@
+"""
+분석 실행 엔진
+CPU 집약적인 분석(dlib HOG, RandomForest, ViT)을 이벤트 루프 밖의
+워커 프로세스 풀에서 실행합니다.
+
+- 워커는 spawn 시 dlib / joblib / transformers 모델을 한 번만 로드하고 워밍업합니다 (model_registry).
+- 시작 시 모든 워커를 띄워 모델 상태를 모으며, 준비 여부는 /api/ready에서 보고합니다.
+- 디코딩된 이미지는 공유 메모리로 전달됩니다 (pickle 복사 없음).
+- 대기 중인 요청 수가 한도를 넘으면 EngineSaturatedError를 발생시킵니다.
+- 얼굴형 ViT 분류는 동시 요청을 모아 배치 추론합니다 (micro-batching).
+- 퍼스널 컬러 배치 분석은 특징 추출을 워커에 나누고, 분류는 predict_proba 한 번으로 실행합니다.
+"""
+
+import asyncio
+import functools
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context, shared_memory
+from typing import Awaitable, Callable, Optional
+
+import numpy as np
+
+from .metrics import collect_stages, observe_stages
+from .model_registry import is_ready, model_registry
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 워커 프로세스 수 (0이면 프로세스 풀 없이 스레드에서 실행)
+ANALYSIS_WORKERS = int(os.environ.get("ANALYSIS_WORKERS", "2"))
+# 동시에 처리 중이거나 대기 중인 분석 요청의 최대 개수
+ANALYSIS_MAX_PENDING = int(os.environ.get("ANALYSIS_MAX_PENDING", "16"))
+# 워밍업 시 모든 워커의 모델 상태를 확인하기 위한 최대 재제출 횟수
+WARMUP_MAX_ROUNDS = 10
+# 얼굴형 분류 배치 수집 시간(ms)과 최대 배치 크기
+FACE_SHAPE_BATCH_WINDOW_MS = float(os.environ.get("FACE_SHAPE_BATCH_WINDOW_MS", "15"))
+FACE_SHAPE_MAX_BATCH = int(os.environ.get("FACE_SHAPE_MAX_BATCH", "8"))
+
+
+class EngineSaturatedError(RuntimeError):
+    """분석 대기열이 가득 찬 경우 발생"""
+
+
+# ======================
+#     워커 프로세스
+# ======================
+
+def _get_analyzers() -> dict:
+    # 서비스 모듈 import 시 각 모델이 레지스트리에 등록됩니다
+    from .personal_color_service import analyze_image, extract_color_features
+    from .face_shape_service import analyze_face_shape, locate_face_crop
+
+    return {
+        "personal_color": analyze_image,
+        "color_features": extract_color_features,
+        "face_shape": analyze_face_shape,
+        "face_crop": locate_face_crop,
+    }
+
+
+def _init_worker():
+    """워커 초기화 - eager 모델을 로드하고 워밍업합니다"""
+    _load_models()
+    logger.info(f"Analysis worker ready (pid={os.getpid()})")
+
+
+def _load_models() -> tuple[int, dict]:
+    """eager 모델 로드 + 워밍업 후 (pid, states) 반환"""
+    _get_analyzers()
+    return os.getpid(), model_registry.load_eager()
+
+
+def _model_states(hold: float = 0.0) -> tuple[int, dict]:
+    """
+    현재 프로세스의 모델 상태 (pid, states)
+    hold초 동안 워커를 붙잡아 동시에 제출한 나머지 확인 작업이 다른 워커로 가도록 합니다.
+    """
+    _get_analyzers()
+    time.sleep(hold)
+    return os.getpid(), model_registry.states()
+
+
+def _run_in_worker(kind: str, shm_name: str, shape: tuple, dtype: str, options: dict):
+    """공유 메모리에서 이미지를 읽어 분석을 실행합니다"""
+    shm = shared_memory.SharedMemory(name=shm_name)
+    try:
+        # 분석 중 예외의 traceback이 공유 버퍼를 잡고 있지 않도록 복사 후 바로 해제
+        bgr = np.ndarray(shape, dtype=np.dtype(dtype), buffer=shm.buf).copy()
+    finally:
+        shm.close()
+
+    return _get_analyzers()[kind](bgr, **options)
+
+
+def _classify_face_crops(crops: list) -> list:
+    from .face_shape_service import classify_face_crops
+
+    return classify_face_crops(crops)
+
+
+def _classify_color_features(vectors: list) -> list:
+    from .personal_color_service import classify_color_features
+
+    return classify_color_features(vectors)
+
+
+def _with_stages(fn: Callable, *args):
+    """워커에서 fn을 실행하고 단계별 시간을 결과와 함께 반환 (메트릭은 API 프로세스에서 기록)"""
+    with collect_stages() as timings:
+        result = fn(*args)
+    return result, timings
+
+
+# ======================
+#    Micro-batching
+# ======================
+
+class MicroBatcher:
+    """
+    동시에 들어온 요청을 모아 한 번에 처리하는 배치 스케줄러
+
+    첫 요청 후 window_ms 동안 또는 max_batch_size개가 모일 때까지 기다린 뒤
+    run_batch를 한 번 호출하고, 결과를 각 요청에 순서대로 돌려줍니다.
+    """
+
+    def __init__(
+        self,
+        run_batch: Callable[[list], Awaitable[list]],
+        max_batch_size: int = FACE_SHAPE_MAX_BATCH,
+        window_ms: float = FACE_SHAPE_BATCH_WINDOW_MS,
+    ):
+        self.run_batch = run_batch
+        self.max_batch_size = max(1, max_batch_size)
+        self.window = max(0.0, window_ms) / 1000.0
+        self._queue: list[tuple[object, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, item):
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.append((item, future))
+
+        if len(self._queue) >= self.max_batch_size:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+
+        return await future
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        # 대기 중 취소된 요청은 제외
+        self._queue = [(item, future) for item, future in self._queue if not future.done()]
+        while self._queue:
+            batch = self._queue[:self.max_batch_size]
+            self._queue = self._queue[self.max_batch_size:]
+            task = asyncio.create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list):
+        try:
+            results = await self.run_batch([item for item, _ in batch])
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
+
+
+# ======================
+#      실행 엔진
+# ======================
+
+class AnalysisEngine:
+    """분석 작업을 워커 풀에 분배하는 실행 엔진"""
+
+    def __init__(
+        self,
+        workers: int = ANALYSIS_WORKERS,
+        max_pending: int = ANALYSIS_MAX_PENDING,
+    ):
+        self.workers = workers
+        self.max_pending = max_pending
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pending = 0
+        self._face_shape_batcher = MicroBatcher(self._classify_batch)
+        # 워밍업 결과: pid -> 모델 상태
+        self._model_states: dict[int, dict] = {}
+        self._warmup_task: Optional[asyncio.Task] = None
+        self._warmup_seconds: Optional[float] = None
+        self._warmup_error: Optional[str] = None
+
+    @property
+    def pending(self) -> int:
+        return self._pending
+
+    def start(self):
+        """워커 풀 시작 + 백그라운드 모델 로드 / 워밍업 (lifespan에서 호출)"""
+        if self._warmup_task is not None:
+            return
+
+        if self.workers > 0:
+            logger.info(f"Starting analysis engine with {self.workers} workers...")
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=get_context("spawn"),
+                initializer=_init_worker,
+            )
+        self._warmup_task = asyncio.get_running_loop().create_task(self._warm_up())
+
+    async def _warm_up(self):
+        """
+        모든 워커가 모델을 로드할 때까지 기다리며 상태 수집
+        (spawn 방식 풀은 작업이 들어올 때 워커를 띄우므로 워커 수만큼 동시에 제출하고,
+        한 워커가 여러 확인 작업을 처리해 보고하지 않은 워커가 남으면 모든 PID가 보고할 때까지 다시 제출)
+        """
+        started = time.perf_counter()
+        try:
+            if self._executor is None:
+                pid, states = await asyncio.to_thread(_load_models)
+                self._model_states = {pid: states}
+            else:
+                hold = 0.0
+                for _ in range(WARMUP_MAX_ROUNDS):
+                    results = await asyncio.gather(*(
+                        asyncio.wrap_future(self._executor.submit(_model_states, hold))
+                        for _ in range(self.workers)
+                    ))
+                    self._model_states.update(results)
+                    if len(self._model_states) >= self.workers:
+                        break
+                    hold = min(1.0, hold * 2 or 0.05)
+                else:
+                    raise RuntimeError(
+                        f"only {len(self._model_states)} of {self.workers} analysis workers reported"
+                    )
+        except Exception as e:
+            self._warmup_error = str(e)
+            logger.error(f"Analysis engine warmup failed: {e}")
+            return
+        self._warmup_seconds = time.perf_counter() - started
+        logger.info(f"Analysis engine warmed up in {self._warmup_seconds:.1f}s")
+
+    @property
+    def ready(self) -> bool:
+        return (
+            self._warmup_task is not None
+            and self._warmup_task.done()
+            and self._warmup_error is None
+            and len(self._model_states) >= max(1, self.workers)
+            and all(is_ready(states) for states in self._model_states.values())
+        )
+
+    def model_report(self) -> dict:
+        """준비 여부와 워커(프로세스)별 모델 상태"""
+        return {
+            "ready": self.ready,
+            "warming_up": self._warmup_task is not None and not self._warmup_task.done(),
+            "warmup_seconds": self._warmup_seconds,
+            "error": self._warmup_error,
+            "workers": {str(pid): states for pid, states in self._model_states.items()},
+        }
+
+    def shutdown(self):
+        """워커 풀 종료"""
+        if self._warmup_task is not None:
+            self._warmup_task.cancel()
+            self._warmup_task = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=True, cancel_futures=True)
+            self._executor = None
+
+    async def run(self, kind: str, bgr: np.ndarray, **options):
+        """분석 작업(kind)을 실행하고 그 결과를 반환합니다 (options는 분석 함수 키워드 인자)"""
+        if self._pending >= self.max_pending:
+            raise EngineSaturatedError("분석 요청이 많아 잠시 후 다시 시도해주세요.")
+
+        self._pending += 1
+        try:
+            if self._executor is None:
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(
+                    None, functools.partial(_get_analyzers()[kind], bgr, **options)
+                )
+
+            bgr = np.ascontiguousarray(bgr)
+            shm = shared_memory.SharedMemory(create=True, size=bgr.nbytes)
+            try:
+                view = np.ndarray(bgr.shape, dtype=bgr.dtype, buffer=shm.buf)
+                view[:] = bgr
+                del view
+
+                return await self._submit(
+                    _run_in_worker, kind, shm.name, bgr.shape, bgr.dtype.str, options
+                )
+            finally:
+                shm.close()
+                shm.unlink()
+        finally:
+            self._pending -= 1
+
+    async def analyze_personal_color(self, bgr: np.ndarray, render: bool = False) -> dict:
+        return await self.run("personal_color", bgr, render=render)
+
+    async def analyze_personal_color_batch(self, images: list[np.ndarray], render: bool = False) -> list:
+        """
+        여러 이미지의 퍼스널 컬러 분석 (입력 순서 유지)
+
+        특징 추출은 워커 수만큼 동시에 실행하고, 분류는 모든 특징 벡터를 쌓아 한 번에 실행합니다.
+        이미지별 결과는 응답 딕셔너리 또는 실패 시 예외 객체입니다.
+        처리 도중 대기열이 가득 차면 EngineSaturatedError를 발생시킵니다.
+        """
+        from .personal_color_service import build_personal_color_result
+
+        if self._pending >= self.max_pending:
+            raise EngineSaturatedError("분석 요청이 많아 잠시 후 다시 시도해주세요.")
+
+        # 배치 하나가 대기열(max_pending)을 모두 차지하지 않도록 동시 실행 수 제한
+        semaphore = asyncio.Semaphore(max(1, self.workers))
+
+        async def extract(bgr: np.ndarray):
+            async with semaphore:
+                return await self.run("color_features", bgr, render=render)
+
+        results: list = list(await asyncio.gather(
+            *(extract(bgr) for bgr in images), return_exceptions=True
+        ))
+        # 대기열 초과는 이미지별 실패가 아니라 배치 전체의 과부하 (엔드포인트가 503으로 응답)
+        for result in results:
+            if isinstance(result, EngineSaturatedError):
+                raise result
+        extracted = [i for i, result in enumerate(results) if not isinstance(result, BaseException)]
+        if not extracted:
+            return results
+
+        vectors = [results[i].vector for i in extracted]
+        if self._executor is None:
+            loop = asyncio.get_running_loop()
+            predictions = await loop.run_in_executor(None, _classify_color_features, vectors)
+        else:
+            predictions = await self._submit(_classify_color_features, vectors)
+
+        for i, (season_key, confidence) in zip(extracted, predictions):
+            results[i] = build_personal_color_result(results[i], season_key, confidence)
+        return results
+
+    async def analyze_face_shape(self, bgr: np.ndarray, render: bool = False) -> dict:
+        """얼굴 크롭은 워커에서, ViT 분류는 동시 요청과 묶어 배치로 실행합니다"""
+        from .face_shape_service import build_face_shape_result, face_shape_error_result
+
+        try:
+            crop = await self.run("face_crop", bgr, render=render)
+            predictions = await self._face_shape_batcher.submit(crop.rgb)
+            return build_face_shape_result(predictions, crop)
+        except EngineSaturatedError:
+            raise
+        except Exception as e:
+            return face_shape_error_result(e)
+
+    async def _classify_batch(self, crops: list) -> list:
+        if self._executor is None:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(None, _classify_face_crops, crops)
+        return await self._submit(_classify_face_crops, crops)
+
+    async def _submit(self, fn: Callable, *args):
+        """워커 프로세스에서 fn 실행 후 워커가 측정한 단계 시간을 이 프로세스의 메트릭에 기록"""
+        result, timings = await asyncio.wrap_future(self._executor.submit(_with_stages, fn, *args))
+        observe_stages(timings)
+        return result
@@ -0,0 +1,220 @@
+"""
+디스크 LRU 캐시
+내용 해시를 키로 바이너리 결과(이미지)를 로컬 디스크에 저장합니다.
+
+- 전체 용량 제한 (초과 시 가장 오래 사용되지 않은 항목부터 삭제)
+- TTL (생성 후 일정 시간이 지나면 만료)
+- 파일 mtime = 생성 시각, atime = 마지막 사용 시각으로 기록하여
+  재시작 후에도 LRU 순서를 복원합니다.
+
+여러 워커 프로세스(uvicorn --workers N)가 같은 디렉토리를 공유하므로 메모리 인덱스는 프로세스별 캐시일 뿐이며,
+디스크가 기준입니다. 인덱스에 없는 키는 파일을 확인해 인덱스에 추가하고, 용량 초과 시에는 디렉토리를
+다시 스캔하여(저장 시 최소 rescan_interval 간격) 다른 프로세스가 쓴 파일까지 포함해 삭제하며, purge는 디렉토리의 모든 파일을 삭제합니다.
+"""
+
+import hashlib
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional, Union
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def content_key(*parts: Union[bytes, str, None]) -> str:
+    """여러 입력(바이트/문자열)을 하나의 SHA-256 키로 합칩니다"""
+    digest = hashlib.sha256()
+    for part in parts:
+        if part is None:
+            part = b""
+        elif isinstance(part, str):
+            part = part.encode("utf-8")
+        # 각 부분을 먼저 해시하여 경계가 섞이지 않도록 함
+        digest.update(hashlib.sha256(part).digest())
+    return digest.hexdigest()
+
+
+class DiskLRUCache:
+    """용량 제한 + TTL이 있는 디스크 캐시"""
+
+    def __init__(
+        self,
+        directory: Union[str, Path],
+        max_bytes: int,
+        ttl: Optional[float] = None,
+        suffix: str = ".bin",
+        rescan_interval: float = 30.0,
+    ):
+        self.directory = Path(directory)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.suffix = suffix
+        # 다른 프로세스가 쓴 파일을 용량 계산에 반영하기 위한 디렉토리 재스캔 최소 간격 (초)
+        self.rescan_interval = rescan_interval
+        self._scanned_at = 0.0
+        self.hits = 0
+        self.misses = 0
+        # key -> (size, created_at), 마지막 사용 순서대로 정렬
+        self._index: OrderedDict[str, tuple[int, float]] = OrderedDict()
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+        if self.enabled:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            self._load_index()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}{self.suffix}"
+
+    def _load_index(self):
+        """디렉토리를 스캔하여 인덱스 복원"""
+        self._scan()
+        self._evict()
+        logger.info(f"Disk cache {self.directory}: {len(self._index)} entries, {self._total_bytes} bytes")
+
+    def _scan(self):
+        """디렉토리 기준으로 인덱스를 다시 만듦 (다른 프로세스가 쓰거나 지운 파일 반영)"""
+        entries = []
+        for path in self.directory.glob(f"*{self.suffix}"):
+            # 쓰기 중인 임시 파일(.*.tmp) 제외
+            if path.name.startswith(".") or not path.is_file():
+                continue
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            key = path.name[:len(path.name) - len(self.suffix)]
+            entries.append((stat.st_atime, key, stat.st_size, stat.st_mtime))
+
+        self._scanned_at = time.time()
+        self._index.clear()
+        self._total_bytes = 0
+        for _, key, size, created in sorted(entries):
+            self._index[key] = (size, created)
+            self._total_bytes += size
+
+    def _lookup(self, key: str) -> Optional[tuple[int, float]]:
+        """인덱스 항목 반환 (없으면 다른 프로세스가 쓴 파일인지 확인하여 인덱스에 추가)"""
+        entry = self._index.get(key)
+        if entry is not None:
+            return entry
+        try:
+            stat = self._path(key).stat()
+        except FileNotFoundError:
+            return None
+        entry = (stat.st_size, stat.st_mtime)
+        self._index[key] = entry
+        self._total_bytes += stat.st_size
+        return entry
+
+    def _expired(self, created: float, now: float) -> bool:
+        return self.ttl is not None and now - created > self.ttl
+
+    def _remove(self, key: str):
+        size, _ = self._index.pop(key)
+        self._total_bytes -= size
+        try:
+            self._path(key).unlink()
+        except FileNotFoundError:
+            pass
+
+    def _evict(self):
+        now = time.time()
+        for key, (_, created) in list(self._index.items()):
+            if self._expired(created, now):
+                self._remove(key)
+
+        if self._total_bytes > self.max_bytes or now - self._scanned_at >= self.rescan_interval:
+            # 다른 프로세스의 파일과 사용 시각(atime)까지 반영한 LRU 순서로 삭제
+            self._scan()
+        while self._total_bytes > self.max_bytes and self._index:
+            oldest = next(iter(self._index))
+            self._remove(oldest)
+
+    def contains(self, key: str) -> bool:
+        """만료되지 않은 항목 존재 여부 (hit/miss 통계에 반영하지 않음)"""
+        if not self.enabled:
+            return False
+        with self._lock:
+            entry = self._lookup(key)
+            return entry is not None and not self._expired(entry[1], time.time())
+
+    def get(self, key: str) -> Optional[bytes]:
+        """캐시된 데이터 반환 (없거나 만료되면 None)"""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            entry = self._lookup(key)
+            now = time.time()
+            if entry is None or self._expired(entry[1], now):
+                if entry is not None:
+                    self._remove(key)
+                self.misses += 1
+                return None
+
+            path = self._path(key)
+            try:
+                data = path.read_bytes()
+                # atime = 마지막 사용 시각 (mtime = 생성 시각 유지)
+                os.utime(path, (now, entry[1]))
+            except FileNotFoundError:
+                self._index.pop(key)
+                self._total_bytes -= entry[0]
+                self.misses += 1
+                return None
+
+            self._index.move_to_end(key)
+            self.hits += 1
+            return data
+
+    def put(self, key: str, data: bytes):
+        """데이터 저장 (용량 초과 시 LRU 삭제)"""
+        if not self.enabled or len(data) > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._index:
+                self._remove(key)
+
+            path = self._path(key)
+            tmp_path = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+            tmp_path.write_bytes(data)
+            os.replace(tmp_path, path)
+
+            self._index[key] = (len(data), path.stat().st_mtime)
+            self._total_bytes += len(data)
+            self._evict()
+
+    def purge(self) -> int:
+        """모든 항목 삭제 (다른 프로세스가 쓴 파일 포함), 삭제된 개수 반환"""
+        if not self.enabled:
+            return 0
+        with self._lock:
+            self._scan()
+            count = len(self._index)
+            for key in list(self._index):
+                self._remove(key)
+            return count
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._index),
+                "bytes": self._total_bytes,
+                "max_bytes": self.max_bytes,
+                "ttl": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+            }
@@ -0,0 +1,312 @@
+"""
+공용 얼굴 검출 모듈
+퍼스널 컬러 / 얼굴형 분석이 함께 사용하는 Dlib 얼굴 검출 + 68 랜드마크 계층입니다.
+디코딩된 이미지의 해시를 키로 검출 결과를 LRU 캐시에 보관합니다.
+프로세스별 메모리 캐시 뒤에 워커 프로세스들이 공유하는 디스크 캐시를 두어, 같은 사진의 퍼스널 컬러 /
+얼굴형 요청이 다른 분석 워커(또는 다른 uvicorn 워커)로 가도 HOG 검출을 다시 하지 않습니다.
+랜드마크는 필요한 요청(퍼스널 컬러)에서만 예측하고 같은 캐시 항목에 추가합니다.
+
+큰 사진은 축소본에서 HOG 검출을 실행한 뒤 얼굴 영역을 원본 좌표로 되돌리고,
+랜드마크는 원본 해상도에서 예측합니다 (색상 측정에는 영향 없음).
+"""
+
+import hashlib
+import json
+import logging
+import os
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import dlib
+import numpy as np
+
+from .disk_cache import DiskLRUCache, content_key
+from .metrics import stage
+from .model_registry import ModelUnavailableError, model_registry
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# ======================
+#   모델 및 설정
+# ======================
+
+MODELS_DIR = Path(__file__).parent.parent.parent / "models"
+DLIB_PREDICTOR_PATH = MODELS_DIR / "dlib" / "shape_predictor_68_face_landmarks.dat"
+
+# 캐시에 보관할 최대 이미지 수
+DETECTION_CACHE_SIZE = int(os.environ.get("FACE_DETECTION_CACHE_SIZE", "64"))
+# 워커 프로세스 간 공유 디스크 캐시 경로 / 최대 용량(MB, 0이면 프로세스별 메모리 캐시만 사용) / TTL(시간)
+DETECTION_CACHE_DIR = Path(os.environ.get(
+    "FACE_DETECTION_CACHE_DIR", Path(__file__).parent.parent.parent / "cache" / "detections"
+))
+DETECTION_CACHE_MAX_MB = float(os.environ.get("FACE_DETECTION_CACHE_MAX_MB", "16"))
+DETECTION_CACHE_TTL_HOURS = float(os.environ.get("FACE_DETECTION_CACHE_TTL_HOURS", "24"))
+# HOG 검출에 사용할 축소본의 긴 변 길이 (0이면 원본 해상도에서 검출)
+DETECTION_MAX_SIDE = int(os.environ.get("FACE_DETECTION_MAX_SIDE", "1280"))
+# 얼굴 후보가 여럿일 때 이 점수 미만인 후보(오검출)는 가장 큰 얼굴 선택에서 제외
+DETECTION_MIN_SCORE = float(os.environ.get("FACE_DETECTION_MIN_SCORE", "0.2"))
+
+detector = dlib.get_frontal_face_detector()
+
+
+def _load_predictor() -> dlib.shape_predictor:
+    if not DLIB_PREDICTOR_PATH.exists():
+        raise FileNotFoundError(
+            f"Dlib predictor not found: {DLIB_PREDICTOR_PATH}. Please run download_dlib_model.py"
+        )
+    return dlib.shape_predictor(str(DLIB_PREDICTOR_PATH))
+
+
+def _warmup_predictor(predictor: dlib.shape_predictor):
+    """합성 이미지로 HOG 검출 + 랜드마크 예측 1회"""
+    gray = np.full((256, 256), 128, dtype=np.uint8)
+    detector(gray)
+    predictor(gray, dlib.rectangle(64, 64, 191, 191))
+
+
+model_registry.register("face_landmarks", _load_predictor, _warmup_predictor)
+
+
+def get_predictor() -> Optional[dlib.shape_predictor]:
+    """68 랜드마크 predictor (모델 파일이 없으면 None)"""
+    try:
+        return model_registry.get("face_landmarks")
+    except ModelUnavailableError:
+        return None
+
+
+@dataclass(frozen=True)
+class FaceDetection:
+    """가장 큰 얼굴의 검출 결과"""
+    rect: tuple[int, int, int, int]  # left, top, right, bottom
+    landmarks: Optional[np.ndarray] = None  # (68, 2) int32, 예측하지 않았거나 predictor가 없으면 None
+
+    # dlib.rectangle.width() / height()와 동일한 정의 (양 끝 포함)
+    @property
+    def width(self) -> int:
+        return self.rect[2] - self.rect[0] + 1
+
+    @property
+    def height(self) -> int:
+        return self.rect[3] - self.rect[1] + 1
+
+
+def _encode_detection(detection: Optional[FaceDetection]) -> bytes:
+    if detection is None:
+        return b"null"
+    landmarks = detection.landmarks.tolist() if detection.landmarks is not None else None
+    return json.dumps({"rect": list(detection.rect), "landmarks": landmarks}).encode("utf-8")
+
+
+def _decode_detection(data: bytes) -> Optional[FaceDetection]:
+    value = json.loads(data)
+    if value is None:
+        return None
+    landmarks = None
+    if value["landmarks"] is not None:
+        landmarks = np.array(value["landmarks"], dtype=np.int32)
+        landmarks.setflags(write=False)
+    return FaceDetection(rect=tuple(value["rect"]), landmarks=landmarks)
+
+
+def _lacks_landmarks(detection: Optional[FaceDetection]) -> bool:
+    """얼굴은 있지만 랜드마크를 아직 예측하지 않은 검출 결과인지"""
+    return detection is not None and detection.landmarks is None
+
+
+class DetectionCache:
+    """
+    크기 제한이 있는 스레드 안전 LRU 캐시
+    shared(디스크 캐시)가 있으면 메모리에 없거나 랜드마크가 빠진 항목을 다른 프로세스가 쓴 결과에서 찾습니다.
+    """
+
+    def __init__(self, max_entries: int = DETECTION_CACHE_SIZE, shared: Optional[DiskLRUCache] = None):
+        self.max_entries = max_entries
+        self.shared = shared
+        self.hits = 0
+        self.shared_hits = 0
+        self.misses = 0
+        self._entries: OrderedDict[str, Optional[FaceDetection]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, landmarks: bool = True) -> tuple[bool, Optional[FaceDetection]]:
+        """
+        (hit 여부, 검출 결과) 반환 - 얼굴이 없던 이미지도 캐시됩니다
+        메모리에 없거나, landmarks가 필요한데 얼굴 영역만 있으면 공유 캐시에서 찾습니다
+        (hit이어도 랜드마크가 없을 수 있으며 이때 호출한 쪽이 랜드마크만 예측).
+        """
+        with self._lock:
+            hit = key in self._entries
+            detection = self._entries.get(key)
+            if hit:
+                self._entries.move_to_end(key)
+
+        shared_hit = False
+        if self.shared is not None and (not hit or (landmarks and _lacks_landmarks(detection))):
+            data = self.shared.get(content_key(key))
+            if data is not None:
+                shared_detection = _decode_detection(data)
+                if not hit or not _lacks_landmarks(shared_detection):
+                    detection = shared_detection
+                    shared_hit = True
+                    self._put_memory(key, detection)
+                hit = True
+
+        with self._lock:
+            if hit:
+                self.hits += 1
+                self.shared_hits += shared_hit
+            else:
+                self.misses += 1
+        return hit, detection
+
+    def _put_memory(self, key: str, detection: Optional[FaceDetection]):
+        if self.max_entries <= 0:
+            return
+        with self._lock:
+            self._entries[key] = detection
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def put(self, key: str, detection: Optional[FaceDetection]):
+        self._put_memory(key, detection)
+        if self.shared is not None:
+            self.shared.put(content_key(key), _encode_detection(detection))
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "hits": self.hits,
+                "shared_hits": self.shared_hits,
+                "misses": self.misses,
+                "hit_ratio": self.hits / total if total else 0.0,
+                "shared": self.shared.stats() if self.shared is not None else None,
+            }
+
+
+detection_cache = DetectionCache(
+    shared=DiskLRUCache(
+        DETECTION_CACHE_DIR,
+        max_bytes=int(DETECTION_CACHE_MAX_MB * 1024 * 1024),
+        ttl=DETECTION_CACHE_TTL_HOURS * 3600,
+        suffix=".json",
+    ) if DETECTION_CACHE_MAX_MB > 0 else None,
+)
+
+
+# ======================
+#       검출 함수
+# ======================
+
+def image_key(gray: np.ndarray) -> str:
+    """디코딩된 이미지 내용 기반 캐시 키"""
+    digest = hashlib.blake2b(np.ascontiguousarray(gray).data, digest_size=16).hexdigest()
+    return f"{gray.shape[1]}x{gray.shape[0]}:{digest}"
+
+
+@stage("detect")
+def _detect_rect(gray: np.ndarray, max_side: int) -> Optional[dlib.rectangle]:
+    """가장 큰 얼굴 영역 검출 (필요하면 축소본에서 검출 후 원본 좌표로 변환)"""
+    h, w = gray.shape[:2]
+    scale = 1.0
+    if max_side > 0 and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        gray = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+
+    faces, scores, _ = detector.run(gray, 0, 0)
+    if len(faces) == 0:
+        return None
+
+    # 가장 큰 얼굴 선택 (점수가 낮은 후보는 다른 후보가 있으면 제외, 해상도에 따라 생기는 큰 오검출 방지)
+    confident = [face for face, score in zip(faces, scores) if score >= DETECTION_MIN_SCORE]
+    face = max(confident or faces, key=lambda rect: rect.width() * rect.height())
+    if scale == 1.0:
+        return face
+
+    # right / bottom은 양 끝 포함 좌표이므로 픽셀 경계 기준으로 변환
+    return dlib.rectangle(
+        int(round(face.left() / scale)),
+        int(round(face.top() / scale)),
+        int(round((face.right() + 1) / scale)) - 1,
+        int(round((face.bottom() + 1) / scale)) - 1,
+    )
+
+
+def _predict_landmarks(gray: np.ndarray, detection: FaceDetection) -> FaceDetection:
+    """검출 영역에서 68 랜드마크 예측 (predictor가 없으면 그대로 반환)"""
+    predictor = get_predictor()
+    if predictor is None:
+        return detection
+
+    with stage("landmarks"):
+        shape = predictor(gray, dlib.rectangle(*detection.rect))
+        landmarks = np.array(
+            [(shape.part(i).x, shape.part(i).y) for i in range(shape.num_parts)],
+            dtype=np.int32,
+        )
+    # 캐시에서 여러 요청이 공유하므로 읽기 전용
+    landmarks.setflags(write=False)
+    return FaceDetection(rect=detection.rect, landmarks=landmarks)
+
+
+def detect_face(
+    bgr: np.ndarray,
+    gray: Optional[np.ndarray] = None,
+    max_side: Optional[int] = None,
+    landmarks: bool = True,
+) -> Optional[FaceDetection]:
+    """
+    가장 큰 얼굴과 68 랜드마크를 검출합니다
+
+    Args:
+        bgr: OpenCV BGR 형식의 이미지
+        gray: 미리 변환된 grayscale 이미지 (없으면 bgr에서 변환)
+        max_side: HOG 검출용 축소본의 긴 변 길이
+            (None이면 호출 시점의 DETECTION_MAX_SIDE, 0이면 원본 해상도)
+        landmarks: False이면 얼굴 영역만 검출 (랜드마크는 캐시에 이미 있을 때만 포함)
+
+    Returns:
+        FaceDetection (얼굴이 없으면 None)
+    """
+    if max_side is None:
+        max_side = DETECTION_MAX_SIDE
+    if gray is None:
+        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
+
+    key = f"{image_key(gray)}@{max_side}"
+    hit, detection = detection_cache.get(key, landmarks=landmarks)
+    if hit and not (landmarks and _lacks_landmarks(detection)):
+        return detection
+
+    if not hit:
+        face = _detect_rect(gray, max_side)
+        detection = None
+        if face is not None:
+            detection = FaceDetection(rect=(face.left(), face.top(), face.right(), face.bottom()))
+        if detection is None or not landmarks:
+            detection_cache.put(key, detection)
+            return detection
+
+    # 얼굴 영역만 캐시된 경우 포함, 랜드마크를 예측해 같은 항목에 추가
+    detection = _predict_landmarks(gray, detection)
+    detection_cache.put(key, detection)
+    return detection
+
+
+def detection_cache_stats() -> dict:
+    """캐시 hit/miss 통계"""
+    return detection_cache.stats()
@@ -0,0 +1,116 @@
+"""
+얼굴형 분류 ONNX Runtime 백엔드
+export_face_shape_onnx.py로 내보낸 ViT 그래프를 onnxruntime으로 실행합니다.
+PyTorch / transformers 없이 동작하며, int8 동적 양자화 모델도 같은 방식으로 불러옵니다.
+
+모델 디렉토리 구성:
+- model.onnx / model.int8.onnx: 내보낸 그래프 (입력 pixel_values, 출력 logits)
+- config.json: id2label
+- preprocessor_config.json: 리사이즈 크기, 정규화 평균/표준편차
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Optional, Union
+
+import numpy as np
+from PIL import Image
+
+# 내보낸 ONNX 모델 디렉토리
+FACE_SHAPE_ONNX_DIR = Path(os.environ.get(
+    "FACE_SHAPE_ONNX_DIR", Path(__file__).parent.parent.parent / "models" / "face_shape"
+))
+# onnxruntime 연산자 내부 스레드 수 (0이면 onnxruntime 기본값)
+FACE_SHAPE_ONNX_THREADS = int(os.environ.get("FACE_SHAPE_ONNX_THREADS", "1"))
+
+ONNX_MODEL_FILES = {
+    "onnx": "model.onnx",
+    "onnx-int8": "model.int8.onnx",
+}
+
+
+class OnnxFaceShapeClassifier:
+    """
+    transformers image-classification 파이프라인과 같은 형태로 호출하는 ONNX 분류기
+    classifier(images, top_k=5) -> 이미지별 [{'label': ..., 'score': ...}, ...]
+    """
+
+    def __init__(
+        self,
+        model_dir: Union[str, Path] = FACE_SHAPE_ONNX_DIR,
+        model_file: str = ONNX_MODEL_FILES["onnx"],
+        threads: int = FACE_SHAPE_ONNX_THREADS,
+    ):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise RuntimeError(
+                "FACE_SHAPE_BACKEND=onnx를 사용하려면 onnxruntime 패키지가 필요합니다 (pip install onnxruntime)."
+            ) from e
+
+        model_dir = Path(model_dir)
+        model_path = model_dir / model_file
+        if not model_path.exists():
+            raise FileNotFoundError(
+                f"ONNX face shape model not found: {model_path}. Please run export_face_shape_onnx.py"
+            )
+
+        config = json.loads((model_dir / "config.json").read_text())
+        self.labels = {int(index): label for index, label in config["id2label"].items()}
+
+        preprocessor = json.loads((model_dir / "preprocessor_config.json").read_text())
+        size = preprocessor.get("size", {"height": 224, "width": 224})
+        if "shortest_edge" in size:
+            self.size = (size["shortest_edge"], size["shortest_edge"])
+        else:
+            self.size = (size["width"], size["height"])
+        self.resample = preprocessor.get("resample", Image.BILINEAR)
+        self.rescale = preprocessor.get("rescale_factor", 1 / 255) if preprocessor.get("do_rescale", True) else 1.0
+        self.normalize = preprocessor.get("do_normalize", True)
+        self.mean = np.array(preprocessor.get("image_mean", [0.5, 0.5, 0.5]), dtype=np.float32)
+        self.std = np.array(preprocessor.get("image_std", [0.5, 0.5, 0.5]), dtype=np.float32)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            str(model_path), sess_options=options, providers=["CPUExecutionProvider"]
+        )
+        self.input_name = self.session.get_inputs()[0].name
+        self.model_path = model_path
+
+    def preprocess(self, images: list[Image.Image]) -> np.ndarray:
+        """ViTImageProcessor와 같은 전처리 -> (N, 3, H, W) float32"""
+        batch = np.empty((len(images), 3, self.size[1], self.size[0]), dtype=np.float32)
+        for i, image in enumerate(images):
+            resized = image.convert("RGB").resize(self.size, resample=self.resample)
+            pixels = np.asarray(resized, dtype=np.float32) * self.rescale
+            if self.normalize:
+                pixels = (pixels - self.mean) / self.std
+            batch[i] = pixels.transpose(2, 0, 1)
+        return batch
+
+    def __call__(
+        self,
+        images: Union[Image.Image, list[Image.Image]],
+        top_k: int = 5,
+        batch_size: Optional[int] = None,
+    ):
+        """batch_size는 파이프라인 호환용이며 입력 전체를 한 번에 실행합니다"""
+        single = isinstance(images, Image.Image)
+        images = [images] if single else list(images)
+        if not images:
+            return []
+
+        logits = self.session.run(None, {self.input_name: self.preprocess(images)})[0]
+        # softmax (오버플로 방지를 위해 최댓값을 빼고 계산)
+        exp = np.exp(logits - logits.max(axis=1, keepdims=True))
+        probs = exp / exp.sum(axis=1, keepdims=True)
+
+        results = []
+        for row in probs:
+            order = np.argsort(row)[::-1][:top_k]
+            results.append([{"label": self.labels[int(i)], "score": float(row[i])} for i in order])
+        return results[0] if single else results
@@ -2,51 +2,70 @@
 얼굴형 분류 모듈
 Hugging Face의 metadome/face_shape_classification 모델을 사용하여
 얼굴형을 분류합니다.
+
+추론 백엔드는 FACE_SHAPE_BACKEND로 선택합니다.
+- torch (기본): transformers 파이프라인
+- onnx / onnx-int8: 내보낸 ONNX 그래프를 onnxruntime으로 실행 (face_shape_onnx)
 """
 
 import cv2
 import numpy as np
 from PIL import Image
-from transformers import pipeline
-from typing import Dict
+from typing import Dict, Optional
+from dataclasses import dataclass
 import logging
-import dlib
-import base64
+import os
+
+from .face_detection import FaceDetection, detect_face
+from .metrics import stage
+from .model_registry import model_registry
+from .overlay import build_overlay, render_overlay
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-# 글로벌 변수로 모델 파이프라인 저장 (한 번만 로드)
-_classifier = None
-_face_detector = None
+# 얼굴형 분류 추론 백엔드 (torch, onnx, onnx-int8)
+FACE_SHAPE_BACKEND = os.environ.get("FACE_SHAPE_BACKEND", "torch").lower()
+FACE_SHAPE_MODEL = "metadome/face_shape_classification"
 
-# 마킹 색상 정의 (BGR 형식, violet 계열)
-COLOR_FACE = (246, 92, 139)   # 얼굴: violet (#8b5cf6)
-COLOR_CROP = (255, 200, 220)  # 크롭 영역: 밝은 보라색
-COLOR_HAIR = (200, 150, 180)  # 머리카락 영역: 연한 보라색
 
+def _load_classifier():
+    if FACE_SHAPE_BACKEND == "torch":
+        return load_torch_classifier()
+
+    from .face_shape_onnx import ONNX_MODEL_FILES, OnnxFaceShapeClassifier
+
+    if FACE_SHAPE_BACKEND not in ONNX_MODEL_FILES:
+        raise ValueError(f"지원하지 않는 FACE_SHAPE_BACKEND입니다: {FACE_SHAPE_BACKEND}")
+    logger.info(f"Loading face shape classification model ({FACE_SHAPE_BACKEND})...")
+    return OnnxFaceShapeClassifier(model_file=ONNX_MODEL_FILES[FACE_SHAPE_BACKEND])
+
+
+def load_torch_classifier():
+    """PyTorch 파이프라인 로드 (ONNX 내보내기 / 정확도 비교에서도 사용)"""
+    # transformers / torch는 무거우므로 모델을 로드하는 프로세스에서만 import
+    from transformers import pipeline
+
+    logger.info("Loading face shape classification model (torch)...")
+    return pipeline(
+        "image-classification",
+        model=FACE_SHAPE_MODEL,
+        device=-1,  # CPU 사용 (GPU 사용 시 0으로 변경)
+    )
 
-def get_classifier():
-    """얼굴형 분류 파이프라인을 가져옵니다 (lazy loading)"""
-    global _classifier
-    if _classifier is None:
-        logger.info("Loading face shape classification model...")
-        _classifier = pipeline(
-            "image-classification",
-            model="metadome/face_shape_classification",
-            device=-1,  # CPU 사용 (GPU 사용 시 0으로 변경)
-        )
-        logger.info("Model loaded successfully!")
-    return _classifier
 
+def _warmup_classifier(classifier):
+    """합성 이미지로 분류 1회"""
+    classifier(Image.new("RGB", (224, 224), (128, 128, 128)), top_k=5)
 
-def get_face_detector():
-    """Dlib 얼굴 감지기를 가져옵니다 (lazy loading)"""
-    global _face_detector
-    if _face_detector is None:
-        _face_detector = dlib.get_frontal_face_detector()
-    return _face_detector
+
+model_registry.register("face_shape", _load_classifier, _warmup_classifier)
+
+
+def get_classifier():
+    """얼굴형 분류 파이프라인을 가져옵니다 (모델 레지스트리, 한 번만 로드)"""
+    return model_registry.get("face_shape")
 
 
 # 얼굴형별 한국어 정보
@@ -140,152 +159,197 @@ FACE_SHAPE_INFO = {
 }
 
 
-def analyze_face_shape(bgr: np.ndarray) -> dict:
+@dataclass
+class FaceCrop:
+    """분류기 입력으로 사용할 얼굴 크롭 (hair 영역 포함)"""
+    rgb: np.ndarray
+    face_box: Optional[list[int]]
+    overlay: dict
+    labeled_image: Optional[bytes] = None  # JPEG, render=True인 경우에만
+
+
+def locate_face_crop(
+    bgr: np.ndarray, render: bool = False, face: Optional[FaceDetection] = None
+) -> FaceCrop:
+    """
+    얼굴을 감지하여 분류기 입력 크롭과 오버레이 좌표를 만듭니다
+
+    Args:
+        bgr: OpenCV BGR 형식의 이미지
+        render: True이면 오버레이를 그린 시각화 이미지(JPEG)도 생성
+        face: 미리 구한 얼굴 영역 (없으면 detect_face로 검출)
+
+    Returns:
+        FaceCrop (얼굴을 찾지 못하면 전체 이미지 사용)
+    """
+    # 얼굴 감지 및 크롭 (공용 검출 캐시 사용, 가장 큰 얼굴, 크롭에는 랜드마크가 필요 없음)
+    if face is None:
+        face = detect_face(bgr, landmarks=False)
+
+    face_box = None  # 초기화
+    overlay = build_overlay(bgr.shape)
+
+    if face is not None:
+        face_left, face_top, face_right, face_bottom = face.rect
+
+        # 크롭 영역 계산 (hair 영역까지 포함)
+        h, w = bgr.shape[:2]
+        face_width = face.width
+        face_height = face.height
+
+        # 좌우 패딩: 얼굴 너비의 20%
+        pad_w = int(face_width * 0.2)
+        # 아래 패딩: 얼굴 높이의 20%
+        pad_bottom = int(face_height * 0.2)
+        # 위쪽 확장: 얼굴 높이의 50% (hair 영역 포함)
+        pad_top = int(face_height * 0.6)
+
+        x1 = max(0, face_left - pad_w)
+        y1 = max(0, face_top - pad_top)  # hair 영역까지 확장
+        x2 = min(w, face_right + pad_w)
+        y2 = min(h, face_bottom + pad_bottom)
+
+        # Hair 영역 좌표 (시각화용)
+        hair_y1 = y1
+        hair_y2 = face_top
+        hair_x1 = x1
+        hair_x2 = x2
+
+        # face_box 설정
+        face_box = [x1, y1, x2, y2]
+
+        # 얼굴 영역 크롭 (hair 포함)
+        face_bgr = bgr[y1:y2, x1:x2]
+        logger.info(f"Face cropped (with hair): {x1},{y1} to {x2},{y2}")
+
+        # Overlay geometry (원본 픽셀 좌표)
+        overlay = build_overlay(
+            bgr.shape,
+            face_box=[face_left, face_top, face_right, face_bottom],
+            crop_box=face_box,
+            hair_box=[hair_x1, hair_y1, hair_x2, hair_y2],
+        )
+
+    else:
+        # 얼굴을 찾지 못한 경우 전체 이미지 사용
+        logger.warning("No face detected for shape analysis. Using full image.")
+        face_bgr = bgr
+
+    # BGR을 RGB로 변환
+    rgb = cv2.cvtColor(face_bgr, cv2.COLOR_BGR2RGB)
+
+    # 시각화 이미지는 요청된 경우에만 렌더링 (URL / data URI 변환은 응답 시점에)
+    labeled_image = render_overlay(bgr, overlay) if render else None
+
+    return FaceCrop(rgb=rgb, face_box=face_box, overlay=overlay, labeled_image=labeled_image)
+
+
+def classify_face_crops(crops: list[np.ndarray]) -> list[list[dict]]:
+    """
+    여러 얼굴 크롭을 한 번의 배치 추론으로 분류합니다
+
+    Args:
+        crops: RGB 얼굴 크롭 리스트
+
+    Returns:
+        크롭별 [{'label': 'Oval', 'score': 0.85}, ...] 리스트 (입력 순서 유지)
+    """
+    if not crops:
+        return []
+
+    # 얼굴형 분류 파이프라인 가져오기
+    classifier = get_classifier()
+
+    # 모델 추론 실행
+    logger.info(f"Running face shape classification (batch={len(crops)})...")
+    pil_images = [Image.fromarray(rgb) for rgb in crops]
+    with stage("classify_face_shape"):
+        predictions = classifier(pil_images, top_k=5, batch_size=len(pil_images))
+
+    # 결과는 [{'label': 'Oval', 'score': 0.85}, ...] 형태
+    logger.info(f"Predictions: {predictions}")
+
+    return predictions
+
+
+def build_face_shape_result(predictions: list[dict], crop: FaceCrop) -> dict:
+    """분류 결과와 크롭 정보로 응답 딕셔너리를 구성합니다"""
+    # 가장 높은 확률의 얼굴형
+    top_prediction = predictions[0]
+    predicted_shape = top_prediction["label"]
+    confidence = top_prediction["score"] * 100
+
+    # 모든 얼굴형에 대한 확률 분포 (한국어로 변환)
+    probabilities = {}
+    for pred in predictions:
+        shape_en = pred["label"]
+        shape_ko = FACE_SHAPE_INFO.get(shape_en, {}).get("ko", shape_en)
+        probabilities[shape_ko] = round(pred["score"] * 100, 2)
+
+    # 결과가 없는 얼굴형은 0으로 채우기
+    for shape_en, shape_data in FACE_SHAPE_INFO.items():
+        shape_ko = shape_data["ko"]
+        if shape_ko not in probabilities:
+            probabilities[shape_ko] = 0.0
+
+    # 최종 결과 구성
+    shape_info = FACE_SHAPE_INFO.get(predicted_shape, FACE_SHAPE_INFO["Oval"])
+
+    result_dict = {
+        "face_shape": shape_info["ko"],
+        "face_shape_en": predicted_shape,
+        "confidence": round(confidence, 2),
+        "description": shape_info["description"],
+        "recommended_hairstyles": shape_info["recommended_hairstyles"],
+        "recommended_glasses": shape_info["recommended_glasses"],
+        "probabilities": probabilities,
+        "face_box": crop.face_box,
+        "overlay": crop.overlay,
+        "labeled_image": crop.labeled_image,
+    }
+
+    logger.info(f"Returning result with keys: {list(result_dict.keys())}")
+
+    return result_dict
+
+
+def face_shape_error_result(error: Exception) -> dict:
+    """분석 실패 시 기본 응답"""
+    logger.error(f"Face shape analysis failed: {str(error)}")
+    return {
+        "face_shape": "Unknown",
+        "face_shape_en": "unknown",
+        "confidence": 0.0,
+        "description": f"얼굴형 분석에 실패했습니다: {str(error)}",
+        "recommended_hairstyles": ["분석 실패"],
+        "recommended_glasses": ["분석 실패"],
+        "probabilities": {
+            "하트형": 20.0,
+            "긴형": 20.0,
+            "계란형": 20.0,
+            "둥근형": 20.0,
+            "사각형": 20.0,
+        },
+        "face_box": None,
+    }
+
+
+def analyze_face_shape(bgr: np.ndarray, render: bool = False) -> dict:
     """
     얼굴형 분석 메인 함수
 
     Args:
         bgr: OpenCV BGR 형식의 이미지
+        render: True이면 시각화 이미지(JPEG)도 생성
 
     Returns:
         분석 결과 딕셔너리
     """
     try:
-        # Visualization image copy
-        vis_img = bgr.copy()
-
-        # 얼굴 감지 및 크롭
-        detector = get_face_detector()
-        gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-        faces = detector(gray)
-
-        face_box = None  # 초기화
-
-        if len(faces) > 0:
-            # 가장 큰 얼굴 선택
-            face = max(faces, key=lambda rect: rect.width() * rect.height())
-
-            # 크롭 영역 계산 (hair 영역까지 포함)
-            h, w = bgr.shape[:2]
-            face_width = face.width()
-            face_height = face.height()
-
-            # 좌우 패딩: 얼굴 너비의 20%
-            pad_w = int(face_width * 0.2)
-            # 아래 패딩: 얼굴 높이의 20%
-            pad_bottom = int(face_height * 0.2)
-            # 위쪽 확장: 얼굴 높이의 50% (hair 영역 포함)
-            pad_top = int(face_height * 0.6)
-
-            x1 = max(0, face.left() - pad_w)
-            y1 = max(0, face.top() - pad_top)  # hair 영역까지 확장
-            x2 = min(w, face.right() + pad_w)
-            y2 = min(h, face.bottom() + pad_bottom)
-
-            # Hair 영역 좌표 (시각화용)
-            hair_y1 = y1
-            hair_y2 = face.top()
-            hair_x1 = x1
-            hair_x2 = x2
-
-            # face_box 설정
-            face_box = [x1, y1, x2, y2]
-
-            # 얼굴 영역 크롭 (hair 포함)
-            face_bgr = bgr[y1:y2, x1:x2]
-            logger.info(f"Face cropped (with hair): {x1},{y1} to {x2},{y2}")
-
-            # Draw Hair Area
-            cv2.rectangle(vis_img, (hair_x1, hair_y1), (hair_x2, hair_y2), COLOR_HAIR, 2)
-            cv2.putText(vis_img, "Hair", (hair_x1, hair_y1 + 20), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_HAIR, 2)
-
-            # Draw Face Box
-            cv2.rectangle(vis_img, (face.left(), face.top()), (face.right(), face.bottom()), COLOR_FACE, 2)
-            cv2.putText(vis_img, "Face", (face.left(), face.top() - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_FACE, 2)
-
-            # Draw Crop Area
-            cv2.rectangle(vis_img, (x1, y1), (x2, y2), COLOR_CROP, 2)
-            cv2.putText(vis_img, "Crop Area", (x1, y1 - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_CROP, 2)
-
-        else:
-            # 얼굴을 찾지 못한 경우 전체 이미지 사용
-            logger.warning("No face detected for shape analysis. Using full image.")
-            face_bgr = bgr
-
-        # BGR을 RGB로 변환
-        rgb = cv2.cvtColor(face_bgr, cv2.COLOR_BGR2RGB)
-
-        # PIL Image로 변환
-        pil_image = Image.fromarray(rgb)
-
-        # 얼굴형 분류 파이프라인 가져오기
-        classifier = get_classifier()
-
-        # 모델 추론 실행
-        logger.info("Running face shape classification...")
-        predictions = classifier(pil_image, top_k=5)
-
-        # 결과는 [{'label': 'Oval', 'score': 0.85}, ...] 형태
-        logger.info(f"Predictions: {predictions}")
-
-        # 가장 높은 확률의 얼굴형
-        top_prediction = predictions[0]
-        predicted_shape = top_prediction["label"]
-        confidence = top_prediction["score"] * 100
-
-        # 모든 얼굴형에 대한 확률 분포 (한국어로 변환)
-        probabilities = {}
-        for pred in predictions:
-            shape_en = pred["label"]
-            shape_ko = FACE_SHAPE_INFO.get(shape_en, {}).get("ko", shape_en)
-            probabilities[shape_ko] = round(pred["score"] * 100, 2)
-
-        # 결과가 없는 얼굴형은 0으로 채우기
-        for shape_en, shape_data in FACE_SHAPE_INFO.items():
-            shape_ko = shape_data["ko"]
-            if shape_ko not in probabilities:
-                probabilities[shape_ko] = 0.0
-
-        # 최종 결과 구성
-        shape_info = FACE_SHAPE_INFO.get(predicted_shape, FACE_SHAPE_INFO["Oval"])
-
-        # Encode visualization image to base64
-        _, buffer = cv2.imencode('.jpg', vis_img)
-        labeled_image_base64 = base64.b64encode(buffer).decode('utf-8')
-        labeled_image = f"data:image/jpeg;base64,{labeled_image_base64}"
-
-        result_dict = {
-            "face_shape": shape_info["ko"],
-            "face_shape_en": predicted_shape,
-            "confidence": round(confidence, 2),
-            "description": shape_info["description"],
-            "recommended_hairstyles": shape_info["recommended_hairstyles"],
-            "recommended_glasses": shape_info["recommended_glasses"],
-            "probabilities": probabilities,
-            "face_box": face_box,
-            "labeled_image": labeled_image,
-        }
-
-        logger.info(f"Returning result with keys: {list(result_dict.keys())}")
-
-        return result_dict
+        crop = locate_face_crop(bgr, render=render)
+        predictions = classify_face_crops([crop.rgb])[0]
+        return build_face_shape_result(predictions, crop)
 
     except Exception as e:
-        logger.error(f"Face shape analysis failed: {str(e)}")
         # 에러 발생 시 기본 응답 반환
-        return {
-            "face_shape": "Unknown",
-            "face_shape_en": "unknown",
-            "confidence": 0.0,
-            "description": f"얼굴형 분석에 실패했습니다: {str(e)}",
-            "recommended_hairstyles": ["분석 실패"],
-            "recommended_glasses": ["분석 실패"],
-            "probabilities": {
-                "하트형": 20.0,
-                "긴형": 20.0,
-                "계란형": 20.0,
-                "둥근형": 20.0,
-                "사각형": 20.0,
-            },
-            "face_box": None,
-        }
+        return face_shape_error_result(e)
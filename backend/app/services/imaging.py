@@ -0,0 +1,132 @@
+"""
+이미지 변환 유틸리티
+API 프로세스에서 쓰는 가벼운 변환만 두어, 분석 모델(dlib 등)을 불러오지 않고 사용할 수 있습니다.
+
+decode_bgr()는 분석용 업로드 디코딩 단계입니다.
+- 디코딩 전에 파일 크기와 헤더의 픽셀 수를 확인 (decompression bomb 방지)
+- 분석에 원본 해상도가 필요 없으므로 JPEG는 DCT 축소(draft)로 1/2 ~ 1/8 크기로 바로 디코딩
+- EXIF 방향(휴대폰 세로 사진)을 적용
+- PIL이 BGR 순서로 한 번에 내보낸 버퍼를 그대로 사용 (RGB 배열 -> BGR 복사 단계 없음)
+"""
+
+import io
+import os
+from typing import Optional
+
+import numpy as np
+from PIL import Image, UnidentifiedImageError
+
+from .metrics import stage
+
+# 분석용 디코딩 최소 긴 변 길이 (이보다 2배 이상 크면 정수 배율로 축소, 0이면 원본 해상도)
+INGEST_MAX_SIDE = int(os.environ.get("INGEST_MAX_SIDE", "1600"))
+# 업로드 이미지 최대 파일 크기 (MB) / 최대 픽셀 수 (백만 화소, 디코딩 전 헤더로 확인)
+INGEST_MAX_MB = float(os.environ.get("INGEST_MAX_MB", "25"))
+INGEST_MAX_MEGAPIXELS = float(os.environ.get("INGEST_MAX_MEGAPIXELS", "50"))
+
+EXIF_ORIENTATION = 0x0112
+
+
+class ImageRejectedError(ValueError):
+    """분석할 수 없는 업로드 이미지 (형식 오류)"""
+
+
+class ImageTooLargeError(ImageRejectedError):
+    """파일 크기 또는 픽셀 수 제한 초과"""
+
+
+def pil_to_cv2(img: Image.Image) -> np.ndarray:
+    """PIL 이미지를 OpenCV BGR 이미지로 변환"""
+    rgb = np.asarray(img.convert("RGB"))
+    # RGB -> BGR (채널 순서만 뒤집고 연속 메모리로 복사)
+    return np.ascontiguousarray(rgb[:, :, ::-1])
+
+
+def _orient(array: np.ndarray, orientation: int) -> np.ndarray:
+    """EXIF 방향 값(1~8)을 배열 뷰 변환으로 적용 (ImageOps.exif_transpose와 같은 결과)"""
+    if orientation == 2:
+        return array[:, ::-1]
+    if orientation == 3:
+        return array[::-1, ::-1]
+    if orientation == 4:
+        return array[::-1]
+    if orientation == 5:
+        return array.transpose(1, 0, 2)
+    if orientation == 6:
+        # 시계 방향 90도
+        return array.transpose(1, 0, 2)[:, ::-1]
+    if orientation == 7:
+        return array[::-1, ::-1].transpose(1, 0, 2)
+    if orientation == 8:
+        # 반시계 방향 90도
+        return array[:, ::-1].transpose(1, 0, 2)
+    return array
+
+
+@stage("decode")
+def decode_bgr(
+    data: bytes,
+    max_side: Optional[int] = None,
+    max_megapixels: Optional[float] = None,
+) -> np.ndarray:
+    """
+    업로드 바이트를 분석용 BGR 이미지로 디코딩합니다
+
+    Args:
+        data: 이미지 파일 바이트
+        max_side: 디코딩 후 유지할 최소 긴 변 길이 (None이면 INGEST_MAX_SIDE, 0이면 원본)
+            JPEG는 draft 모드로, 그 외 형식은 Image.reduce로 긴 변이 이 값 이상 남는 가장 큰 정수 배율로 축소
+        max_megapixels: 허용 픽셀 수 (None이면 INGEST_MAX_MEGAPIXELS)
+
+    Returns:
+        (H, W, 3) uint8 BGR 배열, EXIF 방향 적용 (방향 변환이 없으면 읽기 전용)
+
+    Raises:
+        ImageTooLargeError: 파일 크기 / 픽셀 수 제한 초과
+        ImageRejectedError: 이미지로 읽을 수 없는 파일
+    """
+    if max_side is None:
+        max_side = INGEST_MAX_SIDE
+    if max_megapixels is None:
+        max_megapixels = INGEST_MAX_MEGAPIXELS
+
+    if len(data) > INGEST_MAX_MB * 1024 * 1024:
+        raise ImageTooLargeError(f"이미지 파일은 최대 {INGEST_MAX_MB:g}MB까지 업로드할 수 있습니다.")
+
+    try:
+        img = Image.open(io.BytesIO(data))
+    except (UnidentifiedImageError, Image.DecompressionBombError, OSError) as e:
+        if isinstance(e, Image.DecompressionBombError):
+            raise ImageTooLargeError("이미지 해상도가 너무 큽니다.") from e
+        raise ImageRejectedError("유효한 이미지 파일이 아닙니다.") from e
+
+    with img:
+        # 헤더만 읽은 상태에서 크기 확인 (픽셀 데이터는 아직 디코딩하지 않음)
+        width, height = img.size
+        if width * height > max_megapixels * 1_000_000:
+            raise ImageTooLargeError(
+                f"이미지 해상도가 너무 큽니다 ({width}x{height}, 최대 {max_megapixels:g}MP)."
+            )
+        orientation = img.getexif().get(EXIF_ORIENTATION, 1)
+
+        factor = max(width, height) // max_side if max_side > 0 else 1
+        try:
+            if factor >= 2 and img.format == "JPEG":
+                # 요청 크기 이상을 유지하는 가장 큰 DCT 배율(1/2, 1/4, 1/8)로 디코딩
+                img.draft("RGB", (-(-width // factor), -(-height // factor)))
+            img.load()
+            if img.mode != "RGB":
+                img = img.convert("RGB")
+            if factor >= 2 and img.size == (width, height):
+                # draft를 지원하지 않는 형식 (PNG, WebP 등)
+                img = img.reduce(factor)
+            raw = img.tobytes("raw", "BGR")
+        except (OSError, ValueError, SyntaxError) as e:
+            raise ImageRejectedError("유효한 이미지 파일이 아닙니다.") from e
+        size = img.size
+
+    bgr = np.frombuffer(raw, dtype=np.uint8).reshape(size[1], size[0], 3)
+    if orientation in range(2, 9):
+        # 회전 / 반전 뷰를 연속 메모리로 한 번만 복사
+        bgr = np.ascontiguousarray(_orient(bgr, orientation))
+    return bgr
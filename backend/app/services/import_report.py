@@ -0,0 +1,34 @@
+"""
+시작 비용 보고
+프로세스가 불러온 무거운 라이브러리, 앱 import 시간, 최대 RSS를 모아
+역할(SERVICE_ROLE)별 시작 비용이 늘어나면 바로 보이도록 합니다.
+"""
+
+import sys
+from typing import Optional
+
+# 시작 비용의 대부분을 차지하는 라이브러리
+HEAVY_MODULES = ("torch", "transformers", "dlib", "sklearn", "cv2", "replicate")
+
+
+def max_rss_mb() -> Optional[float]:
+    """프로세스 최대 RSS (MB, 지원하지 않는 플랫폼이면 None)"""
+    try:
+        import resource
+    except ImportError:
+        return None
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux는 KB, macOS는 바이트 단위
+    return rss / (1024 * 1024) if sys.platform == "darwin" else rss / 1024
+
+
+def import_report(import_seconds: float, roles: set[str]) -> dict:
+    """import_seconds: 앱 모듈 import에 걸린 시간"""
+    rss = max_rss_mb()
+    return {
+        "roles": sorted(roles),
+        "import_seconds": round(import_seconds, 3),
+        "max_rss_mb": round(rss, 1) if rss is not None else None,
+        "heavy_modules": [name for name in HEAVY_MODULES if name in sys.modules],
+        "loaded_modules": len(sys.modules),
+    }
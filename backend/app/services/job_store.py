@@ -0,0 +1,358 @@
+"""
+Try-On 작업 저장소 (SQLite, WAL 모드)
+재시작/배포 중에도 작업을 잃지 않도록 다음을 기록합니다.
+
+- jobs: 작업 상태, 입력 이미지의 내용 해시, 결과 저장소 ID
+- blobs: 입력 이미지와 결과 저장소 비활성화 시의 결과 이미지 (내용 해시 키, 같은 이미지는 한 번만 저장)
+- job_events: 상태 전이 기록
+- predictions: Try-On 요청 캐시 키 -> 진행 중인 Replicate 예측 ID
+  (재시작 후 같은 요청은 재제출하지 않고 기존 예측에 다시 연결)
+"""
+
+import hashlib
+import logging
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Optional, Union
+
+from .tryon_jobs import TryOnJob, TryOnJobInput
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 작업 DB 경로 (빈 값이면 메모리에만 보관)
+TRYON_JOB_DB = os.environ.get(
+    "TRYON_JOB_DB", str(Path(__file__).parent.parent.parent / "cache" / "jobs.sqlite3")
+)
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    session_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL,
+    human_key TEXT NOT NULL,
+    top_key TEXT,
+    bottom_key TEXT,
+    dress_key TEXT,
+    top_description TEXT NOT NULL,
+    bottom_description TEXT NOT NULL,
+    dress_description TEXT NOT NULL,
+    result_id TEXT,
+    error TEXT,
+    owner TEXT,
+    lease_until REAL,
+    output_key TEXT
+);
+CREATE INDEX IF NOT EXISTS jobs_status_created ON jobs (status, created_at);
+
+CREATE TABLE IF NOT EXISTS blobs (
+    key TEXT PRIMARY KEY,
+    data BLOB NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS job_events (
+    job_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS job_events_job ON job_events (job_id);
+
+CREATE TABLE IF NOT EXISTS predictions (
+    cache_key TEXT PRIMARY KEY,
+    prediction_id TEXT NOT NULL,
+    created_at REAL NOT NULL
+);
+"""
+
+JOB_COLUMNS = (
+    "id, session_id, status, created_at, started_at, finished_at, result_id, error, output_key"
+)
+
+
+class JobStore:
+    """SQLite 기반 Try-On 작업 / 예측 기록 저장소"""
+
+    def __init__(self, path: Union[str, Path] = TRYON_JOB_DB):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        # 이벤트 루프에서는 asyncio.to_thread로 호출하므로 스레드 간 공유 + 잠금
+        self._conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        self._migrate()
+        self._lock = threading.Lock()
+        logger.info(f"Job store opened: {self.path}")
+
+    def _migrate(self):
+        """이전 버전 DB에 실행 임대(lease) / 결과 이미지 컬럼 추가"""
+        columns = {row[1] for row in self._conn.execute("PRAGMA table_info(jobs)")}
+        for column, kind in (("owner", "TEXT"), ("lease_until", "REAL"), ("output_key", "TEXT")):
+            if column not in columns:
+                self._conn.execute(f"ALTER TABLE jobs ADD COLUMN {column} {kind}")
+
+    def close(self):
+        with self._lock:
+            self._conn.close()
+
+    def _put_blob(self, data: Optional[bytes]) -> Optional[str]:
+        if data is None:
+            return None
+        key = hashlib.sha256(data).hexdigest()
+        self._conn.execute("INSERT OR IGNORE INTO blobs (key, data) VALUES (?, ?)", (key, data))
+        return key
+
+    def _get_blob(self, key: Optional[str]) -> Optional[bytes]:
+        if key is None:
+            return None
+        row = self._conn.execute("SELECT data FROM blobs WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            raise KeyError(f"입력 이미지를 찾을 수 없습니다: {key[:12]}")
+        return row[0]
+
+    def _record_event(self, job: TryOnJob):
+        self._conn.execute(
+            "INSERT INTO job_events (job_id, status, at) VALUES (?, ?, ?)",
+            (job.id, job.status, time.time()),
+        )
+
+    # ======================
+    #         Jobs
+    # ======================
+
+    def insert_job(self, job: TryOnJob, job_input: TryOnJobInput):
+        """작업과 입력 이미지 저장"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                """
+                INSERT INTO jobs (
+                    id, session_id, status, created_at,
+                    human_key, top_key, bottom_key, dress_key,
+                    top_description, bottom_description, dress_description
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    job.id, job.session_id, job.status, job.created_at,
+                    self._put_blob(job_input.human_image),
+                    self._put_blob(job_input.top_image),
+                    self._put_blob(job_input.bottom_image),
+                    self._put_blob(job_input.dress_image),
+                    job_input.top_description,
+                    job_input.bottom_description,
+                    job_input.dress_description,
+                ),
+            )
+            self._record_event(job)
+
+    def update_job(self, job: TryOnJob):
+        """상태 전이 기록 (결과 저장소 비활성화 시의 결과 이미지는 작업과 같은 보관 기간 동안 blobs에)"""
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.execute(
+                """
+                UPDATE jobs
+                SET status = ?, started_at = ?, finished_at = ?, result_id = ?, error = ?,
+                    output_key = COALESCE(?, output_key)
+                WHERE id = ?
+                """,
+                (
+                    job.status, job.started_at, job.finished_at, job.result_id, job.error,
+                    self._put_blob(job.output_image), job.id,
+                ),
+            )
+            self._record_event(job)
+
+    def claim_job(self, job: TryOnJob, owner: str, lease_until: float) -> bool:
+        """
+        대기 중인 작업을 실행 상태로 전환 (여러 워커 프로세스 중 하나만 성공)
+        owner(프로세스 ID)가 lease_until까지 실행을 임대하며, 실행 중에는 renew_leases로 연장합니다.
+        성공하면 job.started_at 기준으로 기록하고 True 반환
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            claimed = self._conn.execute(
+                """
+                UPDATE jobs SET status = ?, started_at = ?, owner = ?, lease_until = ?
+                WHERE id = ? AND status = ?
+                """,
+                (job.status, job.started_at, owner, lease_until, job.id, "queued"),
+            ).rowcount == 1
+            if claimed:
+                self._record_event(job)
+            return claimed
+
+    def renew_leases(self, owner: str, lease_until: float) -> int:
+        """owner가 실행 중인 작업의 임대 연장 (하트비트), 연장된 작업 수 반환"""
+        with self._lock:
+            return self._conn.execute(
+                "UPDATE jobs SET lease_until = ? WHERE owner = ? AND status = ?",
+                (lease_until, owner, "running"),
+            ).rowcount
+
+    def release_leases(self, owner: str):
+        """정상 종료 시 owner의 실행 중 작업 임대를 즉시 만료 (재시작한 프로세스가 바로 재개)"""
+        with self._lock:
+            self._conn.execute(
+                "UPDATE jobs SET lease_until = 0 WHERE owner = ? AND status = ?",
+                (owner, "running"),
+            )
+
+    def requeue_expired(self, now: float) -> list[str]:
+        """
+        임대가 만료된 실행 중 작업(하트비트가 끊긴 프로세스)을 대기 상태로 되돌리고 ID 목록 반환
+        살아 있는 다른 워커 프로세스가 실행 중인 작업은 임대가 유지되므로 건드리지 않습니다.
+        """
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            job_ids = [
+                row[0]
+                for row in self._conn.execute(
+                    "SELECT id FROM jobs WHERE status = ? AND (lease_until IS NULL OR lease_until < ?)",
+                    ("running", now),
+                )
+            ]
+            self._conn.executemany(
+                "UPDATE jobs SET status = ?, started_at = NULL, owner = NULL, lease_until = NULL WHERE id = ?",
+                [("queued", job_id) for job_id in job_ids],
+            )
+            self._conn.executemany(
+                "INSERT INTO job_events (job_id, status, at) VALUES (?, ?, ?)",
+                [(job_id, "queued", now) for job_id in job_ids],
+            )
+            return job_ids
+
+    def load_input(self, job_id: str) -> TryOnJobInput:
+        """작업 입력 이미지 로드"""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT human_key, top_key, bottom_key, dress_key,
+                       top_description, bottom_description, dress_description
+                FROM jobs WHERE id = ?
+                """,
+                (job_id,),
+            ).fetchone()
+            if row is None:
+                raise KeyError(f"작업을 찾을 수 없습니다: {job_id}")
+            human_key, top_key, bottom_key, dress_key, top_desc, bottom_desc, dress_desc = row
+            return TryOnJobInput(
+                human_image=self._get_blob(human_key),
+                top_image=self._get_blob(top_key),
+                bottom_image=self._get_blob(bottom_key),
+                dress_image=self._get_blob(dress_key),
+                top_description=top_desc,
+                bottom_description=bottom_desc,
+                dress_description=dress_desc,
+            )
+
+    def _job_from_row(self, row) -> TryOnJob:
+        job_id, session_id, status, created_at, started_at, finished_at, result_id, error, output_key = row
+        return TryOnJob(
+            id=job_id,
+            session_id=session_id,
+            input=None,
+            status=status,
+            created_at=created_at,
+            started_at=started_at,
+            finished_at=finished_at,
+            result_id=result_id,
+            error=error,
+            output_image=self._get_blob(output_key),
+        )
+
+    def get_job(self, job_id: str) -> Optional[TryOnJob]:
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+            return self._job_from_row(row) if row else None
+
+    def unfinished_jobs(self, statuses: tuple[str, ...]) -> list[TryOnJob]:
+        """재개할 작업 목록 (제출 순서)"""
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT {JOB_COLUMNS} FROM jobs WHERE status IN ({placeholders}) ORDER BY created_at",
+                statuses,
+            ).fetchall()
+            return [self._job_from_row(row) for row in rows]
+
+    def delete_finished(self, statuses: tuple[str, ...], finished_before: float) -> int:
+        """보관 시간이 지난 완료 작업과 더 이상 참조되지 않는 입력 / 결과 이미지 삭제"""
+        placeholders = ", ".join("?" for _ in statuses)
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            expired = [
+                row[0]
+                for row in self._conn.execute(
+                    f"SELECT id FROM jobs WHERE status IN ({placeholders}) AND finished_at < ?",
+                    (*statuses, finished_before),
+                )
+            ]
+            self._conn.executemany("DELETE FROM job_events WHERE job_id = ?", [(i,) for i in expired])
+            self._conn.executemany("DELETE FROM jobs WHERE id = ?", [(i,) for i in expired])
+            self._conn.execute(
+                """
+                DELETE FROM blobs WHERE key NOT IN (
+                    SELECT human_key FROM jobs
+                    UNION SELECT top_key FROM jobs WHERE top_key IS NOT NULL
+                    UNION SELECT bottom_key FROM jobs WHERE bottom_key IS NOT NULL
+                    UNION SELECT dress_key FROM jobs WHERE dress_key IS NOT NULL
+                    UNION SELECT output_key FROM jobs WHERE output_key IS NOT NULL
+                )
+                """
+            )
+            # 결과를 받아가지 않은 오래된 예측 기록 정리
+            self._conn.execute("DELETE FROM predictions WHERE created_at < ?", (finished_before,))
+            return len(expired)
+
+    def job_events(self, job_id: str) -> list[tuple[str, float]]:
+        """작업의 상태 전이 기록 [(status, at), ...]"""
+        with self._lock:
+            return self._conn.execute(
+                "SELECT status, at FROM job_events WHERE job_id = ? ORDER BY rowid", (job_id,)
+            ).fetchall()
+
+    # ======================
+    #      Predictions
+    # ======================
+
+    def get_prediction(self, cache_key: str) -> Optional[str]:
+        """요청 캐시 키로 진행 중인 Replicate 예측 ID 조회"""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT prediction_id FROM predictions WHERE cache_key = ?", (cache_key,)
+            ).fetchone()
+        return row[0] if row else None
+
+    def record_prediction(self, cache_key: str, prediction_id: str):
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO predictions (cache_key, prediction_id, created_at) VALUES (?, ?, ?)",
+                (cache_key, prediction_id, time.time()),
+            )
+
+    def clear_prediction(self, cache_key: str):
+        with self._lock:
+            self._conn.execute("DELETE FROM predictions WHERE cache_key = ?", (cache_key,))
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = dict(self._conn.execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall())
+            blobs = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(LENGTH(data)), 0) FROM blobs").fetchone()
+            predictions = self._conn.execute("SELECT COUNT(*) FROM predictions").fetchone()[0]
+        return {
+            "path": str(self.path),
+            "jobs": counts,
+            "blobs": blobs[0],
+            "blob_bytes": blobs[1],
+            "pending_predictions": predictions,
+        }
@@ -0,0 +1,124 @@
+"""
+Try-On 지연 시간 모델
+카테고리 / 단계(queue: 대기, processing: 생성)별로 관측된 소요 시간을 모아
+EWMA와 백분위수로 남은 시간(ETA)을 추정합니다.
+관측값 히스토그램은 용량 계획 데이터로도 사용합니다.
+"""
+
+import math
+import os
+import threading
+from collections import deque
+from typing import Optional
+
+# 관측값이 없을 때 사용하는 단계별 기본 소요 시간 (초)
+TRYON_DEFAULT_QUEUE_SECONDS = float(os.environ.get("TRYON_DEFAULT_QUEUE_SECONDS", "5"))
+TRYON_DEFAULT_PROCESSING_SECONDS = float(os.environ.get("TRYON_DEFAULT_PROCESSING_SECONDS", "60"))
+# EWMA 가중치 / 백분위수 계산용 최근 관측값 개수
+TRYON_LATENCY_ALPHA = float(os.environ.get("TRYON_LATENCY_ALPHA", "0.2"))
+TRYON_LATENCY_WINDOW = int(os.environ.get("TRYON_LATENCY_WINDOW", "200"))
+
+STAGES = ("queue", "processing")
+
+
+class LatencyStats:
+    """단일 (카테고리, 단계)의 관측값"""
+
+    def __init__(self, alpha: float, window: int):
+        self.alpha = alpha
+        self.ewma: Optional[float] = None
+        self.count = 0
+        self.samples: deque[float] = deque(maxlen=max(1, window))
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.samples.append(seconds)
+        if self.ewma is None:
+            self.ewma = seconds
+        else:
+            self.ewma = self.alpha * seconds + (1 - self.alpha) * self.ewma
+
+    def percentile(self, q: float) -> Optional[float]:
+        """최근 관측값의 q 백분위수 (0~1, 선형 보간)"""
+        if not self.samples:
+            return None
+        ordered = sorted(self.samples)
+        position = q * (len(ordered) - 1)
+        lower = math.floor(position)
+        upper = math.ceil(position)
+        return ordered[lower] + (ordered[upper] - ordered[lower]) * (position - lower)
+
+    def summary(self) -> dict:
+        return {
+            "count": self.count,
+            "ewma": self.ewma,
+            "p50": self.percentile(0.5),
+            "p90": self.percentile(0.9),
+            "p99": self.percentile(0.99),
+        }
+
+
+class LatencyModel:
+    """카테고리별 Try-On 지연 시간 모델"""
+
+    def __init__(
+        self,
+        default_queue: float = TRYON_DEFAULT_QUEUE_SECONDS,
+        default_processing: float = TRYON_DEFAULT_PROCESSING_SECONDS,
+        alpha: float = TRYON_LATENCY_ALPHA,
+        window: int = TRYON_LATENCY_WINDOW,
+    ):
+        self.defaults = {"queue": default_queue, "processing": default_processing}
+        self.alpha = alpha
+        self.window = window
+        self._stats: dict[tuple[str, str], LatencyStats] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, category: str, stage: str, seconds: float):
+        """관측된 소요 시간 기록"""
+        with self._lock:
+            key = (category, stage)
+            if key not in self._stats:
+                self._stats[key] = LatencyStats(self.alpha, self.window)
+            self._stats[key].observe(max(0.0, seconds))
+
+    def expected(self, category: str, stage: str) -> float:
+        """단계의 예상 소요 시간 (EWMA, 관측값이 없으면 기본값)"""
+        with self._lock:
+            stats = self._stats.get((category, stage))
+            if stats is None or stats.ewma is None:
+                return self.defaults[stage]
+            return stats.ewma
+
+    def remaining(self, category: str, stage: str, elapsed: float) -> float:
+        """
+        단계에서 elapsed초가 지났을 때 남은 시간 추정
+
+        EWMA를 넘기면 p90, p99 순으로 꼬리 분포를 사용하고,
+        그마저 넘기면 예상 시간의 10%를 남은 시간으로 봅니다.
+        """
+        expected = self.expected(category, stage)
+        if elapsed < expected:
+            return expected - elapsed
+
+        with self._lock:
+            stats = self._stats.get((category, stage))
+            tails = [stats.percentile(0.9), stats.percentile(0.99)] if stats else []
+        for tail in tails:
+            if tail is not None and elapsed < tail:
+                return tail - elapsed
+        return expected * 0.1
+
+    def eta(self, category: str, stage: str, elapsed: float) -> float:
+        """전체 남은 시간 (대기 중이면 생성 단계 예상 시간 포함)"""
+        remaining = self.remaining(category, stage, elapsed)
+        if stage == "queue":
+            remaining += self.expected(category, "processing")
+        return remaining
+
+    def stats(self) -> dict:
+        with self._lock:
+            result: dict[str, dict] = {}
+            for (category, stage), stats in self._stats.items():
+                result.setdefault(category, {})[stage] = stats.summary()
+            return result
@@ -0,0 +1,152 @@
+"""
+모델 레지스트리
+분석 모델(dlib 랜드마크, 퍼스널 컬러 RandomForest, 얼굴형 ViT)의 로드와 워밍업을 관리합니다.
+
+- 각 서비스 모듈이 import 시점에 로더와 워밍업 함수를 등록하고, 실제 로드는 레지스트리가 담당
+- eager 모델은 프로세스 시작 시 로드 + 합성 이미지로 워밍업, lazy 모델은 첫 사용 시 로드
+  (MODEL_LOAD_MODES="face_shape=lazy,personal_color=eager" 형식, 기본 eager)
+- 모델별 상태 / 로드 시간 / 워밍업 지연 시간을 기록하여 /api/ready에서 보고
+
+레지스트리는 프로세스마다 하나이며, 분석 워커 프로세스에서는 워커 초기화 시 eager 모델을 로드합니다.
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Optional
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 모델별 로드 방식 (이름=eager|lazy, 쉼표로 구분)
+MODEL_LOAD_MODES = os.environ.get("MODEL_LOAD_MODES", "")
+# 로드 직후 워밍업 추론 실행 여부
+MODEL_WARMUP = os.environ.get("MODEL_WARMUP", "1") != "0"
+
+LOAD_EAGER = "eager"
+LOAD_LAZY = "lazy"
+
+STATUS_PENDING = "pending"
+STATUS_LOADING = "loading"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+
+
+class ModelUnavailableError(RuntimeError):
+    """모델 로드에 실패하여 사용할 수 없음"""
+
+
+@dataclass
+class ModelState:
+    """모델 로드 상태"""
+    name: str
+    mode: str
+    status: str = STATUS_PENDING
+    load_seconds: Optional[float] = None
+    warmup_seconds: Optional[float] = None
+    error: Optional[str] = None
+
+
+def parse_load_modes(value: str) -> dict[str, str]:
+    """"a=lazy,b=eager" -> {"a": "lazy", "b": "eager"}"""
+    modes = {}
+    for item in value.split(","):
+        if "=" not in item:
+            continue
+        name, mode = (part.strip() for part in item.split("=", 1))
+        if mode not in (LOAD_EAGER, LOAD_LAZY):
+            raise ValueError(f"MODEL_LOAD_MODES의 {name} 값은 eager 또는 lazy여야 합니다: {mode}")
+        modes[name] = mode
+    return modes
+
+
+class ModelRegistry:
+    """프로세스별 모델 로드 / 워밍업 레지스트리"""
+
+    def __init__(self, load_modes: str = MODEL_LOAD_MODES, warmup: bool = MODEL_WARMUP):
+        self.load_modes = parse_load_modes(load_modes)
+        self.warmup = warmup
+        self._loaders: dict[str, tuple[Callable[[], Any], Optional[Callable[[Any], None]]]] = {}
+        self._models: dict[str, Any] = {}
+        self._states: dict[str, ModelState] = {}
+        self._locks: dict[str, threading.Lock] = {}
+
+    def register(
+        self,
+        name: str,
+        loader: Callable[[], Any],
+        warmup: Optional[Callable[[Any], None]] = None,
+    ):
+        """모델 로더와 워밍업 함수 등록 (warmup은 로드된 모델로 합성 입력 추론)"""
+        self._loaders[name] = (loader, warmup)
+        self._states[name] = ModelState(name=name, mode=self.load_modes.get(name, LOAD_EAGER))
+        self._locks[name] = threading.Lock()
+
+    def get(self, name: str) -> Any:
+        """로드된 모델 반환 (아직 로드되지 않았으면 지금 로드, 실패했으면 ModelUnavailableError)"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        state = self.load(name)
+        if state.status != STATUS_READY:
+            raise ModelUnavailableError(f"{name} 모델을 사용할 수 없습니다: {state.error}")
+        return self._models[name]
+
+    def load(self, name: str) -> ModelState:
+        """모델 로드 + 워밍업 (이미 시도했으면 기존 상태 반환)"""
+        state = self._states[name]
+        with self._locks[name]:
+            if state.status in (STATUS_READY, STATUS_FAILED):
+                return state
+
+            loader, warmup = self._loaders[name]
+            state.status = STATUS_LOADING
+            started = time.perf_counter()
+            try:
+                model = loader()
+                state.load_seconds = time.perf_counter() - started
+
+                if self.warmup and warmup is not None:
+                    started = time.perf_counter()
+                    warmup(model)
+                    state.warmup_seconds = time.perf_counter() - started
+            except Exception as e:
+                state.status = STATUS_FAILED
+                state.error = str(e)
+                logger.warning(f"Model {name} failed to load: {e}")
+                return state
+
+            self._models[name] = model
+            state.status = STATUS_READY
+            logger.info(
+                f"Model {name} ready (load {state.load_seconds:.2f}s, "
+                f"warmup {state.warmup_seconds or 0:.3f}s)"
+            )
+            return state
+
+    def load_eager(self) -> dict[str, dict]:
+        """eager 모델을 모두 로드하고 전체 상태 반환"""
+        for name, state in self._states.items():
+            if state.mode == LOAD_EAGER:
+                self.load(name)
+        return self.states()
+
+    def states(self) -> dict[str, dict]:
+        return {name: asdict(state) for name, state in self._states.items()}
+
+
+def is_ready(states: dict[str, dict]) -> bool:
+    """eager 모델이 모두 준비되었는지 (lazy 모델은 첫 사용 시 로드되므로 제외)"""
+    return all(
+        state["status"] == STATUS_READY
+        for state in states.values()
+        if state["mode"] == LOAD_EAGER
+    )
+
+
+# 프로세스 전역 레지스트리
+model_registry = ModelRegistry()
@@ -0,0 +1,101 @@
+"""
+분석 오버레이 모듈
+얼굴 박스, 크롭 영역, 머리카락 영역, 피부/눈 다각형을 구조화된 좌표로 응답에 담고,
+서버 렌더링은 명시적으로 요청된 경우에만 제한된 해상도로 수행합니다.
+"""
+
+import os
+from typing import Optional
+
+import cv2
+import numpy as np
+
+from .metrics import stage
+
+# 서버 렌더링 시각화 이미지의 최대 긴 변 길이 (0이면 원본 해상도)
+LABELED_IMAGE_MAX_SIDE = int(os.environ.get("LABELED_IMAGE_MAX_SIDE", "1024"))
+
+# 마킹 색상 정의 (BGR 형식, violet 계열)
+COLOR_FACE = (246, 92, 139)   # 얼굴: violet (#8b5cf6)
+COLOR_SKIN = (200, 150, 180)  # 피부: 연한 보라색
+COLOR_EYES = (150, 80, 120)   # 눈: 어두운 보라색
+COLOR_CROP = (255, 200, 220)  # 크롭 영역: 밝은 보라색
+COLOR_HAIR = (200, 150, 180)  # 머리카락 영역 (얼굴형): 연한 보라색
+COLOR_HAIR_SAMPLE = (255, 200, 220)  # 머리카락 색상 측정 영역 (퍼스널 컬러): 밝은 보라색
+
+
+def build_overlay(
+    image_shape: tuple,
+    face_box: Optional[list[int]] = None,
+    crop_box: Optional[list[int]] = None,
+    hair_box: Optional[list[int]] = None,
+    skin_polygons: Optional[list[np.ndarray]] = None,
+    eye_polygons: Optional[list[np.ndarray]] = None,
+) -> dict:
+    """원본 이미지 픽셀 좌표 기준 오버레이 딕셔너리 생성 (schemas.OverlayGeometry)"""
+    h, w = image_shape[:2]
+    return {
+        "image_size": [int(w), int(h)],
+        "face_box": face_box,
+        "crop_box": crop_box,
+        "hair_box": hair_box,
+        "skin_polygons": [np.asarray(pts).tolist() for pts in skin_polygons or []],
+        "eye_polygons": [np.asarray(pts).tolist() for pts in eye_polygons or []],
+    }
+
+
+@stage("render")
+def render_overlay(bgr: np.ndarray, overlay: dict, max_side: int = LABELED_IMAGE_MAX_SIDE) -> bytes:
+    """
+    오버레이를 이미지에 그려 JPEG 바이트로 반환합니다
+
+    원본보다 큰 해상도가 필요하지 않으므로 긴 변을 max_side로 축소한 뒤 그립니다.
+    """
+    h, w = bgr.shape[:2]
+    scale = 1.0
+    if max_side > 0 and max(h, w) > max_side:
+        scale = max_side / max(h, w)
+        vis_img = cv2.resize(bgr, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+    else:
+        vis_img = bgr.copy()
+
+    def point(x, y):
+        return int(round(x * scale)), int(round(y * scale))
+
+    def draw_box(box, color, label, label_offset=-10):
+        x1, y1, x2, y2 = box
+        cv2.rectangle(vis_img, point(x1, y1), point(x2, y2), color, 2)
+        lx, ly = point(x1, y1)
+        cv2.putText(vis_img, label, (lx, ly + label_offset), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    def draw_polygons(polygons, color, label, anchor, label_offset):
+        """anchor: 라벨을 붙일 (다각형 번호, 점 번호), label_offset: 그 점에서의 (dx, dy)"""
+        if not polygons:
+            return
+        scaled = [
+            np.round(np.asarray(pts, dtype=np.float64) * scale).astype(np.int32).reshape((-1, 1, 2))
+            for pts in polygons
+        ]
+        cv2.polylines(vis_img, scaled, True, color, 2)
+        polygon_index, point_index = anchor
+        points = scaled[min(polygon_index, len(scaled) - 1)].reshape(-1, 2)
+        lx, ly = points[min(point_index, len(points) - 1)]
+        dx, dy = label_offset
+        cv2.putText(vis_img, label, (int(lx) + dx, int(ly) + dy), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+
+    if overlay.get("hair_box"):
+        # 얼굴형 오버레이(크롭 영역 포함)는 라벨을 박스 안쪽에, 퍼스널 컬러는 박스 위에 표시
+        if overlay.get("crop_box"):
+            draw_box(overlay["hair_box"], COLOR_HAIR, "Hair", label_offset=20)
+        else:
+            draw_box(overlay["hair_box"], COLOR_HAIR_SAMPLE, "Hair")
+    if overlay.get("face_box"):
+        draw_box(overlay["face_box"], COLOR_FACE, "Face")
+    if overlay.get("crop_box"):
+        draw_box(overlay["crop_box"], COLOR_CROP, "Crop Area")
+    # 라벨 위치: "Skin"은 왼쪽 볼 다각형의 콧볼 점(랜드마크 31) 왼쪽, "Eyes"는 왼쪽 눈 바깥 끝(랜드마크 36) 위
+    draw_polygons(overlay.get("skin_polygons"), COLOR_SKIN, "Skin", anchor=(0, 4), label_offset=(-20, 0))
+    draw_polygons(overlay.get("eye_polygons"), COLOR_EYES, "Eyes", anchor=(0, 0), label_offset=(0, -10))
+
+    _, buffer = cv2.imencode('.jpg', vis_img)
+    return buffer.tobytes()
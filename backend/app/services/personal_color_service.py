@@ -1,52 +1,44 @@
 import cv2
 import numpy as np
 import math
-from PIL import Image
+import time
 import os
-import joblib
+from dataclasses import dataclass
 from pathlib import Path
-import dlib
-import base64
+from typing import Optional
 
-# ======================
-#   색상 유틸리티
-# ======================
-
-# 마킹 색상 정의 (BGR 형식, violet 계열)
-COLOR_FACE = (246, 92, 139)   # 얼굴: violet (#8b5cf6)
-COLOR_SKIN = (200, 150, 180)  # 피부: 연한 보라색
-COLOR_EYES = (150, 80, 120)   # 눈: 어두운 보라색
-COLOR_HAIR = (255, 200, 220)  # 머리카락: 밝은 보라색
+from .face_detection import detect_face
+from .metrics import record_stage, stage
+from .model_registry import ModelUnavailableError, model_registry
+from .overlay import build_overlay, render_overlay
 
 # ======================
 #   모델 및 설정
 # ======================
 
-# Dlib 설정
 MODELS_DIR = Path(__file__).parent.parent.parent / "models"
-DLIB_PREDICTOR_PATH = MODELS_DIR / "dlib" / "shape_predictor_68_face_landmarks.dat"
-
-# Dlib 모델 로드
-try:
-    detector = dlib.get_frontal_face_detector()
-    predictor = dlib.shape_predictor(str(DLIB_PREDICTOR_PATH))
-except RuntimeError:
-    print("Warning: Dlib predictor not found. Please run download_dlib_model.py")
-    detector = None
-    predictor = None
 
 # 모델 및 인코더 경로
 MODEL_PATH = MODELS_DIR / "personal_color_model.joblib"
 ENCODER_PATH = MODELS_DIR / "label_encoder.joblib"
 
-# 모델 및 인코더 로드
-try:
-    model = joblib.load(MODEL_PATH)
-    label_encoder = joblib.load(ENCODER_PATH)
-except FileNotFoundError:
-    model = None
-    label_encoder = None
-    print("Warning: Model or Label Encoder not found. The classifier will not work.")
+
+def _load_model():
+    """(model, label_encoder) 로드"""
+    import joblib
+
+    return joblib.load(MODEL_PATH), joblib.load(ENCODER_PATH)
+
+
+def _warmup_model(loaded):
+    """합성 특징 벡터로 predict_proba 1회"""
+    model, _ = loaded
+    n_features = getattr(model, "n_features_in_", None)
+    if n_features:
+        model.predict_proba(np.zeros((1, n_features)))
+
+
+model_registry.register("personal_color", _load_model, _warmup_model)
 
 
 SEASON_RULES = {
@@ -77,58 +69,75 @@ SEASON_RULES = {
 #   이미지 / 색상 유틸
 # ======================
 
-def pil_to_cv2(img: Image.Image) -> np.ndarray:
-    """PIL 이미지를 OpenCV BGR 이미지로 변환"""
-    img = img.convert("RGB")
-    arr = np.array(img)
-    bgr = cv2.cvtColor(arr, cv2.COLOR_RGB2BGR)
-    return bgr
+def detect_landmarks_dlib(bgr: np.ndarray) -> np.ndarray:
+    """Dlib을 사용하여 얼굴 랜드마크 검출 (공용 검출 캐시 사용)
 
+    Returns:
+        (68, 2) int32 랜드마크 좌표 배열
+    """
+    detection = detect_face(bgr)
 
-def detect_landmarks_dlib(bgr: np.ndarray):
-    """Dlib을 사용하여 얼굴 랜드마크 검출"""
-    if detector is None or predictor is None:
+    if detection is None:
+        raise ValueError("얼굴을 찾을 수 없습니다.")
+
+    if detection.landmarks is None:
         raise RuntimeError("Dlib models are not loaded")
 
-    gray = cv2.cvtColor(bgr, cv2.COLOR_BGR2GRAY)
-    faces = detector(gray)
+    return detection.landmarks
 
-    if len(faces) == 0:
-        raise ValueError("얼굴을 찾을 수 없습니다.")
 
-    # 가장 큰 얼굴 선택
-    face = max(faces, key=lambda rect: rect.width() * rect.height())
-    landmarks = predictor(gray, face)
+def region_mean_lab_hsv(bgr: np.ndarray, landmarks: np.ndarray, regions):
+    """
+    랜드마크 다각형 영역들의 평균 Lab, HSV(OpenCV 스케일)를 한 번에 계산
+
+    모든 다각형을 감싸는 얼굴 영역만 잘라 하나의 라벨 맵에 래스터화하고,
+    색 공간 변환은 그 영역에 대해 한 번만 수행합니다.
 
-    return landmarks
+    Args:
+        bgr: OpenCV BGR 형식의 이미지
+        landmarks: (68, 2) 랜드마크 좌표 배열
+        regions: 영역 그룹 리스트. 각 그룹은 랜드마크 인덱스 다각형들의 리스트
+            예) [[왼쪽 볼, 오른쪽 볼, 턱], [왼쪽 눈, 오른쪽 눈]]
 
+    Returns:
+        그룹별 (mean_lab, mean_hsv) 리스트
+    """
+    h, w = bgr.shape[:2]
+    polygons = [[landmarks[indices] for indices in group] for group in regions]
 
-def get_roi_from_landmarks(bgr: np.ndarray, landmarks, indices):
-    """랜드마크 인덱스를 기반으로 ROI 추출"""
-    points = []
-    for i in indices:
-        p = landmarks.part(i)
-        points.append((p.x, p.y))
+    # 모든 다각형을 감싸는 영역 (이미지 경계로 제한)
+    all_points = np.vstack([pts for group in polygons for pts in group])
+    x0, y0 = np.maximum(all_points.min(axis=0), 0)
+    x1, y1 = np.minimum(all_points.max(axis=0) + 1, (w, h))
+    crop = bgr[y0:y1, x0:x1]
 
-    points = np.array(points, dtype=np.int32)
+    # Fallback if ROI is empty (shouldn't happen with valid landmarks)
+    fallback = mean_lab_hsv(np.full((1, 1, 3), 128, dtype=np.uint8))
+    if crop.size == 0:
+        return [fallback for _ in regions]
 
-    # 마스크 생성
-    mask = np.zeros(bgr.shape[:2], dtype=np.uint8)
-    cv2.fillConvexPoly(mask, points, 255)
+    # 그룹별 라벨(1, 2, ...) 래스터화
+    offset = np.array([x0, y0], dtype=np.int32)
+    labels = np.zeros(crop.shape[:2], dtype=np.uint8)
+    for label, group in enumerate(polygons, start=1):
+        for pts in group:
+            cv2.fillConvexPoly(labels, pts - offset, label)
 
-    # ROI 추출
-    roi = cv2.bitwise_and(bgr, bgr, mask=mask)
+    lab = cv2.cvtColor(crop, cv2.COLOR_BGR2LAB)
+    hsv = cv2.cvtColor(crop, cv2.COLOR_BGR2HSV)
 
-    # 0이 아닌 픽셀만 반환 (평균 계산용)
-    # reshape to (-1, 3) and filter out [0,0,0]
-    pixels = roi.reshape(-1, 3)
-    pixels = pixels[np.all(pixels != 0, axis=1)]
+    results = []
+    for label in range(1, len(polygons) + 1):
+        mask = (labels == label).view(np.uint8)
+        if not mask.any():
+            results.append(fallback)
+            continue
 
-    if pixels.size == 0:
-        # Fallback if ROI is empty (shouldn't happen with valid landmarks)
-        return np.array([[128, 128, 128]], dtype=np.uint8)
+        mean_lab = np.array(cv2.mean(lab, mask=mask)[:3])
+        mean_hsv = np.array(cv2.mean(hsv, mask=mask)[:3])
+        results.append((mean_lab, mean_hsv))
 
-    return pixels.reshape(1, -1, 3) # reshape back to image-like for color conversion
+    return results
 
 
 def mean_lab_hsv(bgr_roi: np.ndarray):
@@ -176,17 +185,38 @@ def compute_ita(L_star: float, b_star: float) -> float:
 #   메인 분석 함수 (ML 기반)
 # ======================
 
-def analyze_image_ml_based(bgr: np.ndarray) -> dict:
-    """머신러닝 모델 기반 퍼스널 컬러 분석 (Dlib 적용)"""
-    if model is None or label_encoder is None:
-        raise RuntimeError("Model is not loaded. Please train the model first.")
-
-    # Visualization image copy
-    vis_img = bgr.copy()
-
-    # 1. 특징 추출
+@dataclass
+class ColorFeatures:
+    """한 이미지에서 추출한 분류 특징과 응답 구성용 측정값"""
+    vector: np.ndarray  # (11,) 모델 입력 특징
+    L_skin: float
+    a_skin: float
+    b_skin: float
+    L_hair: float
+    H_eye: float
+    S_eye: float
+    V_eye: float
+    ita: float
+    face_box: list
+    overlay: dict
+    labeled_image: Optional[bytes] = None
+
+
+def extract_color_features(
+    bgr: np.ndarray, render: bool = False, landmarks: Optional[np.ndarray] = None
+) -> ColorFeatures:
+    """
+    Dlib 랜드마크로 피부 / 머리카락 / 눈 영역 색상 특징 추출
+
+    Args:
+        bgr: OpenCV BGR 형식의 이미지
+        render: True이면 오버레이를 그린 시각화 이미지(JPEG)도 생성
+        landmarks: 미리 구한 (68, 2) 랜드마크 (없으면 detect_landmarks_dlib로 검출)
+    """
     try:
-        landmarks = detect_landmarks_dlib(bgr)
+        if landmarks is None:
+            landmarks = detect_landmarks_dlib(bgr)
+        started = time.perf_counter()
 
         # ROI 정의 (Dlib 68 포인트 기준)
         # Cheek/Skin ROI indices (approximate polygon)
@@ -194,70 +224,52 @@ def analyze_image_ml_based(bgr: np.ndarray) -> dict:
         right_cheek_indices = [12, 13, 14, 15, 35, 54, 53] # Right jaw to nose/mouth
         chin_indices = [6, 7, 8, 9, 10, 57] # Chin area
 
-        skin_pixels_left = get_roi_from_landmarks(bgr, landmarks, left_cheek_indices)
-        skin_pixels_right = get_roi_from_landmarks(bgr, landmarks, right_cheek_indices)
-        skin_pixels_chin = get_roi_from_landmarks(bgr, landmarks, chin_indices)
-
-        # Combine skin pixels
-        skin_pixels = np.hstack([skin_pixels_left, skin_pixels_right, skin_pixels_chin])
-
         # Eyes (Left: 36-41, Right: 42-47)
         left_eye_indices = list(range(36, 42))
         right_eye_indices = list(range(42, 48))
 
-        eye_pixels_left = get_roi_from_landmarks(bgr, landmarks, left_eye_indices)
-        eye_pixels_right = get_roi_from_landmarks(bgr, landmarks, right_eye_indices)
-        eye_pixels = np.hstack([eye_pixels_left, eye_pixels_right])
+        # 피부(볼 + 턱) / 눈 영역 평균 색상을 한 번에 계산
+        (lab_skin_cv, hsv_skin_cv), (_, eye_hsv_cv) = region_mean_lab_hsv(
+            bgr,
+            landmarks,
+            [
+                [left_cheek_indices, right_cheek_indices, chin_indices],
+                [left_eye_indices, right_eye_indices],
+            ],
+        )
 
         # Hair (Region above eyebrows)
-        eyebrow_y = min([landmarks.part(i).y for i in range(17, 27)])
-        face_width = landmarks.part(16).x - landmarks.part(0).x
+        eyebrow_y = int(landmarks[17:27, 1].min())
+        face_width = int(landmarks[16, 0] - landmarks[0, 0])
 
         # Simple rectangular ROI for hair above eyebrows
         h, w = bgr.shape[:2]
         hair_y_start = max(0, eyebrow_y - int(face_width * 0.5))
         hair_y_end = max(0, eyebrow_y - int(face_width * 0.1))
-        hair_x_start = max(0, landmarks.part(0).x)
-        hair_x_end = min(w, landmarks.part(16).x)
+        hair_x_start = max(0, int(landmarks[0, 0]))
+        hair_x_end = min(w, int(landmarks[16, 0]))
 
         hair_roi = bgr[hair_y_start:hair_y_end, hair_x_start:hair_x_end]
         if hair_roi.size == 0:
              # Fallback if hair ROI is invalid, use top of image
              hair_roi = bgr[0:int(h*0.1), int(w*0.3):int(w*0.7)]
 
-        # --- Visualization ---
-        # Draw Face Box
-        x_min = min([landmarks.part(i).x for i in range(68)])
-        y_min = min([landmarks.part(i).y for i in range(68)])
-        x_max = max([landmarks.part(i).x for i in range(68)])
-        y_max = max([landmarks.part(i).y for i in range(68)])
-        cv2.rectangle(vis_img, (x_min, y_min), (x_max, y_max), COLOR_FACE, 2)
-        cv2.putText(vis_img, "Face", (x_min, y_min - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_FACE, 2)
-
-        # Draw Skin Areas
-        def draw_poly(indices, color):
-            pts = np.array([(landmarks.part(i).x, landmarks.part(i).y) for i in indices], np.int32)
-            pts = pts.reshape((-1, 1, 2))
-            cv2.polylines(vis_img, [pts], True, color, 2)
-
-        draw_poly(left_cheek_indices, COLOR_SKIN)
-        draw_poly(right_cheek_indices, COLOR_SKIN)
-        draw_poly(chin_indices, COLOR_SKIN)
-        cv2.putText(vis_img, "Skin", (landmarks.part(31).x - 20, landmarks.part(31).y), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_SKIN, 2)
-
-        # Draw Eyes
-        draw_poly(left_eye_indices, COLOR_EYES)
-        draw_poly(right_eye_indices, COLOR_EYES)
-        cv2.putText(vis_img, "Eyes", (landmarks.part(36).x, landmarks.part(36).y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_EYES, 2)
-
-        # Draw Hair ROI
-        cv2.rectangle(vis_img, (hair_x_start, hair_y_start), (hair_x_end, hair_y_end), COLOR_HAIR, 2)
-        cv2.putText(vis_img, "Hair", (hair_x_start, hair_y_start - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, COLOR_HAIR, 2)
+        # Calculate face bounding box from landmarks
+        x_min, y_min = (int(v) for v in landmarks.min(axis=0))
+        x_max, y_max = (int(v) for v in landmarks.max(axis=0))
+        face_box = [x_min, y_min, x_max, y_max]
+
+        # --- Overlay geometry (원본 픽셀 좌표) ---
+        overlay = build_overlay(
+            bgr.shape,
+            face_box=face_box,
+            hair_box=[hair_x_start, hair_y_start, hair_x_end, hair_y_end],
+            skin_polygons=[landmarks[indices] for indices in (left_cheek_indices, right_cheek_indices, chin_indices)],
+            eye_polygons=[landmarks[indices] for indices in (left_eye_indices, right_eye_indices)],
+        )
 
         # Compute stats
-        lab_skin_cv, hsv_skin_cv = mean_lab_hsv(skin_pixels)
         lab_hair_cv, _ = mean_lab_hsv(hair_roi)
-        _, eye_hsv_cv = mean_lab_hsv(eye_pixels)
 
         L_skin, a_skin, b_skin = opencv_lab_to_cielab(lab_skin_cv)
         L_hair, _, _ = opencv_lab_to_cielab(lab_hair_cv)
@@ -271,25 +283,57 @@ def analyze_image_ml_based(bgr: np.ndarray) -> dict:
             L_skin, a_skin, b_skin, S_skin, V_skin,
             L_hair, H_eye, S_eye, V_eye,
             contrast_hair, ita
-        ]).reshape(1, -1)
-
-        # Calculate face bounding box from landmarks
-        x_min = min([landmarks.part(i).x for i in range(68)])
-        y_min = min([landmarks.part(i).y for i in range(68)])
-        x_max = max([landmarks.part(i).x for i in range(68)])
-        y_max = max([landmarks.part(i).y for i in range(68)])
-        face_box = [x_min, y_min, x_max, y_max]
+        ])
+        record_stage("features", time.perf_counter() - started)
 
     except Exception as e:
         raise ValueError(f"Feature extraction failed: {e}")
 
-    # 2. 모델 예측
-    pred_encoded = model.predict(feature_vector)
-    confidence_scores = model.predict_proba(feature_vector)
-    confidence = np.max(confidence_scores) * 100
+    # 시각화 이미지는 요청된 경우에만 렌더링 (URL / data URI 변환은 응답 시점에)
+    labeled_image = render_overlay(bgr, overlay) if render else None
+
+    return ColorFeatures(
+        vector=feature_vector,
+        L_skin=L_skin,
+        a_skin=a_skin,
+        b_skin=b_skin,
+        L_hair=L_hair,
+        H_eye=H_eye,
+        S_eye=S_eye,
+        V_eye=V_eye,
+        ita=ita,
+        face_box=face_box,
+        overlay=overlay,
+        labeled_image=labeled_image,
+    )
+
+
+def classify_color_features(vectors: list[np.ndarray]) -> list[tuple[str, float]]:
+    """
+    특징 벡터들을 한 번의 predict_proba로 분류합니다
+
+    Returns:
+        입력 순서대로 (계절 키, 신뢰도 %) 리스트
+    """
+    if not vectors:
+        return []
+
+    try:
+        model, label_encoder = model_registry.get("personal_color")
+    except ModelUnavailableError:
+        raise RuntimeError("Model is not loaded. Please train the model first.")
+
+    # predict()는 predict_proba의 argmax와 같으므로 트리를 한 번만 순회
+    with stage("classify_color"):
+        probabilities = model.predict_proba(np.vstack(vectors))
+    best = probabilities.argmax(axis=1)
+    seasons = label_encoder.inverse_transform(model.classes_[best])
+    confidences = probabilities[np.arange(len(best)), best] * 100
+    return [(str(season), float(confidence)) for season, confidence in zip(seasons, confidences)]
+
 
-    # 3. 결과 디코딩 및 포맷팅
-    season_key = str(label_encoder.inverse_transform(pred_encoded)[0])
+def build_personal_color_result(features: ColorFeatures, season_key: str, confidence: float) -> dict:
+    """분류 결과와 측정값으로 응답 딕셔너리를 구성합니다"""
     cfg = SEASON_RULES[season_key]
     season_ko = cfg["ko"]
 
@@ -303,30 +347,45 @@ def analyze_image_ml_based(bgr: np.ndarray) -> dict:
     desc = (
         f"ML 모델 분석 결과, 당신은 '{season_ko}' 타입({undertone_result})입니다 (신뢰도: {confidence:.1f}%).\n"
         f"주요 분석 수치는 다음과 같습니다:\n"
-        f"  - 피부 밝기 (L*): {L_skin:.1f}\n"
-        f"  - 피부 색조 (a*, b*): ({a_skin:.1f}, {b_skin:.1f})\n"
-        f"  - 피부톤 지수 (ITA): {ita:.1f}\n"
-        f"  - 머리카락 밝기 (L*): {L_hair:.1f}\n"
-        f"  - 눈동자 색 (HSV): (H:{H_eye:.2f}, S:{S_eye:.2f}, V:{V_eye:.2f})\n"
+        f"  - 피부 밝기 (L*): {features.L_skin:.1f}\n"
+        f"  - 피부 색조 (a*, b*): ({features.a_skin:.1f}, {features.b_skin:.1f})\n"
+        f"  - 피부톤 지수 (ITA): {features.ita:.1f}\n"
+        f"  - 머리카락 밝기 (L*): {features.L_hair:.1f}\n"
+        f"  - 눈동자 색 (HSV): (H:{features.H_eye:.2f}, S:{features.S_eye:.2f}, V:{features.V_eye:.2f})\n"
         f"Dlib 68 랜드마크 분석을 통해 정밀하게 측정된 결과입니다."
     )
 
-    # Encode visualization image to base64
-    _, buffer = cv2.imencode('.jpg', vis_img)
-    labeled_image_base64 = base64.b64encode(buffer).decode('utf-8')
-    labeled_image = f"data:image/jpeg;base64,{labeled_image_base64}"
-
     return {
         "season": season_ko,
         "confidence": confidence,
         "description": desc,
         "recommended_colors": cfg["recommended_colors"],
         "avoid_colors": cfg["avoid_colors"],
-        "skin_tone": f"ITA: {ita:.1f}",
+        "skin_tone": f"ITA: {features.ita:.1f}",
         "undertone": undertone_result,
-        "face_box": face_box,
-        "labeled_image": labeled_image,
+        "face_box": features.face_box,
+        "overlay": features.overlay,
+        "labeled_image": features.labeled_image,
     }
 
+
+def analyze_image_ml_based(bgr: np.ndarray, render: bool = False) -> dict:
+    """
+    머신러닝 모델 기반 퍼스널 컬러 분석 (Dlib 적용)
+
+    Args:
+        bgr: OpenCV BGR 형식의 이미지
+        render: True이면 오버레이를 그린 시각화 이미지(JPEG)도 생성
+    """
+    # 모델이 없으면 특징 추출 전에 실패
+    try:
+        model_registry.get("personal_color")
+    except ModelUnavailableError:
+        raise RuntimeError("Model is not loaded. Please train the model first.")
+
+    features = extract_color_features(bgr, render=render)
+    [(season_key, confidence)] = classify_color_features([features.vector])
+    return build_personal_color_result(features, season_key, confidence)
+
 # 이전 함수 analyze_image_rule_based를 analyze_image로 이름 변경하여 호환성 유지
 analyze_image = analyze_image_ml_based
@@ -0,0 +1,236 @@
+"""
+진행 상황 브로커
+Try-On 진행 이벤트를 세션별로 보관하고 SSE 구독자에게 전달합니다.
+
+- 세션별 버퍼 크기 제한: 연속된 진행률 이벤트는 최신 상태 하나로 합침 (coalescing)
+- 이벤트마다 증가하는 ID를 붙여 Last-Event-ID 재연결 시 놓친 이벤트를 재전송
+- 구독자 없이 TTL 동안 활동이 없는 세션은 주기적으로 정리
+- 활성 세션 / 합쳐진 이벤트 / 버려진 이벤트 카운터
+
+publish()는 이벤트 루프 안에서 동기적으로 호출하며 태스크를 만들지 않습니다.
+프로세스 간 버스(progress_bus)가 있으면 발행한 이벤트는 버스를 거쳐 모든 프로세스의
+브로커에 적용되고, 이벤트 ID는 버스가 부여합니다.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from typing import TYPE_CHECKING, AsyncIterator, Optional
+
+if TYPE_CHECKING:
+    from .progress_bus import ProgressBus
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 브로커 설정
+PROGRESS_BUFFER_SIZE = int(os.environ.get("PROGRESS_BUFFER_SIZE", "32"))
+PROGRESS_SESSION_TTL = float(os.environ.get("PROGRESS_SESSION_TTL", "300"))
+PROGRESS_REAP_INTERVAL = float(os.environ.get("PROGRESS_REAP_INTERVAL", "30"))
+PROGRESS_KEEPALIVE = float(os.environ.get("PROGRESS_KEEPALIVE", "30"))
+
+# 종료 이벤트 (전달 후 스트림 종료)
+TERMINAL_STATUSES = {"complete", "error"}
+# 합치지 않고 모두 전달해야 하는 이벤트 (항목 결과 / 종료)
+DISCRETE_STATUSES = TERMINAL_STATUSES | {"item"}
+
+
+class ProgressSession:
+    """세션 하나의 이벤트 버퍼와 구독 상태"""
+
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        # (event_id, data), 오래된 순
+        self.events: deque[tuple[int, dict]] = deque()
+        self.next_id = 1
+        # 구독자에게 전달된 가장 큰 이벤트 ID (버려진 이벤트 집계용)
+        self.delivered_id = 0
+        self.subscribers = 0
+        self.closed = False
+        self.last_active = time.monotonic()
+        self._changed = asyncio.Event()
+
+    def notify(self):
+        """대기 중인 구독자를 깨우고 다음 대기용 이벤트로 교체"""
+        self._changed.set()
+        self._changed = asyncio.Event()
+
+
+class ProgressBroker:
+    """세션별 진행 이벤트 브로커"""
+
+    def __init__(
+        self,
+        buffer_size: int = PROGRESS_BUFFER_SIZE,
+        ttl: float = PROGRESS_SESSION_TTL,
+        reap_interval: float = PROGRESS_REAP_INTERVAL,
+        keepalive: float = PROGRESS_KEEPALIVE,
+        bus: Optional["ProgressBus"] = None,
+    ):
+        self.buffer_size = max(1, buffer_size)
+        self.ttl = ttl
+        self.reap_interval = reap_interval
+        self.keepalive = keepalive
+        self.bus = bus
+        self._sessions: dict[str, ProgressSession] = {}
+        self._reaper: Optional[asyncio.Task] = None
+
+        self.published = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.reaped = 0
+
+    async def start(self):
+        """버스 연결과 유휴 세션 정리 태스크 시작 (lifespan에서 호출)"""
+        if self.bus is not None:
+            await self.bus.start(self._apply)
+        if self._reaper is None and self.ttl > 0:
+            self._reaper = asyncio.get_running_loop().create_task(self._reap_loop())
+
+    async def stop(self):
+        if self.bus is not None:
+            await self.bus.stop()
+        if self._reaper is not None:
+            self._reaper.cancel()
+            try:
+                await self._reaper
+            except asyncio.CancelledError:
+                pass
+            self._reaper = None
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(self.reap_interval)
+            count = self.reap()
+            if count:
+                logger.info(f"Reaped {count} idle progress sessions")
+
+    def reap(self) -> int:
+        """구독자 없이 TTL 동안 활동이 없는 세션 삭제, 삭제된 개수 반환"""
+        now = time.monotonic()
+        expired = [
+            session_id
+            for session_id, session in self._sessions.items()
+            if session.subscribers == 0 and now - session.last_active > self.ttl
+        ]
+        for session_id in expired:
+            del self._sessions[session_id]
+        self.reaped += len(expired)
+        return len(expired)
+
+    def _session(self, session_id: str) -> ProgressSession:
+        session = self._sessions.get(session_id)
+        if session is None:
+            session = self._sessions[session_id] = ProgressSession(session_id)
+        return session
+
+    def has_subscribers(self, session_id: Optional[str]) -> bool:
+        session = self._sessions.get(session_id) if session_id else None
+        return session is not None and session.subscribers > 0
+
+    def is_closed(self, session_id: Optional[str]) -> bool:
+        session = self._sessions.get(session_id) if session_id else None
+        return session is not None and session.closed
+
+    def publish(self, session_id: Optional[str], data: dict):
+        """
+        이벤트 발행
+
+        구독자가 아직 연결되지 않았어도 버퍼에 보관하므로 늦게 연결한 클라이언트도
+        최신 상태와 완료 이벤트를 받습니다. 종료 이후의 이벤트는 무시합니다.
+        """
+        if not session_id:
+            return
+        if self.bus is not None:
+            self.bus.publish(session_id, data)
+        else:
+            self._apply(None, session_id, data)
+
+    def _apply(self, event_id: Optional[int], session_id: str, data: dict):
+        """이벤트를 세션 버퍼에 반영 (event_id가 없으면 세션 안에서 부여)"""
+        session = self._session(session_id)
+        if session.closed:
+            return
+
+        session.last_active = time.monotonic()
+        self.published += 1
+        if event_id is None:
+            event_id = session.next_id
+        session.next_id = event_id + 1
+
+        status = data.get("status")
+        events = session.events
+        if (
+            status not in DISCRETE_STATUSES
+            and events
+            and events[-1][1].get("status") not in DISCRETE_STATUSES
+        ):
+            # 직전 진행률 이벤트를 최신 상태로 교체
+            events[-1] = (event_id, data)
+            self.coalesced += 1
+        else:
+            events.append((event_id, data))
+            if len(events) > self.buffer_size:
+                evicted_id, _ = events.popleft()
+                if evicted_id > session.delivered_id:
+                    self.dropped += 1
+
+        if status in TERMINAL_STATUSES:
+            session.closed = True
+        session.notify()
+
+    async def subscribe(
+        self,
+        session_id: str,
+        last_event_id: Optional[int] = None,
+    ) -> AsyncIterator[Optional[tuple[int, dict]]]:
+        """
+        (event_id, data)를 순서대로 yield, keepalive 간격 동안 이벤트가 없으면 None
+
+        last_event_id 이후의 버퍼된 이벤트부터 전달하고, 종료 이벤트를 전달하면 끝납니다.
+        """
+        session = self._session(session_id)
+        session.subscribers += 1
+        cursor = last_event_id or 0
+        if self.bus is None and cursor >= session.next_id:
+            # 세션이 정리된 뒤 다시 만들어진 경우 처음부터 전달 (버스 ID는 재사용되지 않음)
+            cursor = 0
+
+        try:
+            while True:
+                changed = session._changed
+                pending = [event for event in session.events if event[0] > cursor]
+                for event_id, data in pending:
+                    cursor = event_id
+                    session.delivered_id = max(session.delivered_id, event_id)
+                    yield event_id, data
+                    if data.get("status") in TERMINAL_STATUSES:
+                        return
+
+                if pending:
+                    continue
+                if session.closed:
+                    return
+
+                try:
+                    await asyncio.wait_for(changed.wait(), timeout=self.keepalive)
+                except asyncio.TimeoutError:
+                    yield None
+        finally:
+            session.subscribers -= 1
+            session.last_active = time.monotonic()
+
+    def stats(self) -> dict:
+        return {
+            "active_sessions": len(self._sessions),
+            "subscribers": sum(session.subscribers for session in self._sessions.values()),
+            "buffered_events": sum(len(session.events) for session in self._sessions.values()),
+            "published": self.published,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+            "reaped": self.reaped,
+            "bus": self.bus.stats() if self.bus is not None else None,
+        }
@@ -0,0 +1,322 @@
+"""
+프로세스 간 진행 상황 버스
+uvicorn --workers N 처럼 여러 프로세스로 실행할 때, 작업을 처리하는 워커와
+SSE 연결을 받은 워커가 달라도 진행 이벤트가 전달되도록 합니다.
+
+- auto (기본): 여러 워커 프로세스로 실행 중이면 sqlite, 단일 프로세스면 memory
+- sqlite: 로컬 SQLite 파일(WAL)에 이벤트를 쓰고 각 프로세스가 주기적으로 읽음
+- redis: Redis PUBLISH/SUBSCRIBE + INCRBY (redis 패키지 필요, 호환 서버로 대체 가능)
+- memory: 버스 없이 프로세스 내부에서만 전달 (단일 워커)
+
+이벤트 ID는 버스가 전역으로 증가하도록 부여하므로 어느 워커에 재연결해도
+Last-Event-ID가 같은 의미를 가집니다. 발행은 짧은 간격으로 모아서 쓰며,
+같은 세션의 연속된 진행률 이벤트는 쓰기 전에 최신 상태 하나로 합칩니다.
+"""
+
+import asyncio
+import json
+import logging
+import multiprocessing
+import os
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Callable, Optional, Union
+
+from .progress_broker import DISCRETE_STATUSES
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 버스 설정
+PROGRESS_BUS = os.environ.get("PROGRESS_BUS", "auto")  # auto, sqlite, redis, memory
+PROGRESS_BUS_DB = os.environ.get(
+    "PROGRESS_BUS_DB", str(Path(__file__).parent.parent.parent / "cache" / "progress.sqlite3")
+)
+PROGRESS_BUS_REDIS_URL = os.environ.get("PROGRESS_BUS_REDIS_URL", "redis://localhost:6379/0")
+PROGRESS_BUS_INTERVAL = float(os.environ.get("PROGRESS_BUS_INTERVAL", "0.1"))  # 쓰기/읽기 주기 (초)
+PROGRESS_BUS_RETENTION = float(os.environ.get("PROGRESS_BUS_RETENTION", "300"))  # SQLite 이벤트 보관 (초)
+
+# (event_id, session_id, data)
+EventHandler = Callable[[int, str, dict], None]
+
+
+class ProgressBus:
+    """
+    진행 이벤트 버스 기본 구현
+
+    publish()는 이벤트 루프에서 동기적으로 호출하며 이벤트를 모아 두기만 하고,
+    백그라운드 태스크가 주기적으로 _write_batch()로 보냅니다.
+    하위 클래스는 _open / _close / _write_batch / _read_loop를 구현합니다.
+    """
+
+    def __init__(self, interval: float = PROGRESS_BUS_INTERVAL):
+        self.interval = interval
+        self._on_event: Optional[EventHandler] = None
+        self._pending: list[tuple[str, dict]] = []
+        # 세션별 마지막 대기 이벤트 위치 (합치기용)
+        self._last_index: dict[str, int] = {}
+        self._wakeup: Optional[asyncio.Event] = None
+        self._tasks: list[asyncio.Task] = []
+
+        self.written = 0
+        self.coalesced = 0
+        self.dropped = 0
+
+    async def start(self, on_event: EventHandler):
+        self._on_event = on_event
+        self._wakeup = asyncio.Event()
+        await self._open()
+        loop = asyncio.get_running_loop()
+        self._tasks = [loop.create_task(self._flush_loop()), loop.create_task(self._read_loop())]
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        # 남은 이벤트 전송 (종료 이벤트 유실 방지)
+        await self._flush()
+        await self._close()
+
+    def publish(self, session_id: str, data: dict):
+        status = data.get("status")
+        last = self._last_index.get(session_id)
+        if (
+            status not in DISCRETE_STATUSES
+            and last is not None
+            and self._pending[last][1].get("status") not in DISCRETE_STATUSES
+        ):
+            self._pending[last] = (session_id, data)
+            self.coalesced += 1
+            return
+
+        self._last_index[session_id] = len(self._pending)
+        self._pending.append((session_id, data))
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    async def _flush_loop(self):
+        while True:
+            await self._wakeup.wait()
+            # 짧게 기다려 여러 이벤트를 한 번에 씀
+            await asyncio.sleep(self.interval)
+            await self._flush()
+
+    async def _flush(self):
+        if self._wakeup is not None:
+            self._wakeup.clear()
+        batch, self._pending, self._last_index = self._pending, [], {}
+        if not batch:
+            return
+        try:
+            await self._write_batch(batch)
+            self.written += len(batch)
+        except Exception as e:
+            self.dropped += len(batch)
+            logger.error(f"Progress bus write failed, dropped {len(batch)} events: {e}")
+
+    def _dispatch(self, event_id: int, session_id: str, data: dict):
+        try:
+            self._on_event(event_id, session_id, data)
+        except Exception as e:
+            logger.error(f"Progress bus handler failed for {session_id}: {e}")
+
+    async def _open(self):
+        raise NotImplementedError
+
+    async def _close(self):
+        raise NotImplementedError
+
+    async def _write_batch(self, batch: list[tuple[str, dict]]):
+        raise NotImplementedError
+
+    async def _read_loop(self):
+        raise NotImplementedError
+
+    def stats(self) -> dict:
+        return {
+            "backend": type(self).__name__,
+            "pending": len(self._pending),
+            "written": self.written,
+            "coalesced": self.coalesced,
+            "dropped": self.dropped,
+        }
+
+
+class SQLiteProgressBus(ProgressBus):
+    """로컬 SQLite 파일 기반 버스 (같은 호스트의 여러 워커 프로세스)"""
+
+    def __init__(
+        self,
+        path: Union[str, Path] = PROGRESS_BUS_DB,
+        interval: float = PROGRESS_BUS_INTERVAL,
+        retention: float = PROGRESS_BUS_RETENTION,
+    ):
+        super().__init__(interval)
+        self.path = Path(path)
+        self.retention = retention
+        self._conn: Optional[sqlite3.Connection] = None
+        self._lock = threading.Lock()
+        self._cursor = 0
+
+    def _connect(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        conn = sqlite3.connect(self.path, check_same_thread=False, isolation_level=None)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        # AUTOINCREMENT: 삭제 후에도 ID를 재사용하지 않음 (Last-Event-ID 커서 보장)
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS events (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                session_id TEXT NOT NULL,
+                data TEXT NOT NULL,
+                created_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS events_created ON events (created_at);
+            """
+        )
+        return conn
+
+    async def _open(self):
+        self._conn = await asyncio.to_thread(self._connect)
+        # 시작 이후 발행된 이벤트만 전달 (이전 실행의 이벤트를 다시 보내지 않음)
+        self._cursor = await asyncio.to_thread(self._max_id)
+        logger.info(f"Progress bus (sqlite): {self.path}")
+
+    async def _close(self):
+        if self._conn is not None:
+            with self._lock:
+                self._conn.close()
+            self._conn = None
+
+    def _insert(self, batch: list[tuple[str, dict]]):
+        now = time.time()
+        with self._lock, self._conn:
+            self._conn.execute("BEGIN")
+            self._conn.executemany(
+                "INSERT INTO events (session_id, data, created_at) VALUES (?, ?, ?)",
+                [(session_id, json.dumps(data), now) for session_id, data in batch],
+            )
+
+    def _max_id(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM events").fetchone()[0]
+
+    def _select(self, cursor: int, limit: int = 1000) -> list[tuple[int, str, str]]:
+        with self._lock:
+            return self._conn.execute(
+                "SELECT id, session_id, data FROM events WHERE id > ? ORDER BY id LIMIT ?",
+                (cursor, limit),
+            ).fetchall()
+
+    def _prune(self):
+        with self._lock:
+            self._conn.execute("DELETE FROM events WHERE created_at < ?", (time.time() - self.retention,))
+
+    async def _write_batch(self, batch: list[tuple[str, dict]]):
+        await asyncio.to_thread(self._insert, batch)
+
+    async def _read_loop(self):
+        last_prune = 0.0
+        while True:
+            rows = await asyncio.to_thread(self._select, self._cursor)
+            for event_id, session_id, data in rows:
+                self._cursor = event_id
+                self._dispatch(event_id, session_id, json.loads(data))
+
+            now = time.monotonic()
+            if now - last_prune > 60:
+                last_prune = now
+                await asyncio.to_thread(self._prune)
+
+            if len(rows) < 1000:
+                await asyncio.sleep(self.interval)
+
+
+class RedisProgressBus(ProgressBus):
+    """
+    Redis Pub/Sub 기반 버스 (여러 호스트)
+    INCRBY / PUBLISH / SUBSCRIBE만 사용하므로 Redis 호환 서버로 대체할 수 있습니다.
+    Pub/Sub은 기록을 남기지 않으므로 재전송 범위는 각 프로세스가 받은 이벤트로 제한됩니다.
+    """
+
+    def __init__(
+        self,
+        url: str = PROGRESS_BUS_REDIS_URL,
+        interval: float = PROGRESS_BUS_INTERVAL,
+        channel: str = "closet:progress",
+    ):
+        super().__init__(interval)
+        self.url = url
+        self.channel = channel
+        self.sequence_key = f"{channel}:seq"
+        self._redis = None
+        self._pubsub = None
+
+    async def _open(self):
+        try:
+            import redis.asyncio as redis_asyncio
+        except ImportError as e:
+            raise RuntimeError("PROGRESS_BUS=redis를 사용하려면 redis 패키지가 필요합니다 (pip install 'redis>=5.0.1').") from e
+
+        self._redis = redis_asyncio.from_url(self.url)
+        self._pubsub = self._redis.pubsub()
+        await self._pubsub.subscribe(self.channel)
+        logger.info(f"Progress bus (redis): {self.url} #{self.channel}")
+
+    async def _close(self):
+        if self._pubsub is not None:
+            await self._pubsub.unsubscribe(self.channel)
+            await self._pubsub.aclose()
+        if self._redis is not None:
+            await self._redis.aclose()
+
+    async def _write_batch(self, batch: list[tuple[str, dict]]):
+        # 배치 크기만큼 ID 구간을 한 번에 예약
+        last_id = await self._redis.incrby(self.sequence_key, len(batch))
+        first_id = last_id - len(batch) + 1
+        pipe = self._redis.pipeline(transaction=False)
+        for offset, (session_id, data) in enumerate(batch):
+            pipe.publish(self.channel, json.dumps({
+                "id": first_id + offset,
+                "session": session_id,
+                "data": data,
+            }))
+        await pipe.execute()
+
+    async def _read_loop(self):
+        async for message in self._pubsub.listen():
+            if message.get("type") != "message":
+                continue
+            payload = json.loads(message["data"])
+            self._dispatch(payload["id"], payload["session"], payload["data"])
+
+
+def _multiple_workers() -> bool:
+    """여러 워커 프로세스로 실행 중인지 (WEB_CONCURRENCY > 1 또는 uvicorn --workers N의 spawn 워커)"""
+    try:
+        if int(os.environ.get("WEB_CONCURRENCY") or "1") > 1:
+            return True
+    except ValueError:
+        pass
+    # uvicorn은 --workers N일 때만 워커를 multiprocessing으로 띄움 (단일 워커는 메인 프로세스에서 실행)
+    return multiprocessing.parent_process() is not None
+
+
+def create_progress_bus(kind: str = PROGRESS_BUS) -> Optional[ProgressBus]:
+    """설정에 맞는 버스 생성 (memory면 None)"""
+    kind = kind.lower()
+    if kind == "auto":
+        kind = "sqlite" if _multiple_workers() else "memory"
+        logger.info(f"Progress bus: {kind} (PROGRESS_BUS=auto)")
+    if kind == "memory":
+        return None
+    if kind == "sqlite":
+        return SQLiteProgressBus()
+    if kind == "redis":
+        return RedisProgressBus()
+    raise ValueError(f"지원하지 않는 PROGRESS_BUS입니다: {kind}")
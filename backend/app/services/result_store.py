@@ -0,0 +1,97 @@
+"""
+결과 이미지 저장소
+Try-On 결과 / 분석 시각화 이미지를 내용 해시 기반 ID로 로컬 디스크에 저장하고,
+JSON 응답에는 base64 data URI 대신 /api/results/{id} URL을 담습니다.
+"""
+
+import hashlib
+import os
+import re
+from pathlib import Path
+from typing import Optional
+
+from .disk_cache import DiskLRUCache
+
+# 결과 저장소 설정
+RESULT_STORE_DIR = Path(os.environ.get(
+    "RESULT_STORE_DIR", Path(__file__).parent.parent.parent / "cache" / "results"
+))
+RESULT_STORE_MAX_MB = float(os.environ.get("RESULT_STORE_MAX_MB", "2048"))
+RESULT_STORE_TTL_HOURS = float(os.environ.get("RESULT_STORE_TTL_HOURS", "24"))
+
+MEDIA_TYPES = {
+    ".png": "image/png",
+    ".jpg": "image/jpeg",
+}
+
+# <sha256>.<확장자> 형식만 허용 (경로 조작 방지)
+RESULT_ID_PATTERN = re.compile(r"^[0-9a-f]{64}\.(png|jpg)$")
+
+
+class ResultStore:
+    """내용 주소 기반(content-addressed) 결과 이미지 저장소"""
+
+    def __init__(
+        self,
+        directory: Path = RESULT_STORE_DIR,
+        max_bytes: int = int(RESULT_STORE_MAX_MB * 1024 * 1024),
+        ttl: float = RESULT_STORE_TTL_HOURS * 3600,
+    ):
+        self.ttl = ttl
+        # 키에 확장자가 포함되므로 suffix 없음
+        self._cache = DiskLRUCache(directory, max_bytes=max_bytes, ttl=ttl, suffix="")
+
+    @property
+    def enabled(self) -> bool:
+        return self._cache.enabled
+
+    def put(self, data: bytes, media_type: str = "image/png") -> str:
+        """이미지를 저장하고 결과 ID 반환 (같은 내용이면 같은 ID)"""
+        extension = next(ext for ext, mt in MEDIA_TYPES.items() if mt == media_type)
+        result_id = f"{hashlib.sha256(data).hexdigest()}{extension}"
+        if not self._cache.contains(result_id):
+            self._cache.put(result_id, data)
+        return result_id
+
+    def contains(self, result_id: str) -> bool:
+        """유효한 ID이고 만료되지 않은 결과가 있는지 (데이터는 읽지 않음)"""
+        return bool(RESULT_ID_PATTERN.match(result_id)) and self._cache.contains(result_id)
+
+    def get(self, result_id: str) -> Optional[tuple[bytes, str]]:
+        """(데이터, media type) 반환 - 없거나 만료되면 None"""
+        if not RESULT_ID_PATTERN.match(result_id):
+            return None
+
+        data = self._cache.get(result_id)
+        if data is None:
+            return None
+        return data, MEDIA_TYPES[Path(result_id).suffix]
+
+    def stats(self) -> dict:
+        return self._cache.stats()
+
+
+def parse_range(range_header: str, size: int) -> Optional[tuple[int, int]]:
+    """
+    단일 Range 헤더("bytes=start-end")를 파싱합니다
+
+    Returns:
+        (start, end) 양 끝 포함 범위, 만족할 수 없는 범위면 None
+    """
+    match = re.fullmatch(r"\s*bytes=(\d*)-(\d*)\s*", range_header)
+    if not match or (not match.group(1) and not match.group(2)):
+        return None
+
+    start_text, end_text = match.groups()
+    if not start_text:
+        # bytes=-N : 마지막 N 바이트
+        length = int(end_text)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+
+    start = int(start_text)
+    end = int(end_text) if end_text else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
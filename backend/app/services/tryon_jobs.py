@@ -0,0 +1,336 @@
+"""
+비동기 Try-On 작업 관리
+제출 즉시 작업 ID를 반환하고, 설정된 수의 비동기 워커가 작업 큐를 처리합니다.
+HTTP 요청 동시성과 Replicate 지연 시간을 분리하여 한 노드가 많은 대기 작업을 보관할 수 있습니다.
+
+결과 이미지는 결과 저장소에 넣고 ID만 보관하며 (저장소 비활성화 시 바이트 보관),
+완료된 작업은 보관 시간이 지나면 정리합니다.
+
+작업 저장소(job_store.JobStore)가 있으면 입력과 상태 전이를 SQLite에 기록하고,
+시작 시 끝나지 않은 작업을 다시 큐에 넣습니다. 입력 이미지는 처리 직전에 저장소에서 읽습니다.
+여러 워커 프로세스가 같은 저장소를 쓰면 실행 직전에 작업을 선점(claim)하여 한 번만 실행합니다.
+선점한 프로세스는 실행 임대(lease)를 주기적으로 연장하며, 임대가 만료된 작업(프로세스 중단)만
+다른 프로세스가 다시 큐에 넣습니다.
+"""
+
+import asyncio
+import logging
+import os
+import socket
+import time
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import TYPE_CHECKING, Callable, Optional
+
+from .result_store import ResultStore
+from .vton_service import ProgressInfo, VTONService
+
+if TYPE_CHECKING:
+    from .job_store import JobStore
+
+# 로깅 설정
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+# 작업 처리 설정
+TRYON_JOB_WORKERS = int(os.environ.get("TRYON_JOB_WORKERS", "8"))
+TRYON_JOB_MAX_QUEUED = int(os.environ.get("TRYON_JOB_MAX_QUEUED", "1000"))
+TRYON_JOB_RETENTION = float(os.environ.get("TRYON_JOB_RETENTION", "3600"))  # 완료 후 보관 시간 (초)
+# 실행 임대 시간 (초): 하트비트가 이 시간 동안 없으면 다른 워커 프로세스가 작업을 재개
+TRYON_JOB_LEASE = float(os.environ.get("TRYON_JOB_LEASE", "60"))
+
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_SUCCEEDED = "succeeded"
+JOB_FAILED = "failed"
+FINISHED_STATUSES = (JOB_SUCCEEDED, JOB_FAILED)
+
+
+class JobQueueFullError(RuntimeError):
+    """대기 중인 작업 수가 한도에 도달함"""
+
+
+@dataclass
+class TryOnJobInput:
+    """process_tryon_with_both 입력"""
+    human_image: bytes
+    top_image: Optional[bytes] = None
+    bottom_image: Optional[bytes] = None
+    dress_image: Optional[bytes] = None
+    top_description: str = "A stylish top"
+    bottom_description: str = "Stylish pants"
+    dress_description: str = "A stylish dress"
+
+
+@dataclass
+class TryOnJob:
+    """Try-On 작업 상태"""
+    id: str
+    session_id: str  # SSE 진행 상황 세션 (/api/progress/{session_id})
+    input: Optional[TryOnJobInput]  # 작업 저장소에 있거나 처리가 끝나면 None
+    status: str = JOB_QUEUED
+    created_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    result_id: Optional[str] = None  # 결과 저장소 ID
+    output_image: Optional[bytes] = None  # 결과 저장소 비활성화 시에만 사용 (작업 저장소가 있으면 작업과 함께 보관)
+    error: Optional[str] = None
+
+
+JobProgressCallback = Callable[[str, ProgressInfo], None]
+JobFinishCallback = Callable[[str, bool, Optional[str]], None]
+
+
+class TryOnJobManager:
+    """Try-On 작업 큐 + 워커 풀"""
+
+    def __init__(
+        self,
+        vton_service: VTONService,
+        result_store: ResultStore,
+        on_progress: Optional[JobProgressCallback] = None,
+        on_finish: Optional[JobFinishCallback] = None,
+        workers: int = TRYON_JOB_WORKERS,
+        max_queued: int = TRYON_JOB_MAX_QUEUED,
+        retention: float = TRYON_JOB_RETENTION,
+        store: Optional["JobStore"] = None,
+        lease: float = TRYON_JOB_LEASE,
+    ):
+        self.vton_service = vton_service
+        self.result_store = result_store
+        self.on_progress = on_progress
+        self.on_finish = on_finish
+        self.workers = max(1, workers)
+        self.max_queued = max_queued
+        self.retention = retention
+        self.store = store
+
+        self._jobs: dict[str, TryOnJob] = {}
+        # 대기 중인 작업 ID, 제출 순서대로 (queue_position 계산용)
+        self._queued: OrderedDict[str, None] = OrderedDict()
+        self._queue: Optional[asyncio.Queue] = None
+        self._tasks: list[asyncio.Task] = []
+
+        self.submitted = 0
+        self.succeeded = 0
+        self.failed = 0
+        self.resumed = 0
+        # 작업 실행 임대 소유자 (호스트 + PID + 부팅마다 새 ID)
+        self.lease = lease
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+    def start(self):
+        """워커와 정리 태스크 시작 (lifespan에서 호출)"""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue()
+        self._resume()
+        self._tasks = [loop.create_task(self._worker(i)) for i in range(self.workers)]
+        self._tasks.append(loop.create_task(self._reap_loop()))
+        if self.store is not None:
+            self._tasks.append(loop.create_task(self._lease_loop()))
+        logger.info(f"Try-on job manager started with {self.workers} workers")
+
+    def _resume(self):
+        """
+        작업 저장소에서 끝나지 않은 작업을 제출 순서대로 다시 큐에 넣음
+        - 실행 중이던 작업도 처음부터 다시 실행하지만, Replicate 예측은 predictions 기록으로
+          다시 연결되고 완료된 단계는 결과/중간 결과 캐시에서 재사용됩니다.
+        - 다른 워커 프로세스도 같은 작업을 큐에 넣을 수 있으며, 실행은 선점한 한 곳에서만 합니다.
+        """
+        if self.store is None:
+            return
+        self.store.requeue_expired(time.time())
+        for job in self.store.unfinished_jobs((JOB_QUEUED,)):
+            self._enqueue_resumed(job)
+        if self.resumed:
+            logger.info(f"Resumed {self.resumed} unfinished try-on jobs")
+
+    def _enqueue_resumed(self, job: TryOnJob):
+        if job.id in self._jobs:
+            return
+        self._jobs[job.id] = job
+        self._queued[job.id] = None
+        self._queue.put_nowait(job.id)
+        self.resumed += 1
+
+    async def _lease_loop(self):
+        """실행 중 작업의 임대 연장 + 임대가 만료된 작업(중단된 프로세스) 재개"""
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                now = time.time()
+                await asyncio.to_thread(self.store.renew_leases, self.owner, now + self.lease)
+                for job_id in await asyncio.to_thread(self.store.requeue_expired, now):
+                    job = await asyncio.to_thread(self.store.get_job, job_id)
+                    if job is not None:
+                        logger.info(f"Resuming try-on job {job_id} after its lease expired")
+                        self._enqueue_resumed(job)
+            except Exception as e:
+                logger.error(f"Try-on job lease renewal failed: {e}")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        if self.store is not None:
+            # 실행 중이던 작업은 running으로 남기되 임대를 만료시켜 재시작 후 바로 재개
+            await asyncio.to_thread(self.store.release_leases, self.owner)
+
+    async def submit(self, job_input: TryOnJobInput, session_id: Optional[str] = None) -> TryOnJob:
+        """작업 등록 후 즉시 반환 (대기 작업이 한도에 도달하면 JobQueueFullError)"""
+        if self._queue is None:
+            raise RuntimeError("TryOnJobManager.start()가 호출되지 않았습니다.")
+        if len(self._queued) >= self.max_queued:
+            raise JobQueueFullError(f"대기 중인 작업이 너무 많습니다 ({self.max_queued}개).")
+
+        job_id = uuid.uuid4().hex
+        job = TryOnJob(id=job_id, session_id=session_id or job_id, input=job_input)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.insert_job, job, job_input)
+            job.input = None
+        self._jobs[job_id] = job
+        self._queued[job_id] = None
+        self._queue.put_nowait(job_id)
+        self.submitted += 1
+
+        if self.on_progress:
+            position, size = self.queue_position(job_id)
+            self.on_progress(job.session_id, ProgressInfo(
+                status="pending",
+                progress=0,
+                message="작업 대기 중...",
+                queue_position=position,
+                queue_size=size,
+            ))
+        return job
+
+    async def get(self, job_id: str) -> Optional[TryOnJob]:
+        """작업 조회 (메모리에 없으면 작업 저장소에서)"""
+        job = self._jobs.get(job_id)
+        if job is None and self.store is not None:
+            job = await asyncio.to_thread(self.store.get_job, job_id)
+        return job
+
+    async def _save(self, job: TryOnJob):
+        if self.store is not None:
+            await asyncio.to_thread(self.store.update_job, job)
+
+    def queue_position(self, job_id: str) -> tuple[Optional[int], int]:
+        """대기 중인 작업 중에서의 (순서, 전체 수)"""
+        queued = list(self._queued)
+        position = queued.index(job_id) if job_id in self._queued else None
+        return position, len(queued)
+
+    async def _worker(self, worker_index: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = self._jobs.get(job_id)
+                if job is not None:
+                    await self._run(job)
+            except Exception as e:
+                logger.error(f"Try-on job worker {worker_index} failed on {job_id}: {e}")
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: TryOnJob):
+        self._queued.pop(job.id, None)
+        job.status = JOB_RUNNING
+        job.started_at = time.time()
+
+        def on_progress(info: ProgressInfo):
+            if self.on_progress:
+                self.on_progress(job.session_id, info)
+
+        if self.store is not None:
+            claimed = await asyncio.to_thread(
+                self.store.claim_job, job, self.owner, time.time() + self.lease
+            )
+            if not claimed:
+                # 다른 워커 프로세스가 이미 실행 중이거나 끝낸 작업
+                self._jobs.pop(job.id, None)
+                return
+
+        # 취소(종료)되면 상태를 running으로 남겨 다음 시작 시 재개
+        try:
+            job_input = job.input
+            if job_input is None:
+                job_input = await asyncio.to_thread(self.store.load_input, job.id)
+
+            result = await self.vton_service.process_tryon_with_both(
+                human_image=job_input.human_image,
+                top_image=job_input.top_image,
+                bottom_image=job_input.bottom_image,
+                dress_image=job_input.dress_image,
+                top_description=job_input.top_description,
+                bottom_description=job_input.bottom_description,
+                dress_description=job_input.dress_description,
+                on_progress=on_progress if self.on_progress else None,
+            )
+            if result.success and result.output_image:
+                if self.result_store.enabled:
+                    job.result_id = await asyncio.to_thread(self.result_store.put, result.output_image)
+                else:
+                    job.output_image = result.output_image
+                job.status = JOB_SUCCEEDED
+                self.succeeded += 1
+            else:
+                job.status = JOB_FAILED
+                job.error = result.error or "Try-On에 실패했습니다."
+                self.failed += 1
+        except Exception as e:
+            logger.error(f"Try-on job {job.id} failed: {e}")
+            job.status = JOB_FAILED
+            job.error = str(e)
+            self.failed += 1
+
+        job.input = None
+        job.finished_at = time.time()
+        await self._save(job)
+
+        if self.on_finish:
+            self.on_finish(job.session_id, job.status == JOB_SUCCEEDED, job.error)
+
+    async def _reap_loop(self):
+        while True:
+            await asyncio.sleep(60)
+            self.reap()
+            if self.store is not None:
+                await asyncio.to_thread(
+                    self.store.delete_finished, FINISHED_STATUSES, time.time() - self.retention
+                )
+
+    def reap(self) -> int:
+        """
+        보관 시간이 지난 완료 작업을 메모리에서 삭제, 삭제된 개수 반환
+        (작업 저장소가 있으면 완료 작업은 조회 시 저장소에서 읽으므로 바로 내림)
+        """
+        now = time.time()
+        retention = 0 if self.store is not None else self.retention
+        expired = [
+            job_id
+            for job_id, job in self._jobs.items()
+            if job.status in FINISHED_STATUSES and now - job.finished_at > retention
+        ]
+        for job_id in expired:
+            del self._jobs[job_id]
+        return len(expired)
+
+    def stats(self, include_store: bool = True) -> dict:
+        """include_store=False면 저장소 조회 없이 메모리 카운터만 반환 (/metrics 수집용)"""
+        running = sum(1 for job in self._jobs.values() if job.status == JOB_RUNNING)
+        return {
+            "workers": self.workers,
+            "queued": len(self._queued),
+            "running": running,
+            "jobs": len(self._jobs),
+            "submitted": self.submitted,
+            "succeeded": self.succeeded,
+            "failed": self.failed,
+            "resumed": self.resumed,
+            "store": self.store.stats() if include_store and self.store is not None else None,
+        }
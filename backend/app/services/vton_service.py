@@ -6,17 +6,48 @@ Replicate API를 사용하여 가상 의류 착용을 수행합니다.
 import asyncio
 import os
 import logging
-import base64
-import tempfile
-from typing import Callable, Optional
+import io
+from pathlib import Path
+import inspect
+import re
+import time
+from collections import OrderedDict
+from typing import TYPE_CHECKING, Awaitable, Callable, Optional
 from dataclasses import dataclass
 
-import replicate
+import httpx
+
+from .disk_cache import DiskLRUCache, content_key
+from .latency_model import LatencyModel
+from .metrics import stage
+
+if TYPE_CHECKING:
+    import replicate
 
 # 로깅 설정
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Try-On 결과 캐시 설정
+TRYON_CACHE_DIR = Path(os.environ.get(
+    "TRYON_CACHE_DIR", Path(__file__).parent.parent.parent / "cache" / "tryon"
+))
+TRYON_CACHE_MAX_MB = float(os.environ.get("TRYON_CACHE_MAX_MB", "1024"))  # 0이면 비활성화
+TRYON_CACHE_TTL_HOURS = float(os.environ.get("TRYON_CACHE_TTL_HOURS", "168"))
+# 상의+하의 2단계 처리 시 하의 적용 중간 결과 캐시 용량 (0이면 비활성화)
+TRYON_INTERMEDIATE_CACHE_MAX_MB = float(os.environ.get("TRYON_INTERMEDIATE_CACHE_MAX_MB", "256"))
+# 배치 Try-On 시 동시에 제출할 최대 예측 수
+TRYON_BATCH_CONCURRENCY = int(os.environ.get("TRYON_BATCH_CONCURRENCY", "4"))
+
+# Replicate API 주소 (테스트용 로컬 대체 서버 지정 가능, 비우면 기본값)
+REPLICATE_BASE_URL = os.environ.get("REPLICATE_BASE_URL") or None
+# 예측 상태 조회 간격(초) / 최대 대기 시간(초, 초과 시 예측 취소)
+REPLICATE_POLL_INTERVAL = float(os.environ.get("REPLICATE_POLL_INTERVAL", "1.0"))
+REPLICATE_PREDICTION_TIMEOUT = float(os.environ.get("REPLICATE_PREDICTION_TIMEOUT", "600"))
+
+# 예측 로그의 tqdm 진행 표시 (예: " 45%|####5     | 18/40 [00:09<00:11, ...]")
+LOG_STEP_PATTERN = re.compile(r"(\d+)/(\d+) \[")
+
 
 @dataclass
 class ProgressInfo:
@@ -27,6 +58,7 @@ class ProgressInfo:
     eta: Optional[float] = None
     queue_position: Optional[int] = None
     queue_size: Optional[int] = None
+    step_progress: Optional[dict] = None  # {"current": n, "total": m} (예측 로그 기준)
 
 
 @dataclass
@@ -37,26 +69,142 @@ class VTONRequest:
     description: str = "A stylish garment"
     category: str = "upper_body"  # upper_body, lower_body, dresses
     seed: int = 42
+    human_image_url: Optional[str] = None  # 미리 업로드된 사람 이미지 URL (있으면 재업로드 생략)
+
+
+@dataclass
+class VTONGarment:
+    """배치 Try-On 의류 항목"""
+    image: bytes
+    category: str = "upper_body"  # upper_body, lower_body, dresses
+    description: str = "A stylish garment"
 
 
 @dataclass
 class VTONResponse:
     """Virtual Try-On 응답"""
     success: bool
-    output_image: Optional[str] = None
-    masked_image: Optional[str] = None
+    output_image: Optional[bytes] = None  # 결과 이미지 원본 바이트 (data URI 변환은 응답 시점에)
+    masked_image: Optional[bytes] = None
     error: Optional[str] = None
 
 
 ProgressCallback = Callable[[ProgressInfo], None]
 
 
+def _image_file(data: bytes, name: str) -> io.BytesIO:
+    """Replicate 업로드용 메모리 파일 객체"""
+    file = io.BytesIO(data)
+    file.name = f"{name}.png"
+    return file
+
+BatchItemCallback = Callable[[int, VTONResponse], Optional[Awaitable[None]]]
+
+
+def parse_log_steps(logs: Optional[str]) -> Optional[tuple[int, int]]:
+    """예측 로그의 마지막 진행 단계 (current, total), 없으면 None"""
+    if not logs:
+        return None
+    matches = LOG_STEP_PATTERN.findall(logs[-2000:])
+    if not matches:
+        return None
+    current, total = (int(value) for value in matches[-1])
+    if total <= 0:
+        return None
+    return min(current, total), total
+
+
+def prediction_output_url(output) -> Optional[str]:
+    """예측 출력(URL 문자열 또는 URL 목록)에서 결과 이미지 URL 추출"""
+    if isinstance(output, (list, tuple)):
+        output = output[-1] if output else None
+    if output is None:
+        return None
+    return str(output)
+
+
 class VTONService:
     """Virtual Try-On 서비스 (Replicate API)"""
 
-    def __init__(self):
+    def __init__(self, prediction_store=None):
         self.model_id = "cuuupid/idm-vton:0513734a452173b8173e907e3a59d19a36266e55b48528559432bd21c7d7e985"
-        self.estimated_processing_time = 60  # seconds
+        # 카테고리별 관측 소요 시간 기반 ETA 모델
+        self.latency = LatencyModel()
+        # 대기(starting) 중인 예측 ID, 제출 순서대로 (queue_position 계산용)
+        self._waiting: OrderedDict[str, None] = OrderedDict()
+        self._replicate_client: Optional["replicate.Client"] = None
+        # 진행 중인 예측 기록 (job_store.JobStore: get/record/clear_prediction)
+        # 있으면 재시작 후 같은 요청은 기존 예측에 다시 연결하고, 요청이 취소되어도 예측을 취소하지 않음
+        self.prediction_store = prediction_store
+        self.result_cache = DiskLRUCache(
+            TRYON_CACHE_DIR / "results",
+            max_bytes=int(TRYON_CACHE_MAX_MB * 1024 * 1024),
+            ttl=TRYON_CACHE_TTL_HOURS * 3600,
+            suffix=".png",
+        )
+        # 2단계 파이프라인 중간 결과 (사람 + 하의)
+        self.intermediate_cache = DiskLRUCache(
+            TRYON_CACHE_DIR / "intermediates",
+            max_bytes=int(TRYON_INTERMEDIATE_CACHE_MAX_MB * 1024 * 1024),
+            ttl=TRYON_CACHE_TTL_HOURS * 3600,
+            suffix=".png",
+        )
+
+        self._http_client: Optional[httpx.AsyncClient] = None
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """결과 다운로드용 공유 HTTP 클라이언트 (keep-alive 커넥션 풀)"""
+        if self._http_client is None or self._http_client.is_closed:
+            self._http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(60.0, connect=10.0),
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20),
+                follow_redirects=True,
+            )
+        return self._http_client
+
+    @property
+    def replicate_client(self) -> "replicate.Client":
+        """Replicate API 클라이언트 (REPLICATE_BASE_URL이 있으면 해당 서버 사용)"""
+        if self._replicate_client is None:
+            replicate_token = os.environ.get("REPLICATE_API_TOKEN")
+            if not replicate_token:
+                raise ValueError("REPLICATE_API_TOKEN 환경 변수가 설정되지 않았습니다.")
+            # 첫 Try-On 요청 시에만 import (분석 전용 프로세스에서는 불러오지 않음)
+            import replicate
+
+            self._replicate_client = replicate.Client(
+                api_token=replicate_token,
+                base_url=REPLICATE_BASE_URL,
+            )
+        return self._replicate_client
+
+    def queue_position(self, prediction_id: str) -> tuple[Optional[int], int]:
+        """이 서버가 제출한 대기 중 예측 중에서의 (순서, 전체 수)"""
+        waiting = list(self._waiting)
+        position = waiting.index(prediction_id) if prediction_id in self._waiting else None
+        return position, len(waiting)
+
+    async def aclose(self):
+        """HTTP 클라이언트 종료"""
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+
+    @staticmethod
+    def intermediate_key(human_image: bytes, bottom_image: bytes, bottom_description: str) -> str:
+        """하의 적용 중간 결과 캐시 키"""
+        return content_key("lower_body-intermediate", human_image, bottom_image, bottom_description)
+
+    @staticmethod
+    def cache_key(request: VTONRequest) -> str:
+        """사람 이미지, 의류 이미지, 카테고리, 설명 기반 캐시 키"""
+        return content_key(
+            request.human_image,
+            request.garment_image,
+            request.category,
+            request.description,
+        )
 
     async def process_tryon(
         self,
@@ -71,7 +219,8 @@ class VTONService:
             message: str,
             eta: Optional[float] = None,
             queue_position: Optional[int] = None,
-            queue_size: Optional[int] = None
+            queue_size: Optional[int] = None,
+            step_progress: Optional[dict] = None
         ):
             if on_progress:
                 on_progress(ProgressInfo(
@@ -80,115 +229,82 @@ class VTONService:
                     message=message,
                     eta=eta,
                     queue_position=queue_position,
-                    queue_size=queue_size
+                    queue_size=queue_size,
+                    step_progress=step_progress
                 ))
 
+        cache_key = None
         try:
-            # Replicate API 토큰 확인
-            replicate_token = os.environ.get("REPLICATE_API_TOKEN")
-            if not replicate_token:
-                raise ValueError("REPLICATE_API_TOKEN 환경 변수가 설정되지 않았습니다.")
+            # 캐시 확인 (같은 사람 + 의류 조합이면 Replicate 호출 생략)
+            cache_key = self.cache_key(request)
+            cached_image = await asyncio.to_thread(self.result_cache.get, cache_key)
+            if cached_image is not None:
+                logger.info(f"Try-on cache hit: {cache_key[:12]}")
+                send_progress("complete", 100, "완료! (캐시된 결과)")
+                return VTONResponse(
+                    success=True,
+                    output_image=cached_image,
+                    masked_image=None
+                )
+
+            client = self.replicate_client
+            version = self.model_id.split(":", 1)[1]
 
             logger.info("Starting Replicate VTON request...")
             send_progress("connecting", 5, "Replicate API에 연결 중...")
 
-            # 임시 파일로 이미지 저장
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as human_file:
-                human_file.write(request.human_image)
-                human_path = human_file.name
-
-            with tempfile.NamedTemporaryFile(suffix=".png", delete=False) as garment_file:
-                garment_file.write(request.garment_image)
-                garment_path = garment_file.name
-
-            send_progress("submitting", 10, "요청 제출 중...")
-
-            # 진행 상황 업데이트를 위한 백그라운드 태스크
-            import time
-            processing_start_time = time.time()
-            progress_task_running = True
-
-            async def update_progress():
-                while progress_task_running:
-                    elapsed = time.time() - processing_start_time
-                    estimated_total = self.estimated_processing_time
-
-                    # 15% ~ 95% 진행률 계산 (easing 적용)
-                    raw_progress = elapsed / estimated_total
-                    eased_progress = 1 - (1 - min(raw_progress, 1)) ** 2
-                    progress_percent = 15 + eased_progress * 80
-
-                    remaining_time = max(0, int(estimated_total - elapsed))
-
-                    send_progress(
-                        "generating",
-                        min(95, progress_percent),
-                        f"AI가 이미지를 생성 중입니다... (~{remaining_time}초 남음)",
-                        eta=remaining_time
+            # 재시작 전에 제출한 같은 요청의 예측이 있으면 재제출하지 않고 다시 연결
+            prediction = await self._attach_prediction(cache_key)
+            attached = prediction is not None
+            if not attached:
+                send_progress("submitting", 10, "요청 제출 중...")
+                with stage("replicate_submit"):
+                    prediction = await asyncio.to_thread(
+                        client.predictions.create,
+                        version=version,
+                        input={
+                            # 메모리 버퍼를 그대로 전달 (임시 파일 없음)
+                            "human_img": request.human_image_url or _image_file(request.human_image, "human"),
+                            "garm_img": _image_file(request.garment_image, "garment"),
+                            "garment_des": request.description,
+                            "category": request.category,
+                        },
                     )
-                    await asyncio.sleep(0.5)
-
-            # 백그라운드에서 진행률 업데이트 시작
-            progress_task = asyncio.create_task(update_progress())
-
-            try:
-                # Replicate API 호출
-                loop = asyncio.get_event_loop()
-
-                def run_replicate():
-                    with open(human_path, "rb") as hf, open(garment_path, "rb") as gf:
-                        output = replicate.run(
-                            self.model_id,
-                            input={
-                                "human_img": hf,
-                                "garm_img": gf,
-                                "garment_des": request.description,
-                                "category": request.category,
-                            }
-                        )
-                        return output
-
-                result = await loop.run_in_executor(None, run_replicate)
-
-            finally:
-                # 진행률 업데이트 중지
-                progress_task_running = False
-                progress_task.cancel()
-                try:
-                    await progress_task
-                except asyncio.CancelledError:
-                    pass
-
-                # 임시 파일 정리
-                try:
-                    os.unlink(human_path)
-                    os.unlink(garment_path)
-                except:
-                    pass
-
-            send_progress("complete", 100, "완료!")
+                logger.info(f"Replicate prediction created: {prediction.id}")
+                if self.prediction_store is not None:
+                    await asyncio.to_thread(self.prediction_store.record_prediction, cache_key, prediction.id)
+
+            # 다시 연결한 예측은 시작 시각을 모르므로 지연 시간 모델에 기록하지 않음
+            with stage("replicate_wait"):
+                prediction = await self._wait_for_prediction(
+                    prediction, request.category, send_progress, observe=not attached
+                )
 
-            logger.info(f"Replicate response: {result}")
+            if prediction.status != "succeeded":
+                raise RuntimeError(prediction.error or f"Replicate 예측이 {prediction.status} 상태로 종료되었습니다.")
 
             # 결과 처리
-            if result:
-                # Replicate는 FileOutput 객체를 반환
-                output_url = str(result) if hasattr(result, '__str__') else result.url if hasattr(result, 'url') else None
-
-                if output_url:
-                    # URL에서 이미지 다운로드하여 base64로 변환
-                    import requests
-                    response = requests.get(output_url)
-                    if response.status_code == 200:
-                        image_data = response.content
-                        output_image_base64 = f"data:image/png;base64,{base64.b64encode(image_data).decode('utf-8')}"
+            output_url = prediction_output_url(prediction.output)
+            if output_url:
+                # URL에서 이미지 다운로드 (keep-alive 커넥션 풀 재사용)
+                with stage("replicate_download"):
+                    response = await self.http_client.get(output_url)
+                if response.status_code == 200:
+                    image_data = response.content
+                    await asyncio.to_thread(self.result_cache.put, cache_key, image_data)
+                    await self._clear_prediction(cache_key)
+                    send_progress("complete", 100, "완료!")
 
-                        return VTONResponse(
-                            success=True,
-                            output_image=output_image_base64,
-                            masked_image=None
-                        )
+                    return VTONResponse(
+                        success=True,
+                        output_image=image_data,
+                        masked_image=None
+                    )
 
+                logger.error(f"Replicate output download failed: HTTP {response.status_code}")
+
+            # 결과를 받지 못한 예측은 다시 연결하지 않음 (재시도 시 새로 제출)
+            await self._clear_prediction(cache_key)
             return VTONResponse(
                 success=False,
                 error="Replicate API에서 유효한 응답을 받지 못했습니다."
@@ -196,12 +312,198 @@ class VTONService:
 
         except Exception as e:
             logger.error(f"Error processing virtual try-on: {e}")
+            # 실패로 끝난 요청의 예측 기록 삭제 (취소/종료로 중단된 경우에는 재시작 후 다시 연결하도록 유지)
+            if cache_key is not None:
+                try:
+                    await self._clear_prediction(cache_key)
+                except Exception as clear_error:
+                    logger.warning(f"Failed to clear Replicate prediction record: {clear_error}")
             send_progress("error", 0, str(e))
             return VTONResponse(
                 success=False,
                 error=str(e)
             )
 
+    async def _attach_prediction(self, cache_key: str):
+        """기록된 진행 중/완료 예측 조회 (없거나 실패/취소된 예측이면 None)"""
+        if self.prediction_store is None:
+            return None
+        prediction_id = await asyncio.to_thread(self.prediction_store.get_prediction, cache_key)
+        if not prediction_id:
+            return None
+
+        try:
+            prediction = await asyncio.to_thread(self.replicate_client.predictions.get, prediction_id)
+        except Exception as e:
+            logger.warning(f"Failed to re-attach to Replicate prediction {prediction_id}: {e}")
+            return None
+        if prediction.status in ("failed", "canceled"):
+            return None
+
+        logger.info(f"Re-attached to Replicate prediction {prediction_id} ({prediction.status})")
+        return prediction
+
+    async def _clear_prediction(self, cache_key: str):
+        if self.prediction_store is not None:
+            await asyncio.to_thread(self.prediction_store.clear_prediction, cache_key)
+
+    async def _wait_for_prediction(self, prediction, category: str, send_progress, observe: bool = True):
+        """
+        예측이 끝날 때까지 상태(starting/processing)와 로그를 조회하며 진행 상황 전송
+        - starting: 대기 순서와 지연 시간 모델 기반 ETA
+        - processing: 로그의 진행 단계(없으면 예상 시간 대비 경과)로 진행률 계산
+        대기/생성 소요 시간은 observe=True일 때 지연 시간 모델에 기록합니다.
+        """
+        created_at = time.monotonic()
+        started_at: Optional[float] = None
+        self._waiting[prediction.id] = None
+
+        try:
+            while prediction.status not in ("succeeded", "failed", "canceled"):
+                now = time.monotonic()
+                if now - created_at > REPLICATE_PREDICTION_TIMEOUT:
+                    await asyncio.to_thread(prediction.cancel)
+                    raise TimeoutError(f"Replicate 예측이 {int(REPLICATE_PREDICTION_TIMEOUT)}초 안에 끝나지 않았습니다.")
+
+                if prediction.status == "starting":
+                    position, size = self.queue_position(prediction.id)
+                    send_progress(
+                        "pending",
+                        12,
+                        "모델을 준비하는 중입니다...",
+                        eta=self.latency.eta(category, "queue", now - created_at),
+                        queue_position=position,
+                        queue_size=size,
+                    )
+                else:
+                    if started_at is None:
+                        started_at = now
+                        self._waiting.pop(prediction.id, None)
+                        if observe:
+                            self.latency.observe(category, "queue", started_at - created_at)
+
+                    elapsed = now - started_at
+                    remaining = self.latency.eta(category, "processing", elapsed)
+                    steps = parse_log_steps(prediction.logs)
+                    if steps:
+                        fraction = steps[0] / steps[1]
+                    else:
+                        # 관측값이 0초(캐시 응답 등)여도 0으로 나누지 않도록
+                        expected = max(self.latency.expected(category, "processing"), 1e-3)
+                        fraction = 1 - (1 - min(elapsed / expected, 1)) ** 2
+                    send_progress(
+                        "generating",
+                        min(95, 15 + fraction * 80),
+                        f"AI가 이미지를 생성 중입니다... (~{int(remaining)}초 남음)",
+                        eta=remaining,
+                        step_progress={"current": steps[0], "total": steps[1]} if steps else None,
+                    )
+
+                await asyncio.sleep(REPLICATE_POLL_INTERVAL)
+                await asyncio.to_thread(prediction.reload)
+
+            if prediction.status == "succeeded" and observe:
+                finished_at = time.monotonic()
+                if started_at is None:
+                    # 조회 사이에 대기와 생성이 모두 끝난 경우 전체를 생성 시간으로 기록
+                    started_at = created_at
+                self.latency.observe(category, "processing", finished_at - started_at)
+            return prediction
+
+        except asyncio.CancelledError:
+            # 요청이 취소되면 Replicate 예측도 취소 (결과를 받을 곳이 없음)
+            # 예측 기록 저장소가 있으면 재시작 후 다시 연결할 수 있도록 그대로 둠
+            if self.prediction_store is not None:
+                raise
+            try:
+                await asyncio.shield(asyncio.to_thread(prediction.cancel))
+            except Exception:
+                pass
+            raise
+        finally:
+            self._waiting.pop(prediction.id, None)
+
+    async def upload_image(self, image: bytes) -> Optional[str]:
+        """이미지를 Replicate에 한 번 업로드하고 URL 반환 (실패 시 None)"""
+        def run_upload():
+            with stage("replicate_upload"):
+                file = self.replicate_client.files.create(_image_file(image, "human"))
+            return file.urls["get"]
+
+        try:
+            return await asyncio.to_thread(run_upload)
+        except Exception as e:
+            logger.warning(f"Replicate file upload failed, falling back to per-request upload: {e}")
+            return None
+
+    async def process_tryon_batch(
+        self,
+        human_image: bytes,
+        garments: list[VTONGarment],
+        on_progress: Optional[ProgressCallback] = None,
+        on_item: Optional[BatchItemCallback] = None,
+        concurrency: int = TRYON_BATCH_CONCURRENCY,
+    ) -> list[VTONResponse]:
+        """
+        한 사람 이미지에 여러 의류를 동시에 적용하는 배치 Virtual Try-On
+        - 사람 이미지는 한 번만 업로드하여 모든 예측에서 재사용
+        - 최대 concurrency개의 예측을 동시에 제출
+        - 각 항목이 끝날 때마다 on_item(index, result) 호출
+        - 결과는 입력 순서대로 반환
+        """
+        total = len(garments)
+        completed = 0
+
+        def send_progress(status: str, progress: float, message: str):
+            if on_progress:
+                on_progress(ProgressInfo(status=status, progress=progress, message=message))
+
+        tryon_requests = [
+            VTONRequest(
+                human_image=human_image,
+                garment_image=garment.image,
+                description=garment.description,
+                category=garment.category,
+            )
+            for garment in garments
+        ]
+
+        # 캐시에 없는 항목이 있을 때만 사람 이미지 업로드
+        cache_keys = [self.cache_key(request) for request in tryon_requests]
+        cached = await asyncio.to_thread(lambda: [self.result_cache.contains(key) for key in cache_keys])
+        if not all(cached):
+            send_progress("submitting", 5, "사람 이미지 업로드 중...")
+            human_image_url = await self.upload_image(human_image)
+            for request in tryon_requests:
+                request.human_image_url = human_image_url
+
+        send_progress("generating", 10, f"{total}개의 의류를 적용 중...")
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        async def run_item(index: int, request: VTONRequest) -> VTONResponse:
+            nonlocal completed
+            async with semaphore:
+                result = await self.process_tryon(request)
+
+            completed += 1
+            if on_item:
+                callback_result = on_item(index, result)
+                if inspect.isawaitable(callback_result):
+                    await callback_result
+            send_progress(
+                "generating",
+                10 + 90 * completed / total,
+                f"{completed}/{total}개 완료",
+            )
+            return result
+
+        results = await asyncio.gather(
+            *(run_item(index, request) for index, request in enumerate(tryon_requests))
+        )
+
+        send_progress("complete", 100, "완료!")
+        return list(results)
+
     async def process_tryon_with_both(
         self,
         human_image: bytes,
@@ -281,29 +583,35 @@ class VTONService:
 
             # 둘 다 있는 경우: 하의 먼저 -> 상의
             if top_image and bottom_image:
-                # 1단계: 하의 적용
-                send_progress("generating", 10, "1/2 단계: 하의를 적용 중...")
-                bottom_result = await self.process_tryon(
-                    VTONRequest(
-                        human_image=current_human_image,
-                        garment_image=bottom_image,
-                        description=bottom_description,
-                        category="lower_body"
+                # 같은 사람 + 하의 조합의 중간 결과가 있으면 1단계 생략
+                intermediate_key = self.intermediate_key(human_image, bottom_image, bottom_description)
+                intermediate_image = await asyncio.to_thread(self.intermediate_cache.get, intermediate_key)
+
+                if intermediate_image is not None:
+                    logger.info(f"Reusing lower-body intermediate: {intermediate_key[:12]}")
+                    send_progress("generating", 50, "1/2 단계: 이전 하의 적용 결과를 재사용합니다...")
+                    current_human_image = intermediate_image
+                else:
+                    # 1단계: 하의 적용
+                    send_progress("generating", 10, "1/2 단계: 하의를 적용 중...")
+                    bottom_result = await self.process_tryon(
+                        VTONRequest(
+                            human_image=current_human_image,
+                            garment_image=bottom_image,
+                            description=bottom_description,
+                            category="lower_body"
+                        )
                     )
-                )
 
-                if not bottom_result.success or not bottom_result.output_image:
-                    return VTONResponse(
-                        success=False,
-                        error=f"하의 적용 실패: {bottom_result.error}"
-                    )
+                    if not bottom_result.success or not bottom_result.output_image:
+                        return VTONResponse(
+                            success=False,
+                            error=f"하의 적용 실패: {bottom_result.error}"
+                        )
 
-                # 하의 적용 결과를 다음 단계의 입력으로 사용
-                # base64 디코딩
-                bottom_image_data = bottom_result.output_image
-                if bottom_image_data.startswith("data:"):
-                    bottom_image_data = bottom_image_data.split(",")[1]
-                current_human_image = base64.b64decode(bottom_image_data)
+                    # 하의 적용 결과(바이트)를 다음 단계의 입력으로 사용
+                    current_human_image = bottom_result.output_image
+                    await asyncio.to_thread(self.intermediate_cache.put, intermediate_key, current_human_image)
 
                 # 2단계: 상의 적용
                 send_progress("generating", 55, "2/2 단계: 상의를 적용 중...")
@@ -0,0 +1,3 @@
+"""
+Analysis benchmarks (python -m benchmarks.analysis_bench)
+"""
@@ -0,0 +1,360 @@
+"""
+분석 경로 단계별 마이크로 벤치마크
+
+    cd backend
+    python -m benchmarks.analysis_bench                      # 측정 + 기준값과 비교
+    python -m benchmarks.analysis_bench --save-baseline      # 현재 결과를 기준값으로 저장
+    python -m benchmarks.analysis_bench --parity             # 축소 검출(FACE_DETECTION_MAX_SIDE) 정확도 비교 포함
+    python -m benchmarks.analysis_bench --no-baseline-ok     # 기준값 없이 측정만 (로컬 확인용)
+
+fixtures/의 얼굴 사진을 여러 해상도(긴 변 기준)로 바꿔 각 단계를 반복 측정합니다.
+저장소에는 합성 fixture(benchmarks.synthetic)가 포함되어 있어 사진 없이도 CPU 단계를 측정할 수 있습니다.
+dlib이 얼굴을 찾지 못한 이미지(또는 랜드마크 모델이 없을 때)는 함께 저장된 랜드마크 JSON이 있으면
+그 랜드마크와 랜드마크를 감싸는 얼굴 영역으로 landmarks를 제외한 얼굴 단계를 측정합니다.
+- decode: JPEG 업로드 디코딩 (decode_bgr, INGEST_MAX_SIDE draft 축소 + EXIF 방향)
+- decode_full: 원본 해상도 디코딩 (decode_bgr, max_side=0)
+- landmarks: detect_landmarks_dlib (HOG 검출 + 68 랜드마크, 검출 캐시 비활성화)
+- region_means: 피부 / 눈 랜드마크 다각형 평균 Lab/HSV (region_mean_lab_hsv)
+- mean_lab_hsv: 머리카락 ROI 평균 Lab/HSV
+- predict_proba: RandomForest 분류 (1개 / 32개 배치)
+- face_shape: 얼굴형 분류기 호출 (FACE_SHAPE_BACKEND)
+- encode_labeled: 시각화 이미지 렌더링(cv2.imencode) + base64
+
+결과는 JSON으로 출력(--output)하며, 기준값(--baseline)보다 중앙값이 --threshold 비율 이상
+(그리고 --min-delta-ms 이상) 느려진 단계가 있으면 종료 코드 1을 반환합니다.
+기준값 파일이 없으면 --save-baseline 또는 --no-baseline-ok 없이는 측정하지 않고 실패합니다.
+"""
+
+import argparse
+import base64
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Optional
+
+import cv2
+import numpy as np
+
+from app.services import face_detection, imaging
+from app.services.face_detection import FaceDetection, detect_face, detection_cache
+from app.services.face_shape_service import FACE_SHAPE_BACKEND, classify_face_crops, locate_face_crop
+from app.services.imaging import decode_bgr
+from app.services.model_registry import ModelUnavailableError, model_registry
+from app.services.overlay import render_overlay
+from app.services.personal_color_service import (
+    classify_color_features,
+    detect_landmarks_dlib,
+    extract_color_features,
+    mean_lab_hsv,
+    region_mean_lab_hsv,
+)
+
+from .synthetic import load_landmarks
+
+BENCH_DIR = Path(__file__).parent
+FIXTURES_DIR = BENCH_DIR / "fixtures"
+BASELINE_PATH = BENCH_DIR / "baseline.json"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+# personal_color_service와 같은 랜드마크 영역
+SKIN_REGIONS = [[1, 2, 3, 4, 31, 48, 49], [12, 13, 14, 15, 35, 54, 53], [6, 7, 8, 9, 10, 57]]
+EYE_REGIONS = [list(range(36, 42)), list(range(42, 48))]
+
+
+Fixture = tuple[str, np.ndarray, Optional[np.ndarray]]
+
+
+def load_fixtures(fixtures_dir: Path) -> list[Fixture]:
+    """(파일 이름, BGR, 저장된 랜드마크 또는 None) 목록"""
+    paths = sorted(p for p in fixtures_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+    fixtures = []
+    for path in paths:
+        fixtures.append((path.name, decode_bgr(path.read_bytes(), max_side=0), load_landmarks(path)))
+    return fixtures
+
+
+def resize_long_side(bgr: np.ndarray, long_side: int) -> np.ndarray:
+    h, w = bgr.shape[:2]
+    scale = long_side / max(h, w)
+    interpolation = cv2.INTER_AREA if scale < 1 else cv2.INTER_CUBIC
+    return cv2.resize(bgr, (max(1, round(w * scale)), max(1, round(h * scale))), interpolation=interpolation)
+
+
+def measure(fn: Callable[[], object], repeat: int) -> list[float]:
+    """워밍업 1회 후 repeat회 실행 시간 (ms)"""
+    fn()
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - started) * 1000)
+    return samples
+
+
+def summarize(samples: list[float]) -> dict:
+    ordered = sorted(samples)
+    return {
+        "median_ms": round(statistics.median(ordered), 3),
+        "p90_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.9))], 3),
+        "min_ms": round(ordered[0], 3),
+        "samples": len(ordered),
+    }
+
+
+# ======================
+#        측정
+# ======================
+
+def face_from_landmarks(landmarks: np.ndarray) -> FaceDetection:
+    """저장된 랜드마크를 감싸는 얼굴 영역 (검출되지 않는 합성 fixture용)"""
+    left, top = (int(v) for v in landmarks.min(axis=0))
+    right, bottom = (int(v) for v in landmarks.max(axis=0))
+    return FaceDetection(rect=(left, top, right, bottom), landmarks=landmarks)
+
+
+def bench_fixture(
+    bgr: np.ndarray, repeat: int, stored_landmarks: Optional[np.ndarray] = None
+) -> dict[str, list[float]]:
+    """
+    한 이미지(한 해상도)의 단계별 측정값 (얼굴이 없으면 얼굴이 필요한 단계는 생략)
+    stored_landmarks가 있으면 얼굴이 검출되지 않아도 그 랜드마크로 landmarks 외의 얼굴 단계를 측정합니다.
+    """
+    samples: dict[str, list[float]] = {}
+
+    jpeg = cv2.imencode(".jpg", bgr, [cv2.IMWRITE_JPEG_QUALITY, 92])[1].tobytes()
+
+    samples["decode"] = measure(lambda: decode_bgr(jpeg), repeat)
+    samples["decode_full"] = measure(lambda: decode_bgr(jpeg, max_side=0), repeat)
+
+    h, w = bgr.shape[:2]
+    hair_roi = bgr[0:max(1, int(h * 0.1)), int(w * 0.3):max(int(w * 0.3) + 1, int(w * 0.7))]
+    samples["mean_lab_hsv"] = measure(lambda: mean_lab_hsv(hair_roi), repeat)
+
+    # 얼굴이 없거나(ValueError) 랜드마크 모델이 없으면(RuntimeError) 저장된 랜드마크 사용
+    face = None
+    try:
+        landmarks = detect_landmarks_dlib(bgr)
+        samples["landmarks"] = measure(lambda: detect_landmarks_dlib(bgr), repeat)
+    except (ValueError, RuntimeError):
+        if stored_landmarks is None:
+            return samples
+        landmarks = stored_landmarks
+        face = face_from_landmarks(stored_landmarks)
+
+    samples["region_means"] = measure(
+        lambda: region_mean_lab_hsv(bgr, landmarks, [SKIN_REGIONS, EYE_REGIONS]), repeat
+    )
+
+    # 모델 파일이 없는 단계는 생략 (main에서 경고 출력)
+    try:
+        features = extract_color_features(bgr, landmarks=landmarks)
+        batch = [features.vector] * 32
+        samples["predict_proba"] = measure(lambda: classify_color_features([features.vector]), repeat)
+        samples["predict_proba_x32"] = measure(lambda: classify_color_features(batch), repeat)
+        samples["encode_labeled"] = measure(
+            lambda: base64.b64encode(render_overlay(bgr, features.overlay)), repeat
+        )
+    except ModelUnavailableError:
+        pass
+
+    try:
+        crop = locate_face_crop(bgr, face=face)
+        samples["face_shape"] = measure(lambda: classify_face_crops([crop.rgb]), repeat)
+    except ModelUnavailableError:
+        pass
+    return samples
+
+
+def run_benchmarks(fixtures: list[Fixture], resolutions: list[int], repeat: int) -> dict:
+    """단계@해상도별 요약 (fixture별 측정값을 합쳐서 계산)"""
+    merged: dict[str, list[float]] = {}
+    skipped = []
+    for name, original, stored_landmarks in fixtures:
+        for long_side in resolutions:
+            bgr = resize_long_side(original, long_side)
+            scaled_landmarks = None
+            if stored_landmarks is not None:
+                scale = bgr.shape[1] / original.shape[1]
+                scaled_landmarks = np.round(stored_landmarks * scale).astype(np.int32)
+            samples = bench_fixture(bgr, repeat, scaled_landmarks)
+            if "landmarks" not in samples:
+                skipped.append(f"{name}@{long_side}")
+            for stage, values in samples.items():
+                merged.setdefault(f"{stage}@{long_side}", []).extend(values)
+
+    if skipped:
+        print(
+            f"No face detected, landmarks stage skipped (stored landmarks used if present): {', '.join(skipped)}",
+            file=sys.stderr,
+        )
+    return {key: summarize(values) for key, values in sorted(merged.items())}
+
+
+def run_parity(fixtures: list[Fixture], repeat: int) -> dict:
+    """
+    축소 검출(FACE_DETECTION_MAX_SIDE)과 원본 해상도 검출 비교
+    랜드마크 좌표 차이, 계절 / 얼굴형 일치 여부, 검출 속도 향상
+    """
+    configured = face_detection.DETECTION_MAX_SIDE
+    items = []
+    for name, bgr, _ in fixtures:
+        full = detect_face(bgr, max_side=0)
+        downscaled = detect_face(bgr, max_side=configured)
+        if full is None or downscaled is None or full.landmarks is None or downscaled.landmarks is None:
+            items.append({"fixture": name, "detected": [full is not None, downscaled is not None]})
+            continue
+
+        distance = np.linalg.norm(full.landmarks.astype(float) - downscaled.landmarks.astype(float), axis=1)
+        full_ms = statistics.median(measure(lambda: detect_face(bgr, max_side=0), repeat))
+        downscaled_ms = statistics.median(measure(lambda: detect_face(bgr, max_side=configured), repeat))
+
+        # 전체 분석 경로는 호출 시점의 DETECTION_MAX_SIDE를 사용
+        outcomes = {}
+        for label, max_side in (("full", 0), ("downscaled", configured)):
+            face_detection.DETECTION_MAX_SIDE = max_side
+            try:
+                features = extract_color_features(bgr)
+                [(season, _)] = classify_color_features([features.vector])
+                try:
+                    shape = classify_face_crops([locate_face_crop(bgr).rgb])[0][0]["label"]
+                except ModelUnavailableError:
+                    shape = None
+                outcomes[label] = (season, shape)
+            finally:
+                face_detection.DETECTION_MAX_SIDE = configured
+
+        items.append({
+            "fixture": name,
+            "size": [bgr.shape[1], bgr.shape[0]],
+            "landmark_mean_px": round(float(distance.mean()), 3),
+            "landmark_max_px": round(float(distance.max()), 3),
+            "season_match": outcomes["full"][0] == outcomes["downscaled"][0],
+            # 얼굴형 모델이 없으면 None
+            "shape_match": (
+                outcomes["full"][1] == outcomes["downscaled"][1] if outcomes["full"][1] is not None else None
+            ),
+            "full_ms": round(full_ms, 2),
+            "downscaled_ms": round(downscaled_ms, 2),
+            "speedup": round(full_ms / downscaled_ms, 2) if downscaled_ms > 0 else None,
+        })
+
+    compared = [item for item in items if "speedup" in item]
+    shapes = [item for item in compared if item["shape_match"] is not None]
+    return {
+        "max_side": configured,
+        "fixtures": items,
+        "season_agreement": (
+            sum(item["season_match"] for item in compared) / len(compared) if compared else None
+        ),
+        "shape_agreement": (
+            sum(item["shape_match"] for item in shapes) / len(shapes) if shapes else None
+        ),
+        "median_speedup": statistics.median(item["speedup"] for item in compared) if compared else None,
+    }
+
+
+# ======================
+#      기준값 비교
+# ======================
+
+def compare(results: dict, baseline: dict, threshold: float, min_delta_ms: float) -> list[str]:
+    """기준값보다 느려진 단계 목록"""
+    regressions = []
+    for key, current in results.items():
+        previous = baseline.get(key)
+        if previous is None:
+            continue
+        delta = current["median_ms"] - previous["median_ms"]
+        if delta > min_delta_ms and current["median_ms"] > previous["median_ms"] * (1 + threshold):
+            regressions.append(
+                f"{key}: {previous['median_ms']:.2f} ms -> {current['median_ms']:.2f} ms "
+                f"(+{delta / previous['median_ms']:.0%})"
+            )
+    return regressions
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "opencv_threads": cv2.getNumThreads(),
+        "face_shape_backend": FACE_SHAPE_BACKEND,
+        "face_detection_max_side": face_detection.DETECTION_MAX_SIDE,
+        "ingest_max_side": imaging.INGEST_MAX_SIDE,
+    }
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m benchmarks.analysis_bench",
+        description="분석 경로 단계별 마이크로 벤치마크",
+    )
+    parser.add_argument("--fixtures", type=Path, default=FIXTURES_DIR, help="얼굴 사진 폴더")
+    parser.add_argument("--resolutions", default="640,1280,2048,4032", help="긴 변 해상도 목록 (쉼표로 구분)")
+    parser.add_argument("--repeat", type=int, default=5, help="단계별 반복 횟수 (워밍업 제외)")
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로 (기본: 표준 출력)")
+    parser.add_argument("--baseline", type=Path, default=BASELINE_PATH, help="기준값 JSON 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="현재 결과를 기준값으로 저장")
+    parser.add_argument("--no-baseline-ok", action="store_true", help="기준값 파일이 없어도 실패하지 않음")
+    parser.add_argument("--threshold", type=float, default=0.15, help="허용 지연 증가 비율 (0.15 = 15%%)")
+    parser.add_argument("--min-delta-ms", type=float, default=0.5, help="이보다 작은 증가는 무시 (ms)")
+    parser.add_argument("--parity", action="store_true", help="축소 검출 / 원본 해상도 검출 비교 포함")
+    args = parser.parse_args(argv)
+
+    fixtures = load_fixtures(args.fixtures) if args.fixtures.exists() else []
+    if not fixtures:
+        parser.error(f"{args.fixtures}에 얼굴 사진이 없습니다 (fixtures/README.md 참고).")
+    if not args.save_baseline and not args.no_baseline_ok and not args.baseline.exists():
+        parser.error(
+            f"기준값 {args.baseline}이 없습니다. --save-baseline으로 저장하거나 --no-baseline-ok로 측정만 하세요."
+        )
+
+    # 모든 모델을 미리 로드하고 검출 캐시는 끔 (반복 측정이 캐시 hit가 되지 않도록)
+    # 모델 파일이 없으면 해당 단계만 생략하고 decode / 색상 평균 등 CPU 단계는 그대로 측정
+    model_registry.load_eager()
+    for name in ("face_landmarks", "personal_color", "face_shape"):
+        try:
+            model_registry.get(name)
+        except ModelUnavailableError as e:
+            print(f"Model unavailable, its stages are skipped: {e}", file=sys.stderr)
+    detection_cache.max_entries = 0
+    detection_cache.shared = None
+
+    resolutions = [int(value) for value in args.resolutions.split(",") if value.strip()]
+    report = {
+        "environment": environment(),
+        "results": run_benchmarks(fixtures, resolutions, max(1, args.repeat)),
+    }
+    if args.parity:
+        report["parity"] = run_parity(fixtures, max(1, args.repeat))
+
+    regressions = []
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(report["results"], indent=2) + "\n")
+        print(f"Baseline saved to {args.baseline}", file=sys.stderr)
+    elif args.baseline.exists():
+        regressions = compare(
+            report["results"], json.loads(args.baseline.read_text()), args.threshold, args.min_delta_ms
+        )
+        report["regressions"] = regressions
+
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    if regressions:
+        print("Regressions:\n  " + "\n  ".join(regressions), file=sys.stderr)
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+"""
+합성 벤치마크 fixture 생성
+
+    cd backend
+    python -m benchmarks.synthetic               # fixtures/synthetic_*.jpg + 랜드마크 JSON 다시 생성
+
+배포 권한 문제 없이 저장소에 포함할 수 있는 얼굴형 합성 이미지입니다.
+실제 얼굴이 아니므로 dlib 검출은 되지 않고, 함께 저장한 68점 랜드마크로 얼굴 영역 단계(region_means)를 측정합니다.
+같은 시드에서 항상 같은 이미지를 만듭니다.
+"""
+
+import argparse
+import json
+from pathlib import Path
+from typing import Optional
+
+import cv2
+import numpy as np
+
+FIXTURES_DIR = Path(__file__).parent / "fixtures"
+
+# (너비, 높이) - 세로 / 가로 사진 (벤치마크가 --resolutions 크기로 변환하므로 저장소 용량을 위해 작게 저장)
+FIXTURE_SIZES = [(768, 1024), (1024, 768), (600, 800)]
+FIXTURE_SEED = 22
+
+
+def synthetic_landmarks(rng: np.random.Generator, width: int, height: int) -> np.ndarray:
+    """dlib 68점 배치를 흉내 낸 얼굴 랜드마크 (크기 / 위치 / 점별 흔들림 무작위)"""
+    cx = width * rng.uniform(0.4, 0.6)
+    cy = height * rng.uniform(0.45, 0.55)
+    a = min(width, height) * rng.uniform(0.2, 0.3)
+    b = a * rng.uniform(1.1, 1.4)
+    points = np.zeros((68, 2))
+
+    # 턱선 0-16: 왼쪽 귀 -> 턱 끝(8) -> 오른쪽 귀
+    t = np.pi - np.arange(17) * np.pi / 16
+    points[0:17] = np.stack([cx + a * np.cos(t), cy + b * np.sin(t)], axis=1)
+    # 눈썹 17-26
+    points[17:22] = np.stack([np.linspace(cx - 0.7 * a, cx - 0.15 * a, 5), np.full(5, cy - 0.45 * b)], axis=1)
+    points[22:27] = np.stack([np.linspace(cx + 0.15 * a, cx + 0.7 * a, 5), np.full(5, cy - 0.45 * b)], axis=1)
+    # 콧대 27-30, 콧볼 31-35
+    points[27:31] = np.stack([np.full(4, cx), np.linspace(cy - 0.3 * b, cy + 0.2 * b, 4)], axis=1)
+    points[31:36] = np.stack([np.linspace(cx - 0.2 * a, cx + 0.2 * a, 5), np.full(5, cy + 0.3 * b)], axis=1)
+    # 눈 36-41 / 42-47: 바깥쪽 끝 -> 위 -> 안쪽 끝 -> 아래
+    eye = np.array([[-1, 0], [-0.4, -1], [0.4, -1], [1, 0], [0.4, 1], [-0.4, 1]]) * [0.16 * a, 0.06 * b]
+    points[36:42] = eye + [cx - 0.4 * a, cy - 0.25 * b]
+    points[42:48] = eye + [cx + 0.4 * a, cy - 0.25 * b]
+    # 입 바깥 48-59 (48: 왼쪽 끝, 54: 오른쪽 끝, 57: 아래 가운데), 안쪽 60-67
+    t = np.pi - np.arange(12) * np.pi / 6
+    points[48:60] = np.stack([cx + 0.35 * a * np.cos(t), cy + 0.6 * b - 0.12 * b * np.sin(t)], axis=1)
+    t = np.pi - np.arange(8) * np.pi / 4
+    points[60:68] = np.stack([cx + 0.25 * a * np.cos(t), cy + 0.6 * b - 0.05 * b * np.sin(t)], axis=1)
+
+    points += rng.normal(0, a * 0.02, points.shape)
+    return np.clip(points, 0, [width - 1, height - 1]).astype(np.int32)
+
+
+def synthetic_face(rng: np.random.Generator, width: int, height: int) -> np.ndarray:
+    """피부색 근처의 부드러운 색 변화 + 노이즈 (검은 픽셀 없음)"""
+    base = rng.uniform([60, 90, 140], [170, 190, 240])
+    low = rng.normal(0, 25, (height // 16 + 1, width // 16 + 1, 3)).astype(np.float32)
+    field = cv2.resize(low, (width, height), interpolation=cv2.INTER_CUBIC)
+    noise = rng.normal(0, 6, (height, width, 3))
+    return np.clip(base + field + noise, 1, 255).astype(np.uint8)
+
+
+def landmarks_path(image_path: Path) -> Path:
+    """fixture 이미지와 함께 저장한 랜드마크 JSON 경로"""
+    return image_path.with_suffix(".landmarks.json")
+
+
+def load_landmarks(image_path: Path) -> Optional[np.ndarray]:
+    path = landmarks_path(image_path)
+    if not path.exists():
+        return None
+    return np.array(json.loads(path.read_text()), dtype=np.int32)
+
+
+def write_fixtures(directory: Path = FIXTURES_DIR, seed: int = FIXTURE_SEED) -> list[Path]:
+    """합성 fixture 이미지(JPEG)와 랜드마크 JSON 저장"""
+    rng = np.random.default_rng(seed)
+    paths = []
+    for index, (width, height) in enumerate(FIXTURE_SIZES, start=1):
+        bgr = synthetic_face(rng, width, height)
+        landmarks = synthetic_landmarks(rng, width, height)
+
+        path = directory / f"synthetic_{index:02d}.jpg"
+        cv2.imwrite(str(path), bgr, [cv2.IMWRITE_JPEG_QUALITY, 90])
+        landmarks_path(path).write_text(json.dumps(landmarks.tolist()) + "\n")
+        paths.append(path)
+    return paths
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description="합성 벤치마크 fixture 생성")
+    parser.add_argument("--output", type=Path, default=FIXTURES_DIR, help="저장 폴더")
+    parser.add_argument("--seed", type=int, default=FIXTURE_SEED, help="난수 시드")
+    args = parser.parse_args(argv)
+
+    args.output.mkdir(parents=True, exist_ok=True)
+    for path in write_fixtures(args.output, args.seed):
+        print(path)
+
+
+if __name__ == "__main__":
+    main()
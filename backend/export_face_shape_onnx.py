@@ -0,0 +1,223 @@
+"""
+얼굴형 분류 모델 ONNX 내보내기 / 정확도 비교 스크립트
+
+    # ONNX 그래프 + int8 동적 양자화 모델 생성 (models/face_shape)
+    python export_face_shape_onnx.py --int8
+
+    # 얼굴 크롭 이미지 폴더(생략하면 합성 얼굴 크롭)로 PyTorch 경로와 정확도 / 지연 시간 비교
+    python export_face_shape_onnx.py --check fixtures/faces
+    python export_face_shape_onnx.py --check
+
+내보내기에는 torch, transformers, onnx가, 비교와 양자화에는 onnxruntime이 필요합니다.
+비교 시 top-1 일치율이 --min-agreement보다 낮거나 확률 차이가 백엔드별 허용치(MAX_SCORE_DIFF)를 넘으면
+종료 코드 1을 반환합니다. 같은 비교를 tests/test_face_shape_onnx.py가 자동으로 실행합니다.
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import Optional
+
+import numpy as np
+from PIL import Image, ImageDraw, ImageFilter
+
+from app.services.face_shape_onnx import FACE_SHAPE_ONNX_DIR, ONNX_MODEL_FILES, OnnxFaceShapeClassifier
+from app.services.face_shape_service import FACE_SHAPE_MODEL, load_torch_classifier
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+
+# PyTorch 대비 허용 확률 차이 (fp32 그래프는 수치 오차 수준, int8은 양자화 오차 포함)
+MAX_SCORE_DIFF = {
+    "onnx": 1e-3,
+    "onnx-int8": 0.05,
+}
+
+
+def export(output_dir: Path, opset: int, int8: bool):
+    """PyTorch 모델을 ONNX로 내보내고 설정 파일 저장"""
+    import torch
+    from transformers import AutoImageProcessor, AutoModelForImageClassification
+
+    output_dir.mkdir(parents=True, exist_ok=True)
+    model = AutoModelForImageClassification.from_pretrained(FACE_SHAPE_MODEL).eval()
+    processor = AutoImageProcessor.from_pretrained(FACE_SHAPE_MODEL)
+    model.config.save_pretrained(output_dir)
+    processor.save_pretrained(output_dir)
+
+    size = processor.size
+    height = size.get("height", size.get("shortest_edge", 224))
+    width = size.get("width", size.get("shortest_edge", 224))
+    dummy = torch.zeros(1, 3, height, width)
+
+    model_path = output_dir / ONNX_MODEL_FILES["onnx"]
+    print(f"Exporting {FACE_SHAPE_MODEL} to {model_path}...")
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (dummy,),
+            str(model_path),
+            input_names=["pixel_values"],
+            output_names=["logits"],
+            dynamic_axes={"pixel_values": {0: "batch"}, "logits": {0: "batch"}},
+            opset_version=opset,
+        )
+    print(f"  {model_path.stat().st_size / 1024 / 1024:.1f} MB")
+
+    if int8:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = output_dir / ONNX_MODEL_FILES["onnx-int8"]
+        print(f"Quantizing to {int8_path} (dynamic int8)...")
+        quantize_dynamic(str(model_path), str(int8_path), weight_type=QuantType.QInt8)
+        print(f"  {int8_path.stat().st_size / 1024 / 1024:.1f} MB")
+
+
+def run_classifier(classifier, images: list[Image.Image]) -> tuple[list[list[dict]], float]:
+    """이미지별 예측과 이미지당 지연 시간 중앙값 (p50, ms, 한 장씩 실행)"""
+    classifier(images[0], top_k=5)  # 워밍업
+    predictions = []
+    timings = []
+    for image in images:
+        started = time.perf_counter()
+        predictions.append(classifier(image, top_k=5))
+        timings.append((time.perf_counter() - started) * 1000)
+    return predictions, float(np.median(timings))
+
+
+def score_diff(reference: list[dict], prediction: list[dict]) -> float:
+    """두 예측에 공통으로 있는 라벨의 최대 확률 차이"""
+    reference_scores = {p["label"]: p["score"] for p in reference}
+    return max(
+        (abs(reference_scores[p["label"]] - p["score"]) for p in prediction if p["label"] in reference_scores),
+        default=0.0,
+    )
+
+
+def generate_face_crops(count: int = 32, seed: int = 19) -> list[Image.Image]:
+    """
+    정확도 비교용 합성 얼굴 크롭 (배경 / 머리카락 / 얼굴 윤곽 비율 / 피부색 / 눈 / 입을 무작위로 그림)
+    실제 사진 없이도 같은 입력에 대한 두 백엔드의 출력 차이를 확인할 수 있습니다.
+    """
+    rng = np.random.default_rng(seed)
+    crops = []
+    for _ in range(count):
+        size = 224
+        image = Image.new("RGB", (size, size), tuple(int(v) for v in rng.integers(0, 256, 3)))
+        draw = ImageDraw.Draw(image)
+
+        # 얼굴 윤곽: 너비 / 높이 비율과 턱 모양(타원 / 둥근 사각형)으로 얼굴형 차이를 흉내 냄
+        cx, cy = size / 2 + rng.normal(0, 6), size / 2 + rng.normal(0, 6)
+        half_w = rng.uniform(50, 80)
+        half_h = half_w * rng.uniform(1.0, 1.5)
+        box = (cx - half_w, cy - half_h, cx + half_w, cy + half_h)
+        hair = tuple(int(v) for v in rng.integers(10, 120, 3))
+        draw.ellipse((box[0] - 10, box[1] - 20, box[2] + 10, cy), fill=hair)
+        red = rng.uniform(150, 250)
+        green = red * rng.uniform(0.7, 0.85)
+        skin = (int(red), int(green), int(green * rng.uniform(0.75, 0.9)))
+        if rng.random() < 0.5:
+            draw.ellipse(box, fill=skin)
+        else:
+            draw.rounded_rectangle(box, radius=int(half_w * rng.uniform(0.3, 0.9)), fill=skin)
+
+        eye_y = cy - half_h * 0.2
+        for side in (-1, 1):
+            ex = cx + side * half_w * 0.4
+            draw.ellipse((ex - 9, eye_y - 5, ex + 9, eye_y + 5), fill=(250, 250, 250))
+            draw.ellipse((ex - 4, eye_y - 4, ex + 4, eye_y + 4), fill=(40, 30, 20))
+        mouth_y = cy + half_h * 0.5
+        draw.arc((cx - 20, mouth_y - 10, cx + 20, mouth_y + 10), 20, 160, fill=(150, 60, 60), width=3)
+
+        crops.append(image.filter(ImageFilter.GaussianBlur(1)))
+    return crops
+
+
+def compare_backends(images: list[Image.Image], model_dir: Path) -> tuple[list[list[dict]], float, dict]:
+    """
+    PyTorch 경로와 내보낸 ONNX 백엔드 비교
+
+    Returns:
+        (PyTorch 예측, PyTorch 이미지당 p50 ms, 백엔드별 {"agreement", "max_score_diff", "ms", "predictions"})
+        모델 파일이 없는 백엔드는 결과에서 제외
+    """
+    reference, reference_ms = run_classifier(load_torch_classifier(), images)
+
+    results = {}
+    for backend, model_file in ONNX_MODEL_FILES.items():
+        if not (model_dir / model_file).exists():
+            continue
+
+        predictions, elapsed_ms = run_classifier(
+            OnnxFaceShapeClassifier(model_dir=model_dir, model_file=model_file), images
+        )
+        results[backend] = {
+            "agreement": sum(
+                ref[0]["label"] == pred[0]["label"] for ref, pred in zip(reference, predictions)
+            ) / len(images),
+            "max_score_diff": max(score_diff(ref, pred) for ref, pred in zip(reference, predictions)),
+            "ms": elapsed_ms,
+            "predictions": predictions,
+        }
+    return reference, reference_ms, results
+
+
+def check(fixture_dir: Optional[Path], model_dir: Path, min_agreement: float) -> bool:
+    """
+    PyTorch 경로와 ONNX 백엔드의 top-1 일치율 / 확률 차이 / 지연 시간 비교
+    fixture_dir이 없으면 합성 얼굴 크롭(generate_face_crops)으로 비교합니다.
+    """
+    if fixture_dir is None:
+        images = generate_face_crops()
+        names = [f"generated_{index:02d}" for index in range(len(images))]
+    else:
+        paths = sorted(p for p in fixture_dir.iterdir() if p.suffix.lower() in IMAGE_SUFFIXES)
+        if not paths:
+            print(f"No images found in {fixture_dir}")
+            return False
+        images = [Image.open(p).convert("RGB") for p in paths]
+        names = [p.name for p in paths]
+
+    reference, reference_ms, results = compare_backends(images, model_dir)
+    print(f"torch: p50 {reference_ms:.1f} ms/image ({len(images)} images)")
+
+    passed = True
+    for backend, model_file in ONNX_MODEL_FILES.items():
+        if backend not in results:
+            print(f"{backend}: skipped ({model_file} not found)")
+            continue
+
+        result = results[backend]
+        ok = result["agreement"] >= min_agreement and result["max_score_diff"] <= MAX_SCORE_DIFF[backend]
+        passed = passed and ok
+        print(
+            f"{backend}: p50 {result['ms']:.1f} ms/image ({reference_ms / result['ms']:.1f}x), "
+            f"top-1 agreement {result['agreement']:.1%}, max score diff {result['max_score_diff']:.4f} "
+            f"(limit {MAX_SCORE_DIFF[backend]}) [{'OK' if ok else 'FAIL'}]"
+        )
+        for name, ref, pred in zip(names, reference, result["predictions"]):
+            if ref[0]["label"] != pred[0]["label"]:
+                print(f"  mismatch {name}: torch={ref[0]['label']} {backend}={pred[0]['label']}")
+
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export / verify the ONNX face shape classifier")
+    parser.add_argument("--output", type=Path, default=FACE_SHAPE_ONNX_DIR, help="ONNX 모델 디렉토리")
+    parser.add_argument("--opset", type=int, default=17)
+    parser.add_argument("--int8", action="store_true", help="int8 동적 양자화 모델도 생성")
+    parser.add_argument(
+        "--check", type=Path, nargs="?", const="", metavar="DIR",
+        help="얼굴 크롭 이미지 폴더로 정확도 비교, 폴더를 생략하면 합성 크롭 사용 (내보내기 생략)",
+    )
+    parser.add_argument("--min-agreement", type=float, default=0.98, help="통과 기준 top-1 일치율")
+    args = parser.parse_args()
+
+    if args.check is not None:
+        sys.exit(0 if check(args.check or None, args.output, args.min_agreement) else 1)
+    export(args.output, args.opset, args.int8)
+
+
+if __name__ == "__main__":
+    main()
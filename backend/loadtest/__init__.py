@@ -0,0 +1,3 @@
+"""
+Load test harness (python -m loadtest.run) with a local fake Replicate server
+"""
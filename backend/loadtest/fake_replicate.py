@@ -0,0 +1,280 @@
+"""
+부하 테스트용 로컬 Replicate 대체 서버
+네트워크와 비용 없이 VTONService가 사용하는 Replicate HTTP API를 흉내 냅니다.
+
+    cd backend
+    uvicorn loadtest.fake_replicate:app --port 9000
+    REPLICATE_BASE_URL=http://127.0.0.1:9000 REPLICATE_API_TOKEN=fake uvicorn app.main:app
+
+지원 API:
+- POST /v1/files: 입력 이미지 업로드 (replicate 클라이언트의 파일 인코딩)
+- POST /v1/predictions: 예측 생성 (대기 -> 생성 -> 완료/실패를 시간에 따라 진행)
+- GET /v1/predictions/{id}: 상태 / tqdm 형식 로그 / 결과 URL
+- POST /v1/predictions/{id}/cancel: 예측 취소
+- GET /output/{id}.jpg: 결과 이미지
+- GET /_fake/predictions, /_fake/stats: 부하 테스트 집계용 (예측별 완료 시각 등)
+
+지연 시간 분포는 "const:5", "uniform:2,8", "lognormal:20,0.3"(중앙값, sigma), "exp:4"(평균) 형식입니다.
+"""
+
+import io
+import math
+import os
+import random
+import threading
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+from fastapi import FastAPI, HTTPException, Request, UploadFile, File
+from fastapi.responses import JSONResponse, Response
+
+# 대기(starting) / 생성(processing) 소요 시간 분포 (초)
+FAKE_REPLICATE_QUEUE_SECONDS = os.environ.get("FAKE_REPLICATE_QUEUE_SECONDS", "lognormal:3,0.5")
+FAKE_REPLICATE_PROCESSING_SECONDS = os.environ.get("FAKE_REPLICATE_PROCESSING_SECONDS", "lognormal:20,0.3")
+# 예측이 failed로 끝나는 비율 / 예측 생성 요청이 500, 429로 실패하는 비율
+FAKE_REPLICATE_FAILURE_RATE = float(os.environ.get("FAKE_REPLICATE_FAILURE_RATE", "0.02"))
+FAKE_REPLICATE_ERROR_RATE = float(os.environ.get("FAKE_REPLICATE_ERROR_RATE", "0"))
+FAKE_REPLICATE_THROTTLE_RATE = float(os.environ.get("FAKE_REPLICATE_THROTTLE_RATE", "0"))
+# 결과 이미지 크기 (너비x높이)
+FAKE_REPLICATE_OUTPUT_SIZE = os.environ.get("FAKE_REPLICATE_OUTPUT_SIZE", "768x1024")
+FAKE_REPLICATE_SEED = os.environ.get("FAKE_REPLICATE_SEED")
+
+# 예측 로그의 전체 단계 수 (IDM-VTON 기본 denoising steps)
+LOG_TOTAL_STEPS = 30
+
+
+def parse_distribution(spec: str) -> Callable[[random.Random], float]:
+    """"lognormal:20,0.3" 형식의 분포 설정을 샘플링 함수로 변환"""
+    kind, _, params = spec.partition(":")
+    try:
+        values = [float(value) for value in params.split(",") if value.strip()]
+    except ValueError:
+        raise ValueError(f"분포 인자가 숫자가 아닙니다: {spec}")
+
+    kind = kind.strip().lower()
+    if kind == "const" and len(values) == 1:
+        return lambda rng: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda rng: rng.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        mu = math.log(values[0])
+        return lambda rng: rng.lognormvariate(mu, values[1])
+    if kind == "exp" and len(values) == 1:
+        return lambda rng: rng.expovariate(1 / values[0]) if values[0] > 0 else 0.0
+    raise ValueError(
+        f"지원하지 않는 분포입니다: {spec} (const:S, uniform:A,B, lognormal:MEDIAN,SIGMA, exp:MEAN)"
+    )
+
+
+def _timestamp(value: Optional[float]) -> Optional[str]:
+    if value is None:
+        return None
+    return datetime.fromtimestamp(value, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+@dataclass
+class FakePrediction:
+    """생성 시각과 미리 뽑은 소요 시간으로 상태를 계산하는 예측"""
+    id: str
+    version: str
+    input: dict
+    created_at: float
+    queue_seconds: float
+    processing_seconds: float
+    fails: bool
+    canceled_at: Optional[float] = None
+    polls: int = 0
+
+    @property
+    def started_at(self) -> float:
+        return self.created_at + self.queue_seconds
+
+    @property
+    def completed_at(self) -> float:
+        return self.started_at + self.processing_seconds
+
+    def status(self, now: float) -> str:
+        if self.canceled_at is not None:
+            return "canceled"
+        if now < self.started_at:
+            return "starting"
+        if now < self.completed_at:
+            return "processing"
+        return "failed" if self.fails else "succeeded"
+
+    def to_json(self, base_url: str, now: float) -> dict:
+        status = self.status(now)
+        logs = ""
+        if status != "starting":
+            elapsed = min(now, self.completed_at) - self.started_at
+            fraction = elapsed / self.processing_seconds if self.processing_seconds > 0 else 1.0
+            step = min(LOG_TOTAL_STEPS, int(fraction * LOG_TOTAL_STEPS))
+            logs = f"{int(fraction * 100):3d}%|{'#' * (step // 3):10s}| {step}/{LOG_TOTAL_STEPS} [00:00<00:00, 1.00it/s]\n"
+
+        finished = status in ("succeeded", "failed")
+        return {
+            "id": self.id,
+            "model": "fake/idm-vton",
+            "version": self.version,
+            "status": status,
+            "input": self.input,
+            "output": f"{base_url}output/{self.id}.jpg" if status == "succeeded" else None,
+            "logs": logs,
+            "error": "Fake prediction failure" if status == "failed" else None,
+            "metrics": {"predict_time": self.processing_seconds} if finished else {},
+            "created_at": _timestamp(self.created_at),
+            "started_at": _timestamp(self.started_at) if status != "starting" else None,
+            "completed_at": _timestamp(self.completed_at) if finished else None,
+            "urls": {
+                "get": f"{base_url}v1/predictions/{self.id}",
+                "cancel": f"{base_url}v1/predictions/{self.id}/cancel",
+            },
+        }
+
+
+@dataclass
+class FakeReplicate:
+    """예측 / 업로드 상태와 카운터"""
+    queue_seconds: Callable[[random.Random], float]
+    processing_seconds: Callable[[random.Random], float]
+    failure_rate: float = 0.0
+    error_rate: float = 0.0
+    throttle_rate: float = 0.0
+    seed: Optional[int] = None
+    predictions: dict = field(default_factory=dict)
+    counters: dict = field(default_factory=lambda: {
+        "files": 0, "created": 0, "errors": 0, "throttled": 0, "polls": 0, "canceled": 0, "downloads": 0,
+    })
+
+    def __post_init__(self):
+        self.rng = random.Random(self.seed)
+        self.lock = threading.Lock()
+
+    def create(self, version: str, input: dict) -> FakePrediction:
+        with self.lock:
+            prediction = FakePrediction(
+                id=uuid.uuid4().hex,
+                version=version,
+                input=input,
+                created_at=time.time(),
+                queue_seconds=max(0.0, self.queue_seconds(self.rng)),
+                processing_seconds=max(0.0, self.processing_seconds(self.rng)),
+                fails=self.rng.random() < self.failure_rate,
+            )
+            self.predictions[prediction.id] = prediction
+            self.counters["created"] += 1
+        return prediction
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return self.rng.random() < rate
+
+
+def render_output(size: str) -> bytes:
+    """결과 이미지 (JPEG 압축이 잘 되지 않도록 노이즈로 채워 실제와 비슷한 크기로)"""
+    from PIL import Image
+
+    width, height = (int(value) for value in size.lower().split("x"))
+    buffer = io.BytesIO()
+    Image.effect_noise((width, height), 48).convert("RGB").save(buffer, "JPEG", quality=90)
+    return buffer.getvalue()
+
+
+def create_app(state: FakeReplicate, output_size: str = FAKE_REPLICATE_OUTPUT_SIZE) -> FastAPI:
+    app = FastAPI(title="Fake Replicate")
+    output_image = render_output(output_size)
+
+    def get_prediction(prediction_id: str) -> FakePrediction:
+        prediction = state.predictions.get(prediction_id)
+        if prediction is None:
+            raise HTTPException(status_code=404, detail="Prediction not found")
+        return prediction
+
+    @app.post("/v1/files")
+    async def create_file(request: Request, content: UploadFile = File(...)):
+        data = await content.read()
+        state.counters["files"] += 1
+        file_id = uuid.uuid4().hex
+        now = time.time()
+        return JSONResponse({
+            "id": file_id,
+            "name": content.filename or file_id,
+            "content_type": content.content_type or "application/octet-stream",
+            "size": len(data),
+            "etag": file_id,
+            "checksums": {},
+            "metadata": {},
+            "created_at": _timestamp(now),
+            "expires_at": _timestamp(now + 86400),
+            "urls": {"get": f"{request.base_url}v1/files/{file_id}"},
+        }, status_code=201)
+
+    @app.post("/v1/predictions")
+    async def create_prediction(request: Request):
+        if state.roll(state.throttle_rate):
+            state.counters["throttled"] += 1
+            return JSONResponse({"detail": "Request was throttled."}, status_code=429, headers={"Retry-After": "1"})
+        if state.roll(state.error_rate):
+            state.counters["errors"] += 1
+            return JSONResponse({"detail": "Fake internal server error"}, status_code=500)
+
+        body = await request.json()
+        prediction = state.create(body.get("version", ""), body.get("input", {}))
+        return JSONResponse(prediction.to_json(str(request.base_url), time.time()), status_code=201)
+
+    @app.get("/v1/predictions/{prediction_id}")
+    async def read_prediction(request: Request, prediction_id: str):
+        prediction = get_prediction(prediction_id)
+        prediction.polls += 1
+        state.counters["polls"] += 1
+        return prediction.to_json(str(request.base_url), time.time())
+
+    @app.post("/v1/predictions/{prediction_id}/cancel")
+    async def cancel_prediction(request: Request, prediction_id: str):
+        prediction = get_prediction(prediction_id)
+        now = time.time()
+        if prediction.status(now) in ("starting", "processing"):
+            prediction.canceled_at = now
+            state.counters["canceled"] += 1
+        return prediction.to_json(str(request.base_url), now)
+
+    @app.get("/output/{prediction_id}.jpg")
+    async def download_output(prediction_id: str):
+        get_prediction(prediction_id)
+        state.counters["downloads"] += 1
+        return Response(output_image, media_type="image/jpeg")
+
+    @app.get("/_fake/predictions")
+    async def list_predictions():
+        """예측별 설명(garment_des), 예정 완료 시각(epoch 초), 최종 상태"""
+        now = time.time()
+        return [
+            {
+                "id": prediction.id,
+                "description": prediction.input.get("garment_des"),
+                "status": prediction.status(now),
+                "created_at": prediction.created_at,
+                "completed_at": prediction.completed_at,
+                "polls": prediction.polls,
+            }
+            for prediction in list(state.predictions.values())
+        ]
+
+    @app.get("/_fake/stats")
+    async def stats():
+        return {"predictions": len(state.predictions), **state.counters}
+
+    return app
+
+
+app = create_app(FakeReplicate(
+    queue_seconds=parse_distribution(FAKE_REPLICATE_QUEUE_SECONDS),
+    processing_seconds=parse_distribution(FAKE_REPLICATE_PROCESSING_SECONDS),
+    failure_rate=FAKE_REPLICATE_FAILURE_RATE,
+    error_rate=FAKE_REPLICATE_ERROR_RATE,
+    throttle_rate=FAKE_REPLICATE_THROTTLE_RATE,
+    seed=int(FAKE_REPLICATE_SEED) if FAKE_REPLICATE_SEED else None,
+))
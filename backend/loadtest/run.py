@@ -0,0 +1,546 @@
+"""
+Try-On / 분석 혼합 부하 테스트
+
+    cd backend
+    python -m loadtest.run                                              # 500건, 동시 500
+    python -m loadtest.run --requests 2000 --concurrency 200 --mix tryon=8,analyze=1,face_shape=1
+    python -m loadtest.run --processing lognormal:40,0.5 --failure-rate 0.1 --error-rate 0.02
+    python -m loadtest.run --app-url http://127.0.0.1:8000 --replicate-url http://127.0.0.1:9000 --app-pid 1234
+
+로컬 대체 Replicate 서버(loadtest.fake_replicate)와 앱(app.main)을 각각 uvicorn 프로세스로 띄우고,
+동시 사용자 --concurrency명이 --mix 비율로 요청을 보냅니다. 네트워크 없이 한 대의 Linux 머신에서 실행됩니다.
+- tryon: /api/progress/{sessionId} SSE를 먼저 연결한 뒤 /api/tryon 제출, 결과 이미지(/api/results/{id}) 다운로드
+- analyze / face_shape: --images 폴더의 사진 업로드 (없으면 얼굴 없는 합성 이미지)
+
+결과는 JSON으로 출력(--output)합니다.
+- endpoints: 종류별 요청 수, 실패 수, 처리량, 지연 시간 백분위수
+- sse: 종료 이벤트 누락 수, 세션당 이벤트 수, 첫 이벤트까지 시간,
+  전달 지연(대체 서버에서 예측이 끝난 시각 -> 클라이언트가 종료 이벤트를 받은 시각, 조회 간격 포함)
+- memory: 앱 프로세스(분석 워커 포함) RSS 시작 / 최대 / 종료 값과 증가량 (/proc 기준)
+
+분석 요청은 실제 모델을 사용하므로 dlib 랜드마크 / 퍼스널 컬러 / 얼굴형 모델이 미리 준비되어 있어야 합니다.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from .fake_replicate import parse_distribution
+
+BACKEND_DIR = Path(__file__).parent.parent
+DEFAULT_IMAGES_DIR = BACKEND_DIR / "benchmarks" / "fixtures"
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".webp"}
+KINDS = ("tryon", "analyze", "face_shape")
+ENDPOINTS = {
+    "tryon": "/api/tryon",
+    "analyze": "/api/analyze",
+    "face_shape": "/api/analyze/face-shape",
+}
+TERMINAL_STATUSES = {"complete", "error"}
+
+
+@dataclass
+class RequestResult:
+    kind: str
+    latency: float  # 초
+    ok: bool
+    error: Optional[str] = None
+
+
+@dataclass
+class ProgressTrace:
+    """Try-On 요청 하나의 SSE 수신 기록"""
+    session_id: str
+    submitted_at: float  # epoch 초
+    events: list = field(default_factory=list)  # [(수신 epoch 초, status), ...]
+    connected: asyncio.Event = field(default_factory=asyncio.Event)
+
+    @property
+    def terminal(self) -> Optional[tuple[float, str]]:
+        for received_at, status in self.events:
+            if status in TERMINAL_STATUSES:
+                return received_at, status
+        return None
+
+
+# ======================
+#      서버 실행
+# ======================
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def start_server(target: str, port: int, env: dict, log_path: Path) -> subprocess.Popen:
+    """uvicorn으로 target(모듈:앱)을 실행 (로그는 파일로)"""
+    log_file = open(log_path, "wb")
+    return subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", target, "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        cwd=BACKEND_DIR,
+        env=env,
+        stdout=log_file,
+        stderr=subprocess.STDOUT,
+    )
+
+
+def stop_server(process: subprocess.Popen):
+    if process.poll() is None:
+        process.terminate()
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+            process.wait()
+
+
+async def wait_until_ready(client: httpx.AsyncClient, url: str, timeout: float, process=None):
+    """url이 200을 반환할 때까지 대기 (분석 모델 로드/워밍업 포함)"""
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process is not None and process.poll() is not None:
+            raise RuntimeError(f"서버가 종료되었습니다 (exit code {process.returncode}): {url}")
+        try:
+            if (await client.get(url, timeout=5)).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        await asyncio.sleep(0.5)
+    raise TimeoutError(f"{timeout:.0f}초 안에 준비되지 않았습니다: {url}")
+
+
+# ======================
+#      메모리 측정
+# ======================
+
+def _children(pid: int) -> list[int]:
+    try:
+        children = []
+        for task in Path(f"/proc/{pid}/task").iterdir():
+            children += [int(child) for child in (task / "children").read_text().split()]
+        return children
+    except OSError:
+        return []
+
+
+def _rss_kb(pid: int) -> int:
+    try:
+        for line in Path(f"/proc/{pid}/status").read_text().splitlines():
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    except OSError:
+        pass
+    return 0
+
+
+def process_tree_rss_mb(pid: int) -> float:
+    """pid와 모든 자식 프로세스(분석 워커)의 RSS 합계 (MB, Linux /proc)"""
+    total, stack = 0, [pid]
+    while stack:
+        current = stack.pop()
+        total += _rss_kb(current)
+        stack.extend(_children(current))
+    return total / 1024
+
+
+async def sample_memory(pid: int, interval: float, samples: list, stop: asyncio.Event):
+    started = time.monotonic()
+    while not stop.is_set():
+        samples.append((round(time.monotonic() - started, 1), round(process_tree_rss_mb(pid), 1)))
+        try:
+            await asyncio.wait_for(stop.wait(), interval)
+        except asyncio.TimeoutError:
+            pass
+    samples.append((round(time.monotonic() - started, 1), round(process_tree_rss_mb(pid), 1)))
+
+
+# ======================
+#       트래픽
+# ======================
+
+def synthetic_image(rng: random.Random, width: int, height: int) -> bytes:
+    """얼굴 없는 노이즈 JPEG (Try-On 입력 / 분석 사진이 없을 때)"""
+    from PIL import Image
+
+    image = Image.effect_noise((width, height), rng.uniform(24, 64)).convert("RGB")
+    buffer = io.BytesIO()
+    image.save(buffer, "JPEG", quality=85)
+    return buffer.getvalue()
+
+
+def load_images(images_dir: Path) -> list[bytes]:
+    if not images_dir.exists():
+        return []
+    return [p.read_bytes() for p in sorted(images_dir.iterdir()) if p.suffix.lower() in IMAGE_SUFFIXES]
+
+
+def parse_mix(spec: str) -> dict[str, float]:
+    mix = {}
+    for part in spec.split(","):
+        name, _, weight = part.partition("=")
+        name = name.strip()
+        if name not in KINDS:
+            raise ValueError(f"알 수 없는 요청 종류입니다: {name} ({', '.join(KINDS)})")
+        mix[name] = float(weight or 1)
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("--mix에 가중치가 0보다 큰 항목이 없습니다.")
+    return mix
+
+
+async def follow_progress(client: httpx.AsyncClient, base_url: str, trace: ProgressTrace):
+    """SSE 이벤트를 종료 이벤트까지 수신 시각과 함께 기록"""
+    try:
+        async with client.stream("GET", f"{base_url}/api/progress/{trace.session_id}") as response:
+            trace.connected.set()
+            async for line in response.aiter_lines():
+                if not line.startswith("data:"):
+                    continue
+                status = json.loads(line[5:]).get("status")
+                trace.events.append((time.time(), status))
+                if status in TERMINAL_STATUSES:
+                    return
+    finally:
+        trace.connected.set()
+
+
+async def run_tryon(
+    client: httpx.AsyncClient,
+    base_url: str,
+    human: bytes,
+    garment: bytes,
+    results: list,
+    traces: list,
+    sse_timeout: float,
+):
+    session_id = f"loadtest-{uuid.uuid4().hex[:12]}"
+    trace = ProgressTrace(session_id=session_id, submitted_at=time.time())
+    traces.append(trace)
+
+    # 프론트엔드처럼 SSE를 먼저 연결한 뒤 제출
+    progress_task = asyncio.create_task(follow_progress(client, base_url, trace))
+    try:
+        await asyncio.wait_for(trace.connected.wait(), 10)
+    except asyncio.TimeoutError:
+        pass
+
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            f"{base_url}/api/tryon",
+            files={"humanImage": ("human.jpg", human, "image/jpeg"), "topImage": ("top.jpg", garment, "image/jpeg")},
+            # 설명에 세션 ID를 넣어 대체 서버의 예측과 연결 (SSE 전달 지연 계산)
+            data={"topDescription": session_id, "sessionId": session_id},
+        )
+        body = response.json() if response.status_code == 200 else {}
+        ok = bool(body.get("success"))
+        error = body.get("error") if response.status_code == 200 else f"HTTP {response.status_code}"
+        results.append(RequestResult("tryon", time.perf_counter() - started, ok, None if ok else error))
+
+        output_url = body.get("outputImage")
+        if ok and output_url and not output_url.startswith("data:"):
+            started = time.perf_counter()
+            response = await client.get(output_url)
+            results.append(RequestResult(
+                "result", time.perf_counter() - started, response.status_code == 200,
+                None if response.status_code == 200 else f"HTTP {response.status_code}",
+            ))
+    except (httpx.HTTPError, ValueError) as e:
+        results.append(RequestResult("tryon", time.perf_counter() - started, False, type(e).__name__))
+
+    try:
+        await asyncio.wait_for(progress_task, sse_timeout)
+    except (asyncio.TimeoutError, httpx.HTTPError, ValueError):
+        pass
+
+
+async def run_analysis(client: httpx.AsyncClient, base_url: str, kind: str, image: bytes, results: list):
+    started = time.perf_counter()
+    try:
+        response = await client.post(
+            f"{base_url}{ENDPOINTS[kind]}", files={"image": ("face.jpg", image, "image/jpeg")}
+        )
+        ok = response.status_code == 200
+        results.append(RequestResult(kind, time.perf_counter() - started, ok, None if ok else f"HTTP {response.status_code}"))
+    except httpx.HTTPError as e:
+        results.append(RequestResult(kind, time.perf_counter() - started, False, type(e).__name__))
+
+
+async def drive(
+    client: httpx.AsyncClient,
+    base_url: str,
+    args: argparse.Namespace,
+    faces: list[bytes],
+    results: list,
+    traces: list,
+) -> float:
+    """동시 사용자 concurrency명이 요청을 나눠 보내고 전체 소요 시간(초) 반환"""
+    rng = random.Random(args.seed)
+    mix = parse_mix(args.mix)
+    kinds = rng.choices(list(mix), weights=list(mix.values()), k=args.requests)
+    humans = [synthetic_image(rng, 768, 1024) for _ in range(8)]
+    garments = [synthetic_image(rng, 768, 1024) for _ in range(8)]
+    queue = list(enumerate(kinds))
+
+    async def user():
+        while queue:
+            index, kind = queue.pop()
+            if kind == "tryon":
+                await run_tryon(
+                    client, base_url, humans[index % len(humans)], garments[index % len(garments)],
+                    results, traces, args.sse_timeout,
+                )
+            else:
+                await run_analysis(client, base_url, kind, faces[index % len(faces)], results)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(user() for _ in range(max(1, args.concurrency))))
+    return time.perf_counter() - started
+
+
+# ======================
+#        집계
+# ======================
+
+def percentiles(values: list[float]) -> dict:
+    """nearest-rank 백분위수 (ms)"""
+    if not values:
+        return {}
+    ordered = sorted(values)
+
+    def rank(p: float) -> float:
+        return round(ordered[min(len(ordered) - 1, max(0, int(round(p * len(ordered))) - 1))] * 1000, 1)
+
+    return {"p50": rank(0.5), "p90": rank(0.9), "p99": rank(0.99), "max": round(ordered[-1] * 1000, 1)}
+
+
+def summarize_endpoints(results: list[RequestResult], elapsed: float) -> dict:
+    summary = {}
+    for kind in sorted({result.kind for result in results}):
+        items = [result for result in results if result.kind == kind]
+        errors: dict[str, int] = {}
+        for result in items:
+            if not result.ok:
+                errors[result.error or "unknown"] = errors.get(result.error or "unknown", 0) + 1
+        ok = [result.latency for result in items if result.ok]
+        summary[kind] = {
+            "requests": len(items),
+            "ok": len(ok),
+            "failed": len(items) - len(ok),
+            "throughput_rps": round(len(ok) / elapsed, 2) if elapsed else 0.0,
+            "latency_ms": percentiles(ok),
+            "errors": dict(sorted(errors.items(), key=lambda item: -item[1])[:5]),
+        }
+    return summary
+
+
+def summarize_sse(traces: list[ProgressTrace], predictions: Optional[list[dict]]) -> dict:
+    completed_at = {}
+    for prediction in predictions or []:
+        if prediction.get("description"):
+            completed_at[prediction["description"]] = prediction["completed_at"]
+
+    first_event, lag = [], []
+    missing = 0
+    for trace in traces:
+        if trace.events:
+            first_event.append(trace.events[0][0] - trace.submitted_at)
+        terminal = trace.terminal
+        if terminal is None:
+            missing += 1
+        elif trace.session_id in completed_at:
+            lag.append(max(0.0, terminal[0] - completed_at[trace.session_id]))
+
+    return {
+        "sessions": len(traces),
+        "missing_terminal": missing,
+        "events_per_session": round(sum(len(t.events) for t in traces) / len(traces), 1) if traces else 0,
+        "first_event_ms": percentiles(first_event),
+        "delivery_lag_ms": percentiles(lag) if predictions is not None else None,
+    }
+
+
+def summarize_memory(samples: list[tuple[float, float]]) -> Optional[dict]:
+    values = [mb for _, mb in samples if mb > 0]
+    if not values:
+        return None
+    return {
+        "start_mb": values[0],
+        "peak_mb": max(values),
+        "end_mb": values[-1],
+        "growth_mb": round(values[-1] - values[0], 1),
+        # 10개 정도로 줄인 시계열 [(경과 초, MB), ...]
+        "timeline": samples[:: max(1, len(samples) // 10)],
+    }
+
+
+def environment() -> dict:
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+    }
+
+
+# ======================
+#        실행
+# ======================
+
+async def run(args: argparse.Namespace) -> dict:
+    faces = load_images(args.images)
+    if not faces and any(kind != "tryon" and weight > 0 for kind, weight in parse_mix(args.mix).items()):
+        print(f"{args.images}에 사진이 없어 얼굴 없는 합성 이미지로 분석 요청을 보냅니다 "
+              "(검출 실패 경로만 측정됨).", file=sys.stderr)
+    if not faces:
+        faces = [synthetic_image(random.Random(args.seed), 1024, 1280)]
+
+    processes = []
+    workdir = tempfile.TemporaryDirectory(prefix="closet-loadtest-")
+    limits = httpx.Limits(max_connections=args.concurrency * 2 + 10, max_keepalive_connections=args.concurrency * 2)
+    client = httpx.AsyncClient(timeout=httpx.Timeout(args.timeout, connect=30.0), limits=limits)
+    try:
+        replicate_url, base_url, app_pid = args.replicate_url, args.app_url, args.app_pid
+        if base_url is None:
+            tmp = Path(workdir.name)
+            if replicate_url is None:
+                port = free_port()
+                fake = start_server("loadtest.fake_replicate:app", port, {
+                    **os.environ,
+                    "FAKE_REPLICATE_QUEUE_SECONDS": args.queue,
+                    "FAKE_REPLICATE_PROCESSING_SECONDS": args.processing,
+                    "FAKE_REPLICATE_FAILURE_RATE": str(args.failure_rate),
+                    "FAKE_REPLICATE_ERROR_RATE": str(args.error_rate),
+                    "FAKE_REPLICATE_THROTTLE_RATE": str(args.throttle_rate),
+                    "FAKE_REPLICATE_SEED": str(args.seed),
+                }, tmp / "fake_replicate.log")
+                processes.append(fake)
+                replicate_url = f"http://127.0.0.1:{port}"
+                await wait_until_ready(client, f"{replicate_url}/_fake/stats", 60, fake)
+
+            port = free_port()
+            # 캐시를 끄고 작업/진행 상황/결과 저장소는 임시 폴더 사용 (이전 실행의 예측에 다시 연결하지 않도록)
+            server = start_server("app.main:app", port, {
+                **os.environ,
+                "REPLICATE_BASE_URL": replicate_url,
+                "REPLICATE_API_TOKEN": "loadtest",
+                "REPLICATE_POLL_INTERVAL": str(args.poll_interval),
+                "TRYON_CACHE_MAX_MB": "0",
+                "TRYON_INTERMEDIATE_CACHE_MAX_MB": "0",
+                "TRYON_JOB_DB": str(tmp / "jobs.sqlite3"),
+                "PROGRESS_BUS_DB": str(tmp / "progress.sqlite3"),
+                "RESULT_STORE_DIR": str(tmp / "results"),
+            }, tmp / "app.log")
+            processes.append(server)
+            base_url, app_pid = f"http://127.0.0.1:{port}", server.pid
+            print(f"Waiting for app at {base_url} (logs: {tmp / 'app.log'})...", file=sys.stderr)
+            await wait_until_ready(client, f"{base_url}/api/ready", args.startup_timeout, server)
+
+        samples: list = []
+        stop = asyncio.Event()
+        sampler = asyncio.create_task(sample_memory(app_pid, 1.0, samples, stop)) if app_pid else None
+
+        results: list[RequestResult] = []
+        traces: list[ProgressTrace] = []
+        print(f"Sending {args.requests} requests ({args.mix}) with {args.concurrency} concurrent users...",
+              file=sys.stderr)
+        elapsed = await drive(client, base_url, args, faces, results, traces)
+
+        stop.set()
+        if sampler is not None:
+            await sampler
+
+        predictions, fake_stats = None, None
+        if replicate_url:
+            predictions = (await client.get(f"{replicate_url}/_fake/predictions")).json()
+            fake_stats = (await client.get(f"{replicate_url}/_fake/stats")).json()
+
+        return {
+            "environment": environment(),
+            "config": {
+                "requests": args.requests,
+                "concurrency": args.concurrency,
+                "mix": parse_mix(args.mix),
+                "queue": args.queue,
+                "processing": args.processing,
+                "failure_rate": args.failure_rate,
+                "error_rate": args.error_rate,
+                "throttle_rate": args.throttle_rate,
+                "poll_interval": args.poll_interval,
+            },
+            "duration_seconds": round(elapsed, 1),
+            "endpoints": summarize_endpoints(results, elapsed),
+            "sse": summarize_sse(traces, predictions),
+            "memory": summarize_memory(samples),
+            "fake_replicate": fake_stats,
+        }
+    finally:
+        await client.aclose()
+        for process in reversed(processes):
+            stop_server(process)
+        if args.keep_logs:
+            print(f"Logs kept in {workdir.name}", file=sys.stderr)
+        else:
+            workdir.cleanup()
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(
+        prog="python -m loadtest.run",
+        description="로컬 대체 Replicate 서버로 Try-On / 분석 혼합 부하 테스트",
+    )
+    parser.add_argument("--requests", type=int, default=500, help="전체 요청 수")
+    parser.add_argument("--concurrency", type=int, default=500, help="동시 사용자 수")
+    parser.add_argument("--mix", default="tryon=6,analyze=2,face_shape=2", help="요청 종류별 가중치")
+    parser.add_argument("--images", type=Path, default=DEFAULT_IMAGES_DIR, help="분석 요청에 사용할 얼굴 사진 폴더")
+    parser.add_argument("--queue", default="lognormal:3,0.5", help="대체 서버 대기 시간 분포 (초)")
+    parser.add_argument("--processing", default="lognormal:20,0.3", help="대체 서버 생성 시간 분포 (초)")
+    parser.add_argument("--failure-rate", type=float, default=0.02, help="failed로 끝나는 예측 비율")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="예측 생성이 HTTP 500으로 실패하는 비율")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="예측 생성이 HTTP 429로 거절되는 비율")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="앱의 REPLICATE_POLL_INTERVAL (초)")
+    parser.add_argument("--timeout", type=float, default=600, help="요청별 타임아웃 (초)")
+    parser.add_argument("--sse-timeout", type=float, default=30, help="응답 후 SSE 종료 이벤트 대기 시간 (초)")
+    parser.add_argument("--startup-timeout", type=float, default=600, help="앱 준비(/api/ready) 대기 시간 (초)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--app-url", help="이미 실행 중인 앱 주소 (지정하면 서버를 띄우지 않음)")
+    parser.add_argument("--app-pid", type=int, help="--app-url 앱의 PID (메모리 측정용)")
+    parser.add_argument("--replicate-url", help="이미 실행 중인 대체 Replicate 서버 주소 (SSE 전달 지연 계산용)")
+    parser.add_argument("--keep-logs", action="store_true", help="서버 로그가 있는 임시 폴더를 지우지 않음")
+    parser.add_argument("--output", type=Path, help="결과 JSON 경로 (기본: 표준 출력)")
+    args = parser.parse_args(argv)
+
+    try:
+        parse_mix(args.mix)
+        parse_distribution(args.queue)
+        parse_distribution(args.processing)
+    except ValueError as e:
+        parser.error(str(e))
+
+    report = asyncio.run(run(args))
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
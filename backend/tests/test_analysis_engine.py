@@ -0,0 +1,25 @@
+"""
+분석 엔진 대기열 한도 처리
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from app.services.analysis_engine import AnalysisEngine, EngineSaturatedError
+
+
+def test_batch_raises_when_queue_fills_mid_batch():
+    engine = AnalysisEngine(workers=0)
+    images = [np.zeros((4, 4, 3), dtype=np.uint8) for _ in range(3)]
+
+    async def run(kind, bgr, **options):
+        # 첫 이미지 이후 다른 요청이 대기열을 채운 상황
+        if bgr is not images[0]:
+            raise EngineSaturatedError("분석 요청이 많아 잠시 후 다시 시도해주세요.")
+        raise ValueError("얼굴을 찾을 수 없습니다.")
+
+    engine.run = run
+    with pytest.raises(EngineSaturatedError):
+        asyncio.run(engine.analyze_personal_color_batch(images))
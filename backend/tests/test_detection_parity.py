@@ -0,0 +1,87 @@
+"""
+축소본 HOG 검출(FACE_DETECTION_MAX_SIDE)이 원본 해상도 검출과 같은 얼굴 / 랜드마크 / 분석 결과를 내는지
+검출 가능한 실제 얼굴 사진(scikit-image의 astronaut, NASA 공개 사진)을 DETECTION_MAX_SIDE보다 크게 키워 확인
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("dlib")
+skimage_data = pytest.importorskip("skimage.data")
+
+from app.services import face_detection
+from app.services.face_detection import detect_face
+from app.services.model_registry import ModelUnavailableError, model_registry
+
+# 랜드마크 좌표 차이 허용치 (원본 해상도 검출의 얼굴 너비 대비)
+MEAN_TOLERANCE = 0.01
+MAX_TOLERANCE = 0.025
+
+VARIANTS = ["2048", "2560", "3024", "2560-flipped", "2048-wide"]
+
+
+def make_image(variant: str) -> np.ndarray:
+    bgr = cv2.cvtColor(skimage_data.astronaut(), cv2.COLOR_RGB2BGR)
+    side = int(variant.split("-")[0])
+    bgr = cv2.resize(bgr, (side, side), interpolation=cv2.INTER_CUBIC)
+    if variant.endswith("flipped"):
+        bgr = cv2.flip(bgr, 1)
+    elif variant.endswith("wide"):
+        # 얼굴이 가운데가 아닌 가로 사진
+        bgr = cv2.copyMakeBorder(bgr, 0, 0, 600, 800, cv2.BORDER_REFLECT)
+    return bgr
+
+
+@pytest.fixture(autouse=True)
+def no_shared_cache(monkeypatch):
+    if not face_detection.DLIB_PREDICTOR_PATH.exists():
+        pytest.skip("dlib landmark predictor is not downloaded")
+    monkeypatch.setattr(face_detection.detection_cache, "shared", None)
+
+
+def detect_both(bgr: np.ndarray):
+    assert max(bgr.shape[:2]) > face_detection.DETECTION_MAX_SIDE > 0
+    full = detect_face(bgr, max_side=0)
+    downscaled = detect_face(bgr)
+    assert full is not None and downscaled is not None
+    return full, downscaled
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_downscaled_landmarks_and_season_match_full_resolution(variant):
+    from app.services.personal_color_service import classify_color_features, extract_color_features
+
+    bgr = make_image(variant)
+    full, downscaled = detect_both(bgr)
+
+    distance = np.linalg.norm(full.landmarks.astype(float) - downscaled.landmarks, axis=1)
+    assert distance.mean() <= MEAN_TOLERANCE * full.width
+    assert distance.max() <= MAX_TOLERANCE * full.width
+
+    try:
+        model_registry.get("personal_color")
+    except ModelUnavailableError as e:
+        pytest.skip(str(e))
+    seasons = [
+        classify_color_features([extract_color_features(bgr, landmarks=detection.landmarks).vector])[0][0]
+        for detection in (full, downscaled)
+    ]
+    assert seasons[0] == seasons[1]
+
+
+@pytest.mark.parametrize("variant", VARIANTS)
+def test_downscaled_face_shape_matches_full_resolution(variant):
+    pytest.importorskip("torch")
+    from app.services.face_shape_service import classify_face_crops, locate_face_crop
+
+    try:
+        model_registry.get("face_shape")
+    except ModelUnavailableError as e:
+        pytest.skip(str(e))
+
+    bgr = make_image(variant)
+    full, downscaled = detect_both(bgr)
+    crops = [locate_face_crop(bgr, face=detection).rgb for detection in (full, downscaled)]
+    labels = [predictions[0]["label"] for predictions in classify_face_crops(crops)]
+    assert labels[0] == labels[1]
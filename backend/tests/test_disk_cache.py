@@ -0,0 +1,59 @@
+"""
+여러 워커 프로세스가 같은 캐시 디렉토리를 공유할 때의 동작 (uvicorn --workers N)
+"""
+
+import multiprocessing
+
+from app.services.disk_cache import DiskLRUCache
+from app.services.result_store import ResultStore
+
+
+def _put_result(directory: str, data: bytes, queue):
+    queue.put(ResultStore(directory=directory, max_bytes=1024 * 1024, ttl=3600).put(data, "image/png"))
+
+
+def _put_cache(directory: str, key: str, data: bytes):
+    DiskLRUCache(directory, max_bytes=1024 * 1024, suffix=".png").put(key, data)
+
+
+def _run(target, *args):
+    context = multiprocessing.get_context("spawn")
+    process = context.Process(target=target, args=args)
+    process.start()
+    process.join(timeout=60)
+    assert process.exitcode == 0
+
+
+def test_result_written_by_another_process_is_served(tmp_path):
+    # 다른 워커가 쓰기 전에 만들어진 인스턴스 (시작 시 스캔한 인덱스에는 없음)
+    reader = ResultStore(directory=tmp_path, max_bytes=1024 * 1024, ttl=3600)
+    data = b"\x89PNG result from worker A"
+
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_put_result, args=(str(tmp_path), data, queue))
+    process.start()
+    result_id = queue.get(timeout=60)
+    process.join(timeout=60)
+
+    assert reader.get(result_id) == (data, "image/png")
+    assert reader.stats()["entries"] == 1
+
+
+def test_purge_removes_files_from_other_processes(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=1024 * 1024, suffix=".png")
+    _run(_put_cache, str(tmp_path), "a" * 64, b"written by another worker")
+    cache.put("b" * 64, b"written here")
+
+    assert cache.purge() == 2
+    assert not list(tmp_path.iterdir())
+
+
+def test_eviction_counts_files_from_other_processes(tmp_path):
+    cache = DiskLRUCache(tmp_path, max_bytes=100, suffix=".png", rescan_interval=0)
+    _run(_put_cache, str(tmp_path), "a" * 64, b"x" * 60)
+    cache.put("b" * 64, b"y" * 60)
+
+    # 두 프로세스의 파일 합계가 용량을 넘으므로 오래된 다른 프로세스의 파일이 삭제됨
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["b" * 64 + ".png"]
+    assert cache.stats()["bytes"] == 60
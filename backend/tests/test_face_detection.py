@@ -0,0 +1,79 @@
+"""
+얼굴 검출 캐시: 분석 워커 프로세스 간 공유 (디스크), 얼굴형 요청은 랜드마크를 예측하지 않음
+"""
+
+import asyncio
+
+import cv2
+import numpy as np
+import pytest
+
+pytest.importorskip("dlib")
+skimage_data = pytest.importorskip("skimage.data")
+
+from app.services import face_detection
+from app.services.analysis_engine import AnalysisEngine
+from app.services.disk_cache import DiskLRUCache
+from app.services.face_detection import DetectionCache, FaceDetection
+from app.services.metrics import STAGE_SECONDS
+
+
+def stage_count(name: str) -> float:
+    for sample_name, labels, value in STAGE_SECONDS.samples():
+        if sample_name == "closet_stage_duration_seconds_count" and labels == {"stage": name}:
+            return value
+    return 0.0
+
+
+def test_shared_tier_serves_other_process_entries(tmp_path):
+    # 같은 디렉토리를 쓰는 두 캐시 = 두 워커 프로세스
+    first = DetectionCache(shared=DiskLRUCache(tmp_path, max_bytes=1024 * 1024, suffix=".json"))
+    second = DetectionCache(shared=DiskLRUCache(tmp_path, max_bytes=1024 * 1024, suffix=".json"))
+    rect_only = FaceDetection(rect=(1, 2, 30, 40))
+    landmarks = np.arange(136, dtype=np.int32).reshape(68, 2)
+
+    first.put("image", rect_only)
+    assert second.get("image", landmarks=False) == (True, rect_only)
+
+    # 랜드마크가 필요하면 얼굴 영역만 있는 항목도 hit (랜드마크는 호출한 쪽이 예측)
+    hit, detection = second.get("image")
+    assert hit and detection.landmarks is None
+
+    # 다른 프로세스가 랜드마크를 추가하면 메모리의 얼굴 영역 항목 대신 사용
+    first.put("image", FaceDetection(rect=rect_only.rect, landmarks=landmarks))
+    hit, detection = second.get("image")
+    np.testing.assert_array_equal(detection.landmarks, landmarks)
+    assert second.stats()["shared_hits"] == 2
+
+    assert second.get("missing") == (False, None)
+
+
+def test_face_crop_and_personal_color_share_detection_across_workers(tmp_path, monkeypatch):
+    if not face_detection.DLIB_PREDICTOR_PATH.exists():
+        pytest.skip("dlib landmark predictor is not downloaded")
+    # spawn 워커는 환경 변수로 공유 캐시 경로를 받음 (얼굴형 분류 모델은 필요 없으므로 로드하지 않음)
+    monkeypatch.setenv("FACE_DETECTION_CACHE_DIR", str(tmp_path))
+    monkeypatch.setenv("MODEL_LOAD_MODES", "face_shape=lazy")
+    bgr = cv2.cvtColor(skimage_data.astronaut(), cv2.COLOR_RGB2BGR)
+
+    async def scenario():
+        # 엔진 두 개 = 서로 다른 분석 워커 프로세스 (라운드 로빈 / 다른 uvicorn 워커)
+        engines = [AnalysisEngine(workers=1), AnalysisEngine(workers=1)]
+        try:
+            for engine in engines:
+                engine.start()
+            crop = await engines[0].run("face_crop", bgr)
+            features = await engines[1].run("color_features", bgr)
+            return crop, features
+        finally:
+            for engine in engines:
+                engine.shutdown()
+
+    detects, landmarks = stage_count("detect"), stage_count("landmarks")
+    crop, features = asyncio.run(scenario())
+
+    assert crop.overlay["crop_box"] is not None
+    assert features.overlay["face_box"] is not None
+    # HOG 검출은 첫 요청에서 한 번만, 랜드마크는 퍼스널 컬러 요청에서만
+    assert stage_count("detect") - detects == 1
+    assert stage_count("landmarks") - landmarks == 1
@@ -0,0 +1,34 @@
+"""
+ONNX 얼굴형 분류 백엔드와 PyTorch 파이프라인의 출력 일치 확인 (합성 얼굴 크롭)
+내보낸 모델(models/face_shape)과 torch / transformers / onnxruntime이 있을 때만 실행됩니다.
+"""
+
+import pytest
+
+pytest.importorskip("dlib")
+pytest.importorskip("torch")
+pytest.importorskip("transformers")
+pytest.importorskip("onnxruntime")
+
+from app.services.face_shape_onnx import FACE_SHAPE_ONNX_DIR, ONNX_MODEL_FILES
+from export_face_shape_onnx import MAX_SCORE_DIFF, compare_backends, generate_face_crops
+
+# top-1 일치율 통과 기준 (export_face_shape_onnx.py --min-agreement 기본값과 동일)
+MIN_AGREEMENT = 0.98
+
+
+@pytest.fixture(scope="module")
+def comparison():
+    if not any((FACE_SHAPE_ONNX_DIR / model_file).exists() for model_file in ONNX_MODEL_FILES.values()):
+        pytest.skip(f"No exported ONNX model in {FACE_SHAPE_ONNX_DIR} (run export_face_shape_onnx.py)")
+    _, _, results = compare_backends(generate_face_crops(), FACE_SHAPE_ONNX_DIR)
+    return results
+
+
+@pytest.mark.parametrize("backend", list(ONNX_MODEL_FILES))
+def test_onnx_backend_matches_torch(comparison, backend):
+    if backend not in comparison:
+        pytest.skip(f"{ONNX_MODEL_FILES[backend]} not exported")
+    result = comparison[backend]
+    assert result["agreement"] >= MIN_AGREEMENT
+    assert result["max_score_diff"] <= MAX_SCORE_DIFF[backend]
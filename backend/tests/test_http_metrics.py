@@ -0,0 +1,70 @@
+"""
+HTTP 메트릭 미들웨어: 라우트 템플릿 라벨, 스트리밍 응답은 본문 전송이 끝날 때까지 측정
+"""
+
+import asyncio
+
+import pytest
+
+# app.main은 분석 서비스(dlib)를 불러옵니다
+pytest.importorskip("dlib")
+
+from fastapi import FastAPI
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+
+from app.main import HTTP_DURATION, HTTP_IN_FLIGHT, HTTP_REQUESTS, HTTPMetricsMiddleware
+
+STREAM_SECONDS = 0.3
+
+
+def sample(metric, name: str, **labels) -> float:
+    for sample_name, sample_labels, value in metric.samples():
+        if sample_name == name and sample_labels.items() >= labels.items():
+            return value
+    return 0.0
+
+
+@pytest.fixture
+def client():
+    app = FastAPI()
+    app.add_middleware(HTTPMetricsMiddleware)
+
+    @app.get("/test-metrics/items/{item_id}")
+    async def get_item(item_id: str):
+        return {"id": item_id}
+
+    @app.get("/test-metrics/stream")
+    async def stream():
+        async def events():
+            for index in range(3):
+                await asyncio.sleep(STREAM_SECONDS / 3)
+                yield f"data: {index}\n\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    return TestClient(app)
+
+
+def test_requests_are_labelled_by_route_template(client):
+    route = "/test-metrics/items/{item_id}"
+    before = sample(HTTP_REQUESTS, "closet_http_requests_total", route=route, status="200")
+
+    assert client.get("/test-metrics/items/a").status_code == 200
+    assert client.get("/test-metrics/items/b").status_code == 200
+    assert client.get("/test-metrics/unknown").status_code == 404
+
+    assert sample(HTTP_REQUESTS, "closet_http_requests_total", route=route, status="200") == before + 2
+    assert sample(HTTP_REQUESTS, "closet_http_requests_total", route="unmatched", status="404") >= 1
+    assert sample(HTTP_IN_FLIGHT, "closet_http_requests_in_flight") == 0
+
+
+def test_streaming_response_is_timed_until_the_body_ends(client):
+    route = "/test-metrics/stream"
+    before = sample(HTTP_DURATION, "closet_http_request_duration_seconds_sum", route=route)
+
+    response = client.get(route)
+    assert response.text.count("data:") == 3
+
+    elapsed = sample(HTTP_DURATION, "closet_http_request_duration_seconds_sum", route=route) - before
+    assert elapsed >= STREAM_SECONDS * 0.9
@@ -0,0 +1,92 @@
+"""
+여러 워커 프로세스가 같은 작업 DB를 공유할 때의 실행 임대(lease) 동작
+"""
+
+import time
+
+from app.services.job_store import JobStore
+from app.services.tryon_jobs import JOB_RUNNING, TryOnJob, TryOnJobInput
+
+
+def _insert_running(store: JobStore, owner: str, lease_until: float) -> TryOnJob:
+    job = TryOnJob(id=f"job-{owner}", session_id=f"session-{owner}", input=None)
+    store.insert_job(job, TryOnJobInput(human_image=b"human", top_image=b"top"))
+    job.status = JOB_RUNNING
+    job.started_at = time.time() - 600
+    assert store.claim_job(job, owner, lease_until)
+    return job
+
+
+def test_restart_does_not_requeue_jobs_leased_by_live_worker(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    now = time.time()
+    live = _insert_running(store, "worker-a", now + 60)
+    dead = _insert_running(store, "worker-b", now - 1)
+
+    assert store.requeue_expired(now) == [dead.id]
+    assert store.get_job(live.id).status == JOB_RUNNING
+    assert store.get_job(dead.id).status == "queued"
+    assert not store.claim_job(live, "worker-c", now + 60)
+
+
+def test_heartbeat_keeps_lease_and_release_expires_it(tmp_path):
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    now = time.time()
+    job = _insert_running(store, "worker-a", now + 1)
+
+    assert store.renew_leases("worker-a", now + 60) == 1
+    assert store.requeue_expired(now + 30) == []
+
+    store.release_leases("worker-a")
+    assert store.requeue_expired(now) == [job.id]
+
+
+def test_existing_database_is_migrated(tmp_path):
+    import sqlite3
+
+    path = tmp_path / "jobs.sqlite3"
+    conn = sqlite3.connect(path)
+    conn.execute(
+        "CREATE TABLE jobs (id TEXT PRIMARY KEY, session_id TEXT NOT NULL, status TEXT NOT NULL, "
+        "created_at REAL NOT NULL, started_at REAL, finished_at REAL, human_key TEXT NOT NULL, "
+        "top_key TEXT, bottom_key TEXT, dress_key TEXT, top_description TEXT NOT NULL, "
+        "bottom_description TEXT NOT NULL, dress_description TEXT NOT NULL, result_id TEXT, error TEXT)"
+    )
+    conn.execute(
+        "INSERT INTO jobs VALUES ('old', 's', 'running', 0, 0, NULL, 'h', NULL, NULL, NULL, '', '', '', NULL, NULL)"
+    )
+    conn.commit()
+    conn.close()
+
+    # 임대 정보가 없는 이전 버전의 실행 중 작업은 중단된 것으로 간주
+    assert JobStore(path).requeue_expired(time.time()) == ["old"]
+
+
+def test_output_without_result_store_is_kept_until_job_expires(tmp_path):
+    import asyncio
+
+    from app.services.tryon_jobs import FINISHED_STATUSES, JOB_SUCCEEDED, TryOnJobManager
+
+    store = JobStore(tmp_path / "jobs.sqlite3")
+    manager = TryOnJobManager(vton_service=None, result_store=None, store=store, retention=3600)
+    job = _insert_running(store, "worker-a", time.time() + 60)
+    job.status = JOB_SUCCEEDED
+    job.finished_at = time.time()
+    job.output_image = b"output"
+    store.update_job(job)
+    manager._jobs[job.id] = job
+
+    # 작업 저장소가 있으면 완료 작업은 메모리에서 바로 내려가지만 결과는 저장소에서 읽힘
+    assert manager.reap() == 1
+    assert asyncio.run(manager.get(job.id)).output_image == b"output"
+
+    # 이후 상태 기록이 있어도 결과는 유지
+    job.output_image = None
+    store.update_job(job)
+    assert store.get_job(job.id).output_image == b"output"
+
+    assert store.delete_finished(FINISHED_STATUSES, job.finished_at - 1) == 0
+    assert store.get_job(job.id).output_image == b"output"
+    assert store.delete_finished(FINISHED_STATUSES, job.finished_at + 1) == 1
+    assert store.get_job(job.id) is None
+    assert store._conn.execute("SELECT COUNT(*) FROM blobs").fetchone()[0] == 0
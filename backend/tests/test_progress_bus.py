@@ -0,0 +1,85 @@
+"""
+진행 버스: 시작 이후 이벤트만 전달하고, 워커 간 이벤트 ID가 이어지는지 확인
+(Redis 버스는 fakeredis로 확인)
+"""
+
+import asyncio
+
+import pytest
+
+from app.services.progress_broker import ProgressBroker
+from app.services.progress_bus import RedisProgressBus, SQLiteProgressBus, create_progress_bus
+
+
+async def _collect(path, publish_before: int, publish_after: int) -> list[tuple[int, str, dict]]:
+    writer = SQLiteProgressBus(path, interval=0.01)
+    await writer.start(lambda *event: None)
+    for index in range(publish_before):
+        writer.publish(f"old-{index}", {"status": "queued"})
+    await writer._flush()
+
+    received = []
+    reader = SQLiteProgressBus(path, interval=0.01)
+    await reader.start(lambda *event: received.append(event))
+    for index in range(publish_after):
+        writer.publish(f"new-{index}", {"status": "queued"})
+    await writer._flush()
+    await asyncio.sleep(0.2)
+
+    await reader.stop()
+    await writer.stop()
+    return received
+
+
+def test_reader_starts_at_current_max_id(tmp_path):
+    received = asyncio.run(_collect(tmp_path / "progress.sqlite3", publish_before=3, publish_after=2))
+
+    assert [session_id for _, session_id, _ in received] == ["new-0", "new-1"]
+    assert [event_id for event_id, _, _ in received] == [4, 5]
+
+
+def test_auto_uses_memory_in_single_process(monkeypatch):
+    monkeypatch.delenv("WEB_CONCURRENCY", raising=False)
+    assert create_progress_bus("auto") is None
+
+    monkeypatch.setenv("WEB_CONCURRENCY", "4")
+    assert isinstance(create_progress_bus("auto"), SQLiteProgressBus)
+
+
+def test_redis_bus_delivers_across_instances_and_resumes(monkeypatch):
+    fakeredis = pytest.importorskip("fakeredis")
+    import redis.asyncio as redis_asyncio
+
+    # 같은 가짜 서버에 연결하는 두 버스 = Redis를 공유하는 두 워커 프로세스
+    server = fakeredis.FakeServer()
+    monkeypatch.setattr(redis_asyncio, "from_url", lambda url: fakeredis.FakeAsyncRedis(server=server))
+
+    async def scenario():
+        publisher = ProgressBroker(bus=RedisProgressBus(interval=0.01), ttl=0)
+        receiver = ProgressBroker(bus=RedisProgressBus(interval=0.01), ttl=0)
+        await publisher.start()
+        await receiver.start()
+
+        # 다른 세션의 이벤트가 먼저 ID를 가져가도 전역 순서가 이어지는지
+        receiver.publish("other", {"status": "item", "index": 0})
+        await receiver.bus._flush()
+        for index in range(3):
+            publisher.publish("job", {"status": "item", "index": index})
+        publisher.publish("job", {"status": "complete"})
+        await publisher.bus._flush()
+        await asyncio.sleep(0.2)
+
+        received = [event async for event in receiver.subscribe("job")]
+        # Last-Event-ID 재연결: 두 번째 이벤트 이후만 재전송
+        resumed = [event async for event in receiver.subscribe("job", last_event_id=received[1][0])]
+
+        await receiver.stop()
+        await publisher.stop()
+        return received, resumed
+
+    received, resumed = asyncio.run(scenario())
+
+    assert [event_id for event_id, _ in received] == [2, 3, 4, 5]
+    assert [data.get("index") for _, data in received] == [0, 1, 2, None]
+    assert received[-1][1]["status"] == "complete"
+    assert resumed == received[2:]
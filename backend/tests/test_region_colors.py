@@ -0,0 +1,54 @@
+"""
+region_mean_lab_hsv가 이전 영역별 방식(영역마다 전체 이미지 마스크 -> bitwise_and -> 검은 픽셀 제외 -> hstack)과
+같은 평균 색상을 내는지 합성 얼굴 이미지로 확인
+"""
+
+import cv2
+import numpy as np
+import pytest
+
+# personal_color_service는 import 시 dlib 얼굴 검출기를 불러옵니다
+pytest.importorskip("dlib")
+
+from app.services.personal_color_service import mean_lab_hsv, region_mean_lab_hsv
+from benchmarks.analysis_bench import EYE_REGIONS, SKIN_REGIONS
+from benchmarks.synthetic import synthetic_face, synthetic_landmarks
+
+# 허용 오차 (OpenCV Lab / HSV 0~255 스케일)
+TOLERANCE = 1e-3
+
+
+def baseline_region_pixels(bgr: np.ndarray, landmarks: np.ndarray, indices) -> np.ndarray:
+    """이전 get_roi_from_landmarks: 전체 이미지 마스크 -> bitwise_and -> 검은 픽셀 제외"""
+    mask = np.zeros(bgr.shape[:2], dtype=np.uint8)
+    cv2.fillConvexPoly(mask, landmarks[indices], 255)
+    roi = cv2.bitwise_and(bgr, bgr, mask=mask)
+    pixels = roi.reshape(-1, 3)
+    pixels = pixels[np.all(pixels != 0, axis=1)]
+    if pixels.size == 0:
+        return np.array([[128, 128, 128]], dtype=np.uint8)
+    return pixels.reshape(1, -1, 3)
+
+
+def baseline_region_means(bgr: np.ndarray, landmarks: np.ndarray, regions):
+    """이전 방식: 그룹 내 영역 픽셀을 hstack 후 mean_lab_hsv"""
+    return [
+        mean_lab_hsv(np.hstack([baseline_region_pixels(bgr, landmarks, indices) for indices in group]))
+        for group in regions
+    ]
+
+
+@pytest.mark.parametrize("seed", range(20))
+def test_region_means_match_per_region_baseline(seed):
+    rng = np.random.default_rng(seed)
+    width, height = (int(v) for v in rng.integers(240, 1200, 2))
+    bgr = synthetic_face(rng, width, height)
+    landmarks = synthetic_landmarks(rng, width, height)
+    regions = [SKIN_REGIONS, EYE_REGIONS]
+
+    expected = baseline_region_means(bgr, landmarks, regions)
+    actual = region_mean_lab_hsv(bgr, landmarks, regions)
+
+    for (expected_lab, expected_hsv), (actual_lab, actual_hsv) in zip(expected, actual):
+        np.testing.assert_allclose(actual_lab, expected_lab, atol=TOLERANCE)
+        np.testing.assert_allclose(actual_hsv, expected_hsv, atol=TOLERANCE)
@@ -0,0 +1,35 @@
+"""
+/api/results/{id}: 조건부 요청(If-None-Match)도 결과가 있을 때만 304
+"""
+
+import pytest
+
+# app.main은 분석 서비스(dlib)를 불러옵니다
+pytest.importorskip("dlib")
+
+from fastapi.testclient import TestClient
+
+from app import main
+from app.services.result_store import ResultStore
+
+
+@pytest.fixture
+def client(tmp_path, monkeypatch):
+    monkeypatch.setattr(main, "result_store", ResultStore(directory=tmp_path, max_bytes=1024 * 1024, ttl=3600))
+    return TestClient(main.app)
+
+
+def test_conditional_request_for_unknown_result_is_404(client):
+    unknown = f"{'0' * 64}.png"
+    assert client.get(f"/api/results/{unknown}", headers={"If-None-Match": "*"}).status_code == 404
+    assert client.get("/api/results/invalid", headers={"If-None-Match": "*"}).status_code == 404
+
+
+def test_conditional_request_for_stored_result_is_304(client):
+    result_id = main.result_store.put(b"\x89PNG result", "image/png")
+    etag = f'"{result_id.split(".")[0]}"'
+
+    assert client.get(f"/api/results/{result_id}", headers={"If-None-Match": etag}).status_code == 304
+    response = client.get(f"/api/results/{result_id}")
+    assert response.status_code == 200
+    assert response.content == b"\x89PNG result"